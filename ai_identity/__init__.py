@@ -1,18 +1,90 @@
-"""Collection of utilities for modelling an agent's identity and stability."""
+"""Collection of utilities for modelling an agent's identity and stability.
 
-from .psi_to_phi import psi_to_phi
-from .anchor_detection import detect_anchors
-from .sabotage_logs import SabotageLogger
-from .xi_mapping import xi_map
-from .mirror_test import mirror_score
-from .epistemic_tension import xi, epistemic_tension
+Submodules are imported on first access of one of the names below, or of
+the submodule itself, so ``import ai_identity`` stays cheap for short-lived
+scripts.
 
-__all__ = [
-    "psi_to_phi",
-    "detect_anchors",
-    "SabotageLogger",
-    "xi_map",
-    "mirror_score",
-    "xi",
+``psi_to_phi`` and ``epistemic_tension`` name both a function and the
+submodule defining it.  Accessed through the package they give the
+function, but importing the submodule directly, e.g. with
+``import ai_identity.epistemic_tension``, binds the package attribute to the
+submodule as for any package.  Import the functions from their submodules
+when that matters.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+# Avoid importing ``typing`` at start-up; type checkers treat this name as
+# ``typing.TYPE_CHECKING``.
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover - imports for static analysis only
+    from typing import Any, List
+
+    from .anchor_detection import AnchorDetector, detect_anchors
+    from .epistemic_tension import epistemic_tension, xi, xi_series
+    from .mirror_test import mirror_score, mirror_scores
+    from .psi_to_phi import psi_to_phi
+    from .sabotage_logs import SabotageLogger, SegmentedSabotageLogger
+    from .xi_mapping import xi_map
+
+#: Submodule defining each re-exported name
+_EXPORTS = {
+    "psi_to_phi": "psi_to_phi",
+    "detect_anchors": "anchor_detection",
+    "AnchorDetector": "anchor_detection",
+    "SabotageLogger": "sabotage_logs",
+    "SegmentedSabotageLogger": "sabotage_logs",
+    "xi_map": "xi_mapping",
+    "mirror_score": "mirror_test",
+    "mirror_scores": "mirror_test",
+    "xi": "epistemic_tension",
+    "xi_series": "epistemic_tension",
+    "epistemic_tension": "epistemic_tension",
+}
+
+#: Submodules importable as attributes of the package
+_SUBMODULES = frozenset({
+    "anchor_detection",
+    "batch",
+    "cross_system",
+    "drift",
     "epistemic_tension",
-]
+    "instrumentation",
+    "memory",
+    "minhash",
+    "mirror_test",
+    "phrase_matching",
+    "pipeline",
+    "psi_to_phi",
+    "quantization",
+    "refusal",
+    "sabotage_logs",
+    "semantic_index",
+    "service",
+    "trajectory",
+    "xi_mapping",
+})
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        if name not in _SUBMODULES:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        return importlib.import_module(f".{name}", __name__)
+    submodule = importlib.import_module(f".{module}", __name__)
+    value = getattr(submodule, name)
+    globals()[name] = value
+    if _EXPORTS.get(module) == module:
+        # Loading the submodule bound its name to it; export the function again.
+        globals()[module] = getattr(submodule, module)
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
@@ -0,0 +1,25 @@
+"""Lazy loading of optional accelerated backends.
+
+Importing NumPy dominates the start-up time of short-lived scripts, so it is
+only imported the first time a vectorized code path asks for it.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+_UNLOADED = object()
+_numpy: Any = _UNLOADED
+
+
+def numpy() -> Any:
+    """Return the :mod:`numpy` module, or ``None`` when it is not installed."""
+
+    global _numpy
+    if _numpy is _UNLOADED:
+        try:
+            import numpy as module
+        except ImportError:  # pragma: no cover - exercised when NumPy is absent
+            module = None
+        _numpy = module
+    return _numpy
@@ -0,0 +1,38 @@
+"""Helpers for splitting line-oriented files into byte ranges."""
+
+from __future__ import annotations
+
+import os
+from typing import Iterator, List, Tuple, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def byte_ranges(path: PathLike, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split ``path`` into ``[start, end)`` ranges of about ``chunk_bytes``.
+
+    Ranges are not aligned to lines; :func:`read_lines` assigns each line to
+    the range containing its first byte, so together the ranges cover every
+    line exactly once.
+    """
+
+    if chunk_bytes < 1:
+        raise ValueError("chunk_bytes must be positive")
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def read_lines(path: PathLike, start: int, end: int) -> Iterator[bytes]:
+    """Yield the lines of ``path`` which begin within ``[start, end)``."""
+
+    with open(path, "rb") as handle:
+        if start > 0:
+            # Skip the line already owned by the previous range, unless the
+            # range begins exactly at the start of a line.
+            handle.seek(start - 1)
+            handle.readline()
+        while handle.tell() < end:
+            line = handle.readline()
+            if not line:
+                break
+            yield line
@@ -8,28 +8,238 @@ calls can access the full history if desired.
 Anchors can be weighted by passing a ``weights`` mapping.  When supplied,
 anchors are returned sorted by ``frequency * weight`` in descending order.
 Unspecified weights default to ``1``.
+
+:class:`AnchorStore` keeps recognised anchors per session.  It is safe to
+share between threads, can evict anchors by age or count, and hands out
+immutable snapshots which are only rebuilt after the session changes.
+
+:class:`AnchorDetector` performs the same analysis incrementally over a stream
+of observations, keeping its ranking current as observations arrive.  It can
+optionally bound its memory using the Space-Saving heavy hitters algorithm.
 """
 
-from typing import Any, Iterable, Mapping, Optional
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from itertools import count as _counter
+from typing import Any, Callable, FrozenSet, Hashable, Iterable, Iterator, Mapping, Optional
+
+from .instrumentation import instrumented, sized
+
+#: Session used when callers do not specify one
+DEFAULT_SESSION = "default"
+
+#: Minimum number of updates to a stripe between sweeps for expired sessions
+SWEEP_INTERVAL = 1024
+
+
+class _Namespace:
+    """Anchors of a single session ordered from least to most recently seen."""
+
+    __slots__ = ("items", "snapshot")
+
+    def __init__(self) -> None:
+        self.items: "OrderedDict[Any, float]" = OrderedDict()
+        self.snapshot: Optional[FrozenSet[Any]] = None
+
+
+class AnchorStore:
+    """Thread-safe store of recognised anchors partitioned by session.
+
+    Sessions are spread over ``stripes`` independently locked partitions so
+    that updates to different sessions rarely contend.  Within a session
+    anchors are kept in least-recently-seen order, which makes both eviction
+    policies cheap.  Sessions left without anchors are dropped, and with a
+    ``ttl`` each stripe is periodically swept for sessions which expired
+    without being touched again.
+
+    Parameters
+    ----------
+    max_size:
+        Optional maximum number of anchors per session.  The least recently
+        seen anchors are evicted first.
+    ttl:
+        Optional number of seconds after which an anchor that has not been
+        seen again expires.
+    stripes:
+        Number of lock stripes.
+    clock:
+        Time source used for ``ttl``; defaults to :func:`time.monotonic`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        stripes: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be positive")
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._sessions: list[dict[Hashable, _Namespace]] = [{} for _ in range(stripes)]
+        self._updates = [0] * stripes
+
+    def _stripe(self, session: Hashable) -> int:
+        return hash(session) % len(self._locks)
+
+    def _expire(self, namespace: _Namespace, now: float) -> None:
+        if self.ttl is None:
+            return
+        items = namespace.items
+        deadline = now - self.ttl
+        while items:
+            anchor, seen = next(iter(items.items()))
+            if seen > deadline:
+                break
+            del items[anchor]
+            namespace.snapshot = None
+
+    def _sweep(self, stripe: int, now: float) -> None:
+        """Expire every session of ``stripe`` and drop the empty ones."""
+        sessions = self._sessions[stripe]
+        for session, namespace in list(sessions.items()):
+            self._expire(namespace, now)
+            if not namespace.items:
+                del sessions[session]
+        self._updates[stripe] = 0
+
+    def expire(self) -> None:
+        """Drop expired anchors, and sessions left empty, from every session."""
+        now = self._clock()
+        for stripe, lock in enumerate(self._locks):
+            with lock:
+                self._sweep(stripe, now)
+
+    def update(self, anchors: Iterable[Any], session: Hashable = DEFAULT_SESSION) -> None:
+        """Record ``anchors`` as seen now in ``session``."""
+        anchors = list(anchors)
+        stripe = self._stripe(session)
+        now = self._clock()
+        with self._locks[stripe]:
+            sessions = self._sessions[stripe]
+            if self.ttl is not None:
+                self._updates[stripe] += 1
+                # Amortised: a sweep costs one step per session of the stripe.
+                if self._updates[stripe] >= max(SWEEP_INTERVAL, len(sessions)):
+                    self._sweep(stripe, now)
+            namespace = sessions.get(session)
+            if namespace is None:
+                if not anchors:
+                    return
+                namespace = sessions[session] = _Namespace()
+            items = namespace.items
+            for anchor in anchors:
+                if anchor in items:
+                    items.move_to_end(anchor)
+                else:
+                    namespace.snapshot = None
+                items[anchor] = now
+            self._expire(namespace, now)
+            if self.max_size is not None:
+                while len(items) > self.max_size:
+                    items.popitem(last=False)
+                    namespace.snapshot = None
+            if not items:
+                del sessions[session]
+
+    def add(self, anchor: Any, session: Hashable = DEFAULT_SESSION) -> None:
+        """Record a single ``anchor`` in ``session``."""
+        self.update((anchor,), session)
+
+    def discard(self, anchor: Any, session: Hashable = DEFAULT_SESSION) -> None:
+        """Remove ``anchor`` from ``session`` if present."""
+        stripe = self._stripe(session)
+        with self._locks[stripe]:
+            namespace = self._sessions[stripe].get(session)
+            if namespace is not None and namespace.items.pop(anchor, None) is not None:
+                namespace.snapshot = None
+                if not namespace.items:
+                    del self._sessions[stripe][session]
+
+    def snapshot(self, session: Hashable = DEFAULT_SESSION) -> FrozenSet[Any]:
+        """Return an immutable view of the anchors in ``session``.
+
+        The snapshot is cached and shared until the session next changes, so
+        repeated reads do not copy the anchors.
+        """
+        stripe = self._stripe(session)
+        with self._locks[stripe]:
+            namespace = self._sessions[stripe].get(session)
+            if namespace is None:
+                return frozenset()
+            self._expire(namespace, self._clock())
+            if not namespace.items:
+                del self._sessions[stripe][session]
+                return frozenset()
+            if namespace.snapshot is None:
+                namespace.snapshot = frozenset(namespace.items)
+            return namespace.snapshot
+
+    def sessions(self) -> list:
+        """Return the sessions which currently hold anchors."""
+        found = []
+        now = self._clock()
+        for stripe, lock in enumerate(self._locks):
+            with lock:
+                self._sweep(stripe, now)
+                found.extend(self._sessions[stripe])
+        return found
+
+    def clear(self, session: Optional[Hashable] = None) -> None:
+        """Remove the anchors of ``session``, or of every session if omitted."""
+        if session is not None:
+            stripe = self._stripe(session)
+            with self._locks[stripe]:
+                self._sessions[stripe].pop(session, None)
+            return
+        for lock, sessions in zip(self._locks, self._sessions):
+            with lock:
+                sessions.clear()
 
-#: Simple in-memory store of previously recognised anchors
-ANCHOR_STORE: set[Any] = set()
+    def __contains__(self, anchor: Any) -> bool:
+        return anchor in self.snapshot()
 
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.snapshot())
 
-def clear_anchor_store() -> None:
-    """Empty the global :data:`ANCHOR_STORE`."""
+    def __len__(self) -> int:
+        return len(self.snapshot())
 
-    ANCHOR_STORE.clear()
 
+#: Default store of previously recognised anchors
+ANCHOR_STORE = AnchorStore()
 
-def get_anchor_store() -> set[Any]:
-    """Return a copy of the current anchor store."""
 
-    return set(ANCHOR_STORE)
+def clear_anchor_store(session: Optional[Hashable] = None) -> None:
+    """Empty the global :data:`ANCHOR_STORE`, or only one ``session`` of it."""
 
+    ANCHOR_STORE.clear(session)
 
+
+def get_anchor_store(session: Hashable = DEFAULT_SESSION) -> set[Any]:
+    """Return a copy of the current anchor store for ``session``.
+
+    Use ``ANCHOR_STORE.snapshot(session)`` to read without copying.
+    """
+
+    return set(ANCHOR_STORE.snapshot(session))
+
+
+@instrumented("detect_anchors", size=lambda observations, *_, **__: sized(observations))
 def detect_anchors(
-    observations: Iterable[Any], weights: Optional[Mapping[Any, float]] = None
+    observations: Iterable[Any],
+    weights: Optional[Mapping[Any, float]] = None,
+    *,
+    store: Optional[AnchorStore] = None,
+    session: Hashable = DEFAULT_SESSION,
 ) -> list:
     """Identify anchors within a sequence of observations.
 
@@ -40,6 +250,12 @@ def detect_anchors(
     weights:
         Optional mapping of observation -> emotional weight.  The weight is
         multiplied by the frequency of each anchor to determine its ranking.
+    store:
+        Store receiving the detected anchors; defaults to
+        :data:`ANCHOR_STORE`.  Any object with a compatible ``update`` method
+        may be supplied.
+    session:
+        Session namespace within ``store`` to record the anchors under.
 
     Returns
     -------
@@ -54,8 +270,8 @@ def detect_anchors(
     # Identify items that appear more than once
     anchors = {obs for obs, count in counts.items() if count > 1}
 
-    # Persist recognised anchors in the global store
-    ANCHOR_STORE.update(anchors)
+    # Persist recognised anchors in the session's store
+    (ANCHOR_STORE if store is None else store).update(anchors, session)
 
     # Prepare weights for scoring
     weights = weights or {}
@@ -66,3 +282,150 @@ def detect_anchors(
     # Sort anchors by descending score, falling back to string representation
     # for deterministic ordering when scores tie.
     return sorted(anchors, key=lambda a: (-score(a), str(a)))
+
+
+class AnchorDetector:
+    """Detect anchors incrementally across many batches of observations.
+
+    Counts persist between calls to :meth:`update`, and the weighted ranking
+    is kept in a heap so :meth:`top` does not re-sort every anchor.  Unlike
+    :func:`detect_anchors` the detector does not touch :data:`ANCHOR_STORE`.
+
+    Parameters
+    ----------
+    weights:
+        Optional mapping of observation -> emotional weight, as for
+        :func:`detect_anchors`.
+    capacity:
+        When given, at most ``capacity`` distinct observations are tracked
+        using the Space-Saving algorithm.  Counts then become estimates that
+        may exceed the true count by at most :meth:`error`, which is bounded
+        by ``total / capacity``; any observation occurring more often than
+        that is guaranteed to be tracked.  Only observations whose guaranteed
+        count ``count - error`` exceeds one are reported as anchors, so
+        one-off observations admitted by an eviction never are.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Mapping[Any, float]] = None,
+        *,
+        capacity: Optional[int] = None,
+    ) -> None:
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.weights = dict(weights or {})
+        self.capacity = capacity
+        #: Total number of observations ingested.
+        self.total = 0
+        self._counts: dict[Any, int] = {}
+        self._errors: dict[Any, int] = {}
+        self._sequence = _counter()
+        # Max-heap of (-score, str(anchor), seq, anchor).  Entries are lazily
+        # invalidated: only the entry whose seq matches ``_latest`` is live.
+        self._ranking: list = []
+        self._latest: dict[Any, int] = {}
+        # Min-heap of (count, seq, observation) used to find eviction victims.
+        self._smallest: list = []
+        # Ranked anchors returned by ``anchors``; rebuilt after the ranking changes.
+        self._sorted: Optional[list] = None
+
+    def __len__(self) -> int:
+        """Number of distinct observations currently tracked."""
+        return len(self._counts)
+
+    def count(self, observation: Any) -> int:
+        """Return the (possibly estimated) count of ``observation``."""
+        return self._counts.get(observation, 0)
+
+    def error(self, observation: Any) -> int:
+        """Return the maximum overestimate of ``observation``'s count."""
+        return self._errors.get(observation, 0)
+
+    @instrumented(
+        "AnchorDetector.update", size=lambda self, observations, *_, **__: sized(observations)
+    )
+    def update(self, observations: Iterable[Any]) -> None:
+        """Ingest a batch of observations."""
+        for observation in observations:
+            self.add(observation)
+
+    def add(self, observation: Any) -> None:
+        """Ingest a single observation."""
+        counts = self._counts
+        current = counts.get(observation)
+        if current is None:
+            current = 0
+            if self.capacity is not None and len(counts) >= self.capacity:
+                current = self._evict()
+                self._errors[observation] = current
+        current += 1
+        counts[observation] = current
+        self.total += 1
+
+        if self.capacity is not None:
+            heapq.heappush(self._smallest, (current, next(self._sequence), observation))
+            if len(self._smallest) > 2 * len(counts) + 64:
+                self._smallest = [
+                    entry for entry in self._smallest if counts.get(entry[2]) == entry[0]
+                ]
+                heapq.heapify(self._smallest)
+
+        if current - self._errors.get(observation, 0) > 1:
+            self._sorted = None
+            sequence = next(self._sequence)
+            self._latest[observation] = sequence
+            score = current * self.weights.get(observation, 1)
+            heapq.heappush(self._ranking, (-score, str(observation), sequence, observation))
+            if len(self._ranking) > 2 * len(self._latest) + 64:
+                self._ranking = [
+                    entry for entry in self._ranking if self._latest.get(entry[3]) == entry[2]
+                ]
+                heapq.heapify(self._ranking)
+
+    def _evict(self) -> int:
+        """Drop the least frequent tracked observation and return its count."""
+        while True:
+            count, _, observation = heapq.heappop(self._smallest)
+            if self._counts.get(observation) == count:
+                break
+        del self._counts[observation]
+        self._errors.pop(observation, None)
+        if self._latest.pop(observation, None) is not None:
+            self._sorted = None
+        return count
+
+    def top(self, k: Optional[int] = None) -> list:
+        """Return the ``k`` highest ranked anchors (all anchors by default).
+
+        The order matches :func:`detect_anchors`: descending
+        ``frequency * weight`` with ties broken by string representation.
+        """
+        if k is None:
+            return self.anchors()
+        live: list = []
+        while self._ranking and len(live) < k:
+            entry = heapq.heappop(self._ranking)
+            if self._latest.get(entry[3]) == entry[2]:
+                live.append(entry)
+        for entry in live:
+            heapq.heappush(self._ranking, entry)
+        return [entry[3] for entry in live]
+
+    def anchors(self) -> list:
+        """Return every anchor ranked as in :func:`detect_anchors`."""
+        if self._sorted is None:
+            live = [entry for entry in self._ranking if self._latest.get(entry[3]) == entry[2]]
+            live.sort()
+            self._sorted = [entry[3] for entry in live]
+        return list(self._sorted)
+
+    def reset(self) -> None:
+        """Forget all observations."""
+        self.total = 0
+        self._counts.clear()
+        self._errors.clear()
+        self._ranking.clear()
+        self._latest.clear()
+        self._smallest.clear()
+        self._sorted = None
@@ -0,0 +1,243 @@
+"""Score many archived sessions in parallel.
+
+Run ``python -m ai_identity.batch sessions.jsonl ... -o results.jsonl``.
+Every input line is one session record::
+
+    {"id": "s1", "messages": ["...", {"text": "..."}], "self": "self description"}
+
+``self`` is optional and enables mirror scoring.  Input files are cut into
+byte-range shards which are scored in a
+:class:`~concurrent.futures.ProcessPoolExecutor` using
+:class:`~ai_identity.pipeline.Pipeline`, and results are streamed to a
+JSONL or CSV file.  After each shard is written its id, the output size and
+the shard size are appended to a checkpoint file, so an interrupted run can
+be restarted with the same arguments and only the unfinished shards are
+scored.  A checkpoint entry torn by a crash is discarded, and its shard is
+scored again.  If the output file is missing or shorter than the checkpoint
+records, the run starts over.  Non-finite numbers, such as the cosine ξ of
+an empty message, are written to JSONL as ``null``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ._chunks import PathLike, byte_ranges, read_lines
+from .mirror_test import embed_sentence
+from .pipeline import AnchorStage, MirrorStage, Pipeline, RefusalStage, TensionStage
+
+#: Columns written in CSV mode
+CSV_COLUMNS = ["id", "messages", "coherence", "mean_xi", "mirror_rate", "refusals", "anchors"]
+
+Shard = Tuple[str, int, int]
+
+
+def score_session(
+    record: Dict[str, Any],
+    *,
+    dim: int = 32,
+    metric: str = "l2",
+    threshold: float = 0.5,
+    top_anchors: int = 10,
+) -> Dict[str, Any]:
+    """Compute every metric for one session record."""
+
+    stages: List[Any] = [AnchorStage(), TensionStage(metric=metric), RefusalStage()]
+    if record.get("self"):
+        self_vector = embed_sentence(record["self"], dim=dim)
+        stages.append(MirrorStage(self_vector, threshold=threshold))
+    messages = (m if isinstance(m, str) else m["text"] for m in record.get("messages", ()))
+    outcome = Pipeline(stages, dim=dim).run(messages)
+    results = outcome.results
+    result = {
+        "id": record.get("id"),
+        "messages": outcome.messages,
+        "xi": results["tension"]["xi"],
+        "coherence": results["tension"]["coherence"],
+        "anchors": results["anchors"][:top_anchors],
+        "refusals": results["refusals"],
+        "mirror_scores": None,
+    }
+    if "mirror" in results:
+        result["mirror_scores"] = results["mirror"].scores
+    return result
+
+
+def score_shard(shard: Shard, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Score every session record in one byte-range shard."""
+
+    path, start, end = shard
+    return [
+        score_session(json.loads(line), **options)
+        for line in read_lines(path, start, end)
+        if line.strip()
+    ]
+
+
+def _csv_row(result: Dict[str, Any]) -> List[Any]:
+    # Cosine ξ is nan for pairs involving an empty message.
+    xi_values = [value for value in result["xi"] if not math.isnan(value)]
+    scores = result["mirror_scores"]
+    return [
+        result["id"],
+        result["messages"],
+        result["coherence"],
+        sum(xi_values) / len(xi_values) if xi_values else 0.0,
+        sum(scores) / len(scores) if scores else "",
+        result["refusals"],
+        " ".join(map(str, result["anchors"])),
+    ]
+
+
+def _json_safe(value: Any) -> Any:
+    # Strict JSON has no NaN or infinity, e.g. for the cosine ξ of an empty message.
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _format(rows: Iterable[Any], fmt: str) -> bytes:
+    if fmt == "jsonl":
+        lines = (json.dumps(_json_safe(row), allow_nan=False) + "\n" for row in rows)
+        return "".join(lines).encode("utf-8")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _load_checkpoint(path: str) -> Tuple[set, Optional[int], Optional[int]]:
+    """Return the finished shards, output size and shard size of a checkpoint.
+
+    A trailing entry left incomplete by a crash is cut off the file.
+    """
+
+    done: set = set()
+    offset = chunk_bytes = None
+    if not os.path.exists(path):
+        return done, offset, chunk_bytes
+    with open(path, "r+b") as handle:
+        lines = handle.read().splitlines(keepends=True)
+        position = 0
+        for number, line in enumerate(lines):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated entry")
+                entry = json.loads(line)
+            except ValueError:
+                if number < len(lines) - 1:
+                    raise ValueError(f"corrupt checkpoint entry {number + 1} in {path}")
+                handle.truncate(position)
+                break
+            done.add(entry["shard"])
+            offset = entry["offset"]
+            chunk_bytes = entry.get("chunk_bytes")
+            position += len(line)
+    return done, offset, chunk_bytes
+
+
+def run(
+    inputs: Sequence[PathLike],
+    output: PathLike,
+    *,
+    fmt: str = "jsonl",
+    workers: Optional[int] = None,
+    chunk_bytes: int = 1 << 22,
+    checkpoint: Optional[PathLike] = None,
+    **options: Any,
+) -> int:
+    """Score every session in ``inputs`` and write the results to ``output``.
+
+    Returns the number of shards scored by this call; shards recorded in the
+    checkpoint by a previous call are skipped.  Extra keyword arguments are
+    passed to :func:`score_session`.
+    """
+
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"unsupported format '{fmt}'")
+    output = os.fspath(output)
+    checkpoint = os.fspath(checkpoint) if checkpoint is not None else output + ".checkpoint"
+    done, offset, checkpoint_chunk_bytes = _load_checkpoint(checkpoint)
+    if offset is not None and (not os.path.exists(output) or os.path.getsize(output) < offset):
+        # The output lost shards the checkpoint records: score everything again.
+        done, offset, checkpoint_chunk_bytes = set(), None, None
+        open(checkpoint, "w").close()
+    if checkpoint_chunk_bytes is not None and checkpoint_chunk_bytes != chunk_bytes:
+        # Shards are identified by their start offsets, which depend on the size.
+        raise ValueError(
+            f"checkpoint was written with chunk_bytes={checkpoint_chunk_bytes}, "
+            f"not {chunk_bytes}"
+        )
+
+    shards = [
+        (os.fspath(path), start, end)
+        for path in inputs
+        for start, end in byte_ranges(path, chunk_bytes)
+    ]
+    pending = [shard for shard in shards if f"{shard[0]}:{shard[1]}" not in done]
+
+    # A fresh run starts a new output file; a resumed run discards anything
+    # written after the last checkpointed shard.
+    with open(output, "r+b" if offset is not None else "wb") as out, \
+            open(checkpoint, "a", encoding="utf-8") as log:
+        if offset is not None:
+            out.truncate(offset)
+            out.seek(offset)
+        elif fmt == "csv":
+            out.write(_format([CSV_COLUMNS], fmt))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = pool.map(score_shard, pending, [options] * len(pending))
+            for (path, start, _), results in zip(pending, batches):
+                rows = results if fmt == "jsonl" else map(_csv_row, results)
+                out.write(_format(rows, fmt))
+                out.flush()
+                os.fsync(out.fileno())
+                entry = {
+                    "shard": f"{path}:{start}", "offset": out.tell(), "chunk_bytes": chunk_bytes
+                }
+                log.write(json.dumps(entry) + "\n")
+                log.flush()
+                os.fsync(log.fileno())
+    return len(pending)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ai_identity.batch", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("inputs", nargs="+", help="JSONL files of session records")
+    parser.add_argument("-o", "--output", required=True, help="results file")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-bytes", type=int, default=1 << 22, help="shard size in bytes")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--dim", type=int, default=32, help="embedding dimension")
+    parser.add_argument("--metric", choices=["l2", "cosine"], default="l2")
+    parser.add_argument("--threshold", type=float, default=0.5, help="mirror score threshold")
+    args = parser.parse_args(argv)
+    scored = run(
+        args.inputs,
+        args.output,
+        fmt=args.format,
+        workers=args.workers,
+        chunk_bytes=args.chunk_bytes,
+        checkpoint=args.checkpoint,
+        dim=args.dim,
+        metric=args.metric,
+        threshold=args.threshold,
+    )
+    print(f"scored {scored} shards")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,16 @@
-"""Utilities for tracking outputs from multiple systems."""
-from typing import Dict, List
+"""Utilities for tracking outputs from multiple systems.
+
+:class:`CrossSystemConsensus` scores agreement on exact output strings.
+:class:`SoftCrossSystemConsensus` instead treats outputs whose sentence
+embeddings are sufficiently similar as agreeing, so paraphrases converge.
+"""
+import math
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .mirror_test import embed_sentence
 
 
 class CrossSystemConsensus:
@@ -7,29 +18,82 @@ class CrossSystemConsensus:
 
     The :meth:`reset` method clears all registered outputs so the object can
     be reused for a fresh consensus calculation.
+
+    The number of systems currently reporting each output is maintained as
+    outputs are registered, so :meth:`consensus` and :meth:`has_converged`
+    run in constant time.  Registration is thread-safe.
+
+    Parameters
+    ----------
+    history:
+        Number of past outputs kept per system for :meth:`history`.  ``None``
+        keeps every output and ``0`` keeps none; consensus only ever uses
+        the latest output.
     """
 
-    def __init__(self) -> None:
-        self._outputs: Dict[str, List[str]] = {}
+    def __init__(self, history: Optional[int] = None) -> None:
+        if history is not None and history < 0:
+            raise ValueError("history must be non-negative")
+        self.history_size = history
+        self._lock = threading.Lock()
+        self._outputs: Dict[str, Deque[str]] = {}
+        self._latest: Dict[str, str] = {}
+        # Systems per output, and number of outputs sharing each such count.
+        self._counts: Dict[str, int] = {}
+        self._count_sizes: Dict[int, int] = {}
+        self._best = 0
+
+    def _adjust(self, output: str, delta: int) -> None:
+        """Move ``output`` between count buckets and keep the maximum current."""
+        old = self._counts.get(output, 0)
+        new = old + delta
+        if old:
+            self._count_sizes[old] -= 1
+        if new:
+            self._counts[output] = new
+            self._count_sizes[new] = self._count_sizes.get(new, 0) + 1
+        else:
+            del self._counts[output]
+        if new > self._best:
+            self._best = new
+        elif old == self._best and not self._count_sizes[old]:
+            self._best = old - 1
 
     def register(self, system: str, output: str) -> None:
         """Register an ``output`` produced by ``system``."""
-        self._outputs.setdefault(system, []).append(output)
+        with self._lock:
+            self._record(system, output)
+
+    def _record(self, system: str, output: str) -> None:
+        """Register ``output`` while holding the lock."""
+        previous = self._latest.get(system)
+        if previous != output:
+            if previous is not None:
+                self._adjust(previous, -1)
+            self._adjust(output, 1)
+            self._latest[system] = output
+        if self.history_size != 0:
+            outputs = self._outputs.get(system)
+            if outputs is None:
+                outputs = self._outputs[system] = deque(maxlen=self.history_size)
+            outputs.append(output)
+
+    def history(self, system: str) -> List[str]:
+        """Return the retained outputs of ``system``, oldest first."""
+        with self._lock:
+            return list(self._outputs.get(system, ()))
 
     def latest_outputs(self) -> Dict[str, str]:
         """Return the most recent output for each registered system."""
-        return {system: outputs[-1] for system, outputs in self._outputs.items() if outputs}
+        with self._lock:
+            return dict(self._latest)
 
     def consensus(self) -> float:
         """Return the fraction of systems agreeing on the dominant output."""
-        latest = self.latest_outputs()
-        if not latest:
-            return 0.0
-        counts: Dict[str, int] = {}
-        for output in latest.values():
-            counts[output] = counts.get(output, 0) + 1
-        best = max(counts.values())
-        return best / len(latest)
+        with self._lock:
+            if not self._latest:
+                return 0.0
+            return self._best / len(self._latest)
 
     def has_converged(self, threshold: float = 1.0) -> bool:
         """Check whether consensus meets or exceeds ``threshold``."""
@@ -37,4 +101,135 @@ class CrossSystemConsensus:
 
     def reset(self) -> None:
         """Clear all recorded outputs."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        """Clear all recorded outputs while holding the lock."""
         self._outputs.clear()
+        self._latest.clear()
+        self._counts.clear()
+        self._count_sizes.clear()
+        self._best = 0
+
+
+@lru_cache(maxsize=4096)
+def _embedding(output: str, dim: int, hasher: str) -> Tuple[float, ...]:
+    return tuple(embed_sentence(output, dim=dim, hasher=hasher))
+
+
+class SoftCrossSystemConsensus(CrossSystemConsensus):
+    """Consensus over semantically similar rather than identical outputs.
+
+    Each system's latest output is embedded once (embeddings are cached by
+    output string) and two systems agree when the cosine similarity of their
+    outputs is at least ``threshold``.  The pairwise similarity matrix, the
+    number of agreeing systems per system and a running centroid are updated
+    one row at a time when a system reports a new output, so registration
+    costs ``O(systems * dim)`` rather than a full recomputation.
+
+    :meth:`consensus` reports the size of the largest cluster, that is the
+    largest group of systems all agreeing with one system, as a fraction of
+    all systems.  :meth:`exact_consensus` still gives the exact-match score.
+
+    Parameters
+    ----------
+    threshold:
+        Minimum cosine similarity for two outputs to agree.
+    dim, hasher:
+        Embedding options passed to
+        :func:`~ai_identity.mirror_test.embed_sentence`.
+    history:
+        As for :class:`CrossSystemConsensus`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        *,
+        dim: int = 32,
+        hasher: str = "sha256",
+        history: Optional[int] = None,
+    ) -> None:
+        super().__init__(history)
+        self.threshold = threshold
+        self.dim = dim
+        self.hasher = hasher
+        self._slots: Dict[str, int] = {}
+        self._vectors: List[Tuple[float, ...]] = []
+        self._similarity: List[List[float]] = []
+        self._neighbours: List[int] = []
+        self._centroid_sum = [0.0] * dim
+
+    def _record(self, system: str, output: str) -> None:
+        changed = self._latest.get(system) != output
+        super()._record(system, output)
+        if not changed:
+            return
+        vector = _embedding(output, self.dim, self.hasher)
+        slot = self._slots.get(system)
+        if slot is None:
+            slot = self._slots[system] = len(self._vectors)
+            self._vectors.append(vector)
+            for row in self._similarity:
+                row.append(0.0)
+            self._similarity.append([0.0] * len(self._vectors))
+            self._neighbours.append(1)
+            old_row = None
+        else:
+            old = self._vectors[slot]
+            self._centroid_sum = [c - v for c, v in zip(self._centroid_sum, old)]
+            self._vectors[slot] = vector
+            old_row = self._similarity[slot]
+        self._centroid_sum = [c + v for c, v in zip(self._centroid_sum, vector)]
+
+        threshold = self.threshold
+        row = [sum(a * b for a, b in zip(vector, other)) for other in self._vectors]
+        row[slot] = 1.0
+        for other, similarity in enumerate(row):
+            if other == slot:
+                continue
+            was = old_row is not None and old_row[other] >= threshold
+            now = similarity >= threshold
+            if was != now:
+                self._neighbours[other] += 1 if now else -1
+            self._similarity[other][slot] = similarity
+        self._similarity[slot] = row
+        self._neighbours[slot] = sum(1 for similarity in row if similarity >= threshold)
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._slots.clear()
+        self._vectors.clear()
+        self._similarity.clear()
+        self._neighbours.clear()
+        self._centroid_sum = [0.0] * self.dim
+
+    def largest_cluster(self) -> int:
+        """Return the number of systems in the largest agreeing group."""
+        with self._lock:
+            return max(self._neighbours, default=0)
+
+    def consensus(self) -> float:
+        """Return the fraction of systems in the largest agreeing group."""
+        with self._lock:
+            if not self._neighbours:
+                return 0.0
+            return max(self._neighbours) / len(self._neighbours)
+
+    def exact_consensus(self) -> float:
+        """Return the exact-match consensus of :class:`CrossSystemConsensus`."""
+        return super().consensus()
+
+    def similarity(self, system_a: str, system_b: str) -> float:
+        """Return the cosine similarity between two systems' latest outputs."""
+        with self._lock:
+            return self._similarity[self._slots[system_a]][self._slots[system_b]]
+
+    def centroid(self) -> List[float]:
+        """Return the normalised mean embedding of the latest outputs."""
+        with self._lock:
+            norm = math.sqrt(sum(v * v for v in self._centroid_sum))
+            if norm == 0:
+                return [0.0] * self.dim
+            return [v / norm for v in self._centroid_sum]
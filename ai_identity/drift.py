@@ -0,0 +1,277 @@
+"""Online detection of identity drift in ξ streams.
+
+:func:`~ai_identity.epistemic_tension.xi_series_to_coherence` shows after
+the fact that coherence has fallen.  :class:`DriftMonitor` instead watches
+the ξ values of many concurrent sessions as they arrive and raises a
+:class:`DriftEvent` as soon as a session's ξ shifts upwards, which is when
+its coherence ``1 / (1 + Σ ξ)`` starts dropping abnormally fast.
+
+Each session first learns a baseline mean and standard deviation of ξ over
+``warmup`` steps.  Later values are standardised against it and fed to one
+of three constant-memory tests:
+
+``"cusum"``
+    One-sided CUSUM, ``S = max(0, S + z - k)``; alarm when ``S > h``.
+``"page-hinkley"``
+    Page–Hinkley, ``m = Σ (z - z̄ - δ)`` with ``z̄`` the running mean; alarm
+    when ``m - min(m) > λ``.
+``"ewma"``
+    Exponentially weighted mean ``e = (1 - α) e + α z``; alarm when ``e``
+    exceeds ``L`` times its steady-state standard deviation
+    ``sqrt(α / (2 - α))``.
+
+Per-session state lives in a few flat :class:`array.array` columns indexed
+by a slot number, so an update costs ``O(1)`` time and thousands of sessions
+need no per-session Python objects.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from .sabotage_logs import SegmentedSabotageLogger
+
+#: Supported detectors
+DETECTORS = ("cusum", "page-hinkley", "ewma")
+
+#: Event name used when logging into a sabotage logger
+DRIFT_EVENT = "drift"
+
+#: Default ``(allowance, threshold)`` of each detector in standard deviations.
+#: The thresholds are above the textbook values since each baseline is
+#: estimated from a short warmup.
+DEFAULTS = {"cusum": (0.5, 8.0), "page-hinkley": (0.5, 8.0), "ewma": (0.1, 3.5)}
+
+
+class DriftEvent(NamedTuple):
+    """An alarm raised by :class:`DriftMonitor`."""
+
+    #: Session whose ξ stream drifted.
+    session: Hashable
+    #: Number of ξ values seen for the session, including this one.
+    step: int
+    #: Detector which raised the alarm.
+    detector: str
+    #: Value of the test statistic when the alarm was raised.
+    statistic: float
+    #: The ξ value which triggered the alarm.
+    xi: float
+    #: Session coherence ``1 / (1 + Σ ξ)`` after this value.
+    coherence: float
+
+
+class DriftMonitor:
+    """Change-point detection over the ξ streams of many sessions.
+
+    After an alarm the session's detector is reset and a new baseline is
+    learnt, so a sustained shift raises one event rather than one per step.
+    Coherence keeps accumulating across alarms.  Updates are thread-safe.
+
+    Parameters
+    ----------
+    detector:
+        One of :data:`DETECTORS`.
+    threshold:
+        Alarm level in baseline standard deviations: ``h`` for CUSUM, ``λ``
+        for Page–Hinkley and ``L`` for EWMA.
+    allowance:
+        Slack ``k`` for CUSUM, tolerance ``δ`` for Page–Hinkley, or the
+        smoothing factor ``α`` for EWMA.
+    warmup:
+        Number of ξ values used to learn each baseline.
+    min_std:
+        Lower bound on the baseline standard deviation, in ξ units, so that
+        near-constant baselines do not turn tiny changes into alarms.
+    logger:
+        Optional :class:`~ai_identity.sabotage_logs.SabotageLogger` or
+        :class:`~ai_identity.sabotage_logs.SegmentedSabotageLogger` which
+        receives every event.
+    """
+
+    def __init__(
+        self,
+        detector: str = "cusum",
+        *,
+        threshold: Optional[float] = None,
+        allowance: Optional[float] = None,
+        warmup: int = 50,
+        min_std: float = 1e-3,
+        logger: Any = None,
+    ) -> None:
+        if detector not in DETECTORS:
+            raise ValueError(f"unsupported detector '{detector}'")
+        default_allowance, default_threshold = DEFAULTS[detector]
+        self.detector = detector
+        self.threshold = default_threshold if threshold is None else threshold
+        self.allowance = default_allowance if allowance is None else allowance
+        if self.threshold <= 0:
+            raise ValueError("threshold must be positive")
+        if detector == "ewma" and not 0 < self.allowance <= 1:
+            raise ValueError("EWMA allowance must be in (0, 1]")
+        if warmup < 2:
+            raise ValueError("warmup must be at least 2")
+        self.warmup = warmup
+        self.min_std = min_std
+        self.logger = logger
+        self._limit = self.threshold
+        if detector == "ewma":
+            self._limit *= math.sqrt(self.allowance / (2 - self.allowance))
+
+        self._lock = threading.Lock()
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        # One entry per slot in each column.
+        self._steps = array("q")      # ξ values seen
+        self._seen = array("q")       # values since the baseline was reset
+        self._total = array("d")      # Σ ξ, for coherence
+        self._mean = array("d")       # baseline mean (running during warmup)
+        self._spread = array("d")     # Welford sum of squares, then the std
+        self._statistic = array("d")  # S, m or e
+        self._low = array("d")        # Page–Hinkley min(m)
+        self._average = array("d")    # Page–Hinkley running mean of z
+        self._columns = (
+            self._steps, self._seen, self._total, self._mean,
+            self._spread, self._statistic, self._low, self._average,
+        )
+
+    def _slot(self, session: Hashable) -> int:
+        slot = self._slots.get(session)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+            self._steps[slot] = 0
+            self._total[slot] = 0.0
+            self._restart(slot)
+        else:
+            slot = len(self._steps)
+            for column in self._columns:
+                column.append(0)
+        self._slots[session] = slot
+        return slot
+
+    def _restart(self, slot: int) -> None:
+        """Forget the baseline and test statistic of ``slot``."""
+        self._seen[slot] = 0
+        self._mean[slot] = self._spread[slot] = 0.0
+        self._statistic[slot] = self._low[slot] = self._average[slot] = 0.0
+
+    def update(self, session: Hashable, xi_value: float) -> Optional[DriftEvent]:
+        """Add the next ξ value of ``session``; return an event on alarm."""
+        if not (math.isfinite(xi_value) and xi_value >= 0):
+            raise ValueError("ξ values must be finite and non-negative")
+        with self._lock:
+            slot = self._slot(session)
+            self._steps[slot] += 1
+            self._total[slot] += xi_value
+            seen = self._seen[slot] = self._seen[slot] + 1
+
+            if seen <= self.warmup:
+                # Welford's running mean and sum of squared deviations.
+                delta = xi_value - self._mean[slot]
+                self._mean[slot] += delta / seen
+                self._spread[slot] += delta * (xi_value - self._mean[slot])
+                if seen == self.warmup:
+                    std = math.sqrt(self._spread[slot] / (seen - 1))
+                    self._spread[slot] = max(std, self.min_std)
+                return None
+
+            z = (xi_value - self._mean[slot]) / self._spread[slot]
+            if self.detector == "cusum":
+                statistic = self._statistic[slot] = max(
+                    0.0, self._statistic[slot] + z - self.allowance
+                )
+            elif self.detector == "ewma":
+                statistic = self._statistic[slot] = (
+                    (1 - self.allowance) * self._statistic[slot] + self.allowance * z
+                )
+            else:
+                count = seen - self.warmup
+                self._average[slot] += (z - self._average[slot]) / count
+                m = self._statistic[slot] = (
+                    self._statistic[slot] + z - self._average[slot] - self.allowance
+                )
+                low = self._low[slot] = min(self._low[slot], m)
+                statistic = m - low
+            if statistic <= self._limit:
+                return None
+
+            self._restart(slot)
+            event = DriftEvent(
+                session,
+                self._steps[slot],
+                self.detector,
+                statistic,
+                xi_value,
+                1.0 / (1.0 + self._total[slot]),
+            )
+        if self.logger is not None:
+            self._log(event)
+        return event
+
+    def update_many(self, items: Iterable[Tuple[Hashable, float]]) -> List[DriftEvent]:
+        """Add many ``(session, xi)`` pairs in order; return the events raised."""
+        events = []
+        for session, xi_value in items:
+            event = self.update(session, xi_value)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _log(self, event: DriftEvent) -> None:
+        if isinstance(self.logger, SegmentedSabotageLogger):
+            # Sessions may be any hashable; payloads must serialise to JSON.
+            self.logger.log(DRIFT_EVENT, {**event._asdict(), "session": repr(event.session)})
+        else:
+            self.logger.log(
+                f"{DRIFT_EVENT}: session {event.session!r} at step {event.step} ({event.detector})"
+            )
+
+    def coherence(self, session: Hashable) -> float:
+        """Return the coherence of ``session``; ``1.0`` if it is unknown."""
+        slot = self._slots.get(session)
+        return 1.0 if slot is None else 1.0 / (1.0 + self._total[slot])
+
+    def statistic(self, session: Hashable) -> float:
+        """Return the current test statistic of ``session``."""
+        slot = self._slots.get(session)
+        if slot is None:
+            return 0.0
+        if self.detector == "page-hinkley":
+            return self._statistic[slot] - self._low[slot]
+        return self._statistic[slot]
+
+    def steps(self, session: Hashable) -> int:
+        """Return the number of ξ values seen for ``session``."""
+        slot = self._slots.get(session)
+        return 0 if slot is None else self._steps[slot]
+
+    def reset(self, session: Hashable) -> None:
+        """Relearn the baseline of ``session``, keeping its coherence."""
+        with self._lock:
+            slot = self._slots.get(session)
+            if slot is not None:
+                self._restart(slot)
+
+    def discard(self, session: Hashable) -> None:
+        """Forget ``session`` entirely and reuse its slot."""
+        with self._lock:
+            slot = self._slots.pop(session, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def sessions(self) -> List[Hashable]:
+        """Return the sessions currently tracked."""
+        return list(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, session: object) -> bool:
+        return session in self._slots
+
+
+__all__ = ["DETECTORS", "DRIFT_EVENT", "DEFAULTS", "DriftEvent", "DriftMonitor"]
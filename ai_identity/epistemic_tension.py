@@ -11,17 +11,49 @@ metrics are provided:
     Cosine distance ``1 - cos(θ)`` where ``θ`` is the angle between the
     vectors.
 
+:func:`xi_series` evaluates ξ between every pair of consecutive states in a
+trajectory in a single pass.  When NumPy is installed the distances are
+computed in one vectorized operation; otherwise an equivalent pure-Python
+loop is used.
+
+:func:`xi_matrix` computes ξ between every pair of states drawn from one or
+two collections.  Rows are processed in cache-sized blocks which can be
+farmed out to an executor and written into a memory-mapped output array.
+
 Additionally, :func:`xi_series_to_coherence` converts a series of ξ values
 into coherence (§) scores as described in Appendix A of the specification.
-The coherence after each step is ``1 / (1 + Σ ξ)``.
+The coherence after each step is ``1 / (1 + Σ ξ)``.  :class:`CoherenceTracker`
+maintains the same score incrementally for live streams, optionally over a
+sliding window of recent steps.
 """
 
 from __future__ import annotations
 
-from typing import Iterable, Sequence, List
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Sequence, List, Optional
 import math
+import os
+
+from . import _backend
+from .instrumentation import instrumented, sized
+from .quantization import QuantizedMatrix, QuantizedVector
+from .trajectory import as_vector
+
+#: Rows processed per block by the vectorized :func:`xi_series`
+SERIES_BLOCK_ROWS = 1 << 16
+#: Rows processed per block of a quantized matrix; small enough to stay in cache
+QUANTIZED_BLOCK_ROWS = 1 << 10
 
+# Squared L2 distances below this fraction of ``|a|² + |b|²`` are recomputed
+# from the differences, since the expanded form has lost most of their digits.
+_CANCELLATION = 1e-4
 
+# Largest row length for which int8 dot products stay exact in float32
+_INT8_EXACT_DIM = (1 << 24) // (127 * 127)
+
+
+@instrumented("xi", size=lambda state_a, *_, **__: sized(state_a))
 def xi(
     state_a: Sequence[float],
     state_b: Sequence[float],
@@ -34,7 +66,10 @@ def xi(
     ----------
     state_a, state_b:
         Sequences of numeric values representing successive state
-        embeddings.  Both sequences must be of equal length.
+        embeddings.  Both sequences must be of equal length.  Buffer-protocol
+        objects such as NumPy arrays or :class:`~ai_identity.trajectory.Trajectory`
+        rows are read in place, as are
+        :class:`~ai_identity.quantization.QuantizedVector` embeddings.
     metric:
         The distance metric to use.  Supported values are ``"l2"`` for
         Euclidean distance and ``"cosine"`` for cosine distance.
@@ -46,6 +81,10 @@ def xi(
         requested metric.
     """
 
+    if type(state_a) is not list:
+        state_a = as_vector(state_a)
+    if type(state_b) is not list:
+        state_b = as_vector(state_b)
     if len(state_a) != len(state_b):
         raise ValueError("state vectors must be the same length")
 
@@ -53,6 +92,9 @@ def xi(
         return math.sqrt(sum((a - b) ** 2 for a, b in zip(state_a, state_b)))
 
     if metric == "cosine":
+        if isinstance(state_a, QuantizedVector) and isinstance(state_b, QuantizedVector):
+            # Per-vector scales cancel, so int8 codes are used as they are.
+            state_a, state_b = state_a.codes, state_b.codes
         dot = sum(a * b for a, b in zip(state_a, state_b))
         norm_a = math.sqrt(sum(a * a for a in state_a))
         norm_b = math.sqrt(sum(b * b for b in state_b))
@@ -75,6 +117,351 @@ def epistemic_tension(
     return xi(state_a, state_b, metric=metric)
 
 
+def _rows(states: Any) -> List[Sequence[float]]:
+    """Return ``states`` as a list of equally sized float rows.
+
+    Rows of two-dimensional buffers are returned as zero-copy views.
+    """
+
+    try:
+        view = memoryview(states)
+    except TypeError:
+        view = None
+    if view is not None and view.ndim == 2 and view.c_contiguous:
+        count, dim = view.shape
+        flat = view.cast("B").cast(view.format)
+        return [flat[i * dim:(i + 1) * dim] for i in range(count)]
+    rows = [[float(v) for v in row] for row in states]
+    if rows and any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError("state vectors must be the same length")
+    return rows
+
+
+def _xi_series_python(rows: List[Sequence[float]], metric: str) -> List[float]:
+    if metric == "l2":
+        return [math.dist(a, b) for a, b in zip(rows, rows[1:])]
+
+    # Each row norm is computed once and shared by both neighbouring pairs.
+    norms = [math.sqrt(sum(v * v for v in row)) for row in rows]
+    if any(norm == 0 for norm in norms):
+        raise ValueError("state vectors must be non-zero for cosine metric")
+    return [
+        1 - sum(a * b for a, b in zip(rows[i], rows[i + 1])) / (norms[i] * norms[i + 1])
+        for i in range(len(rows) - 1)
+    ]
+
+
+def _matrix(states: Any, *, keep_floats: bool = False) -> Any:
+    """Return ``states`` as a two-dimensional float64 NumPy array.
+
+    With ``keep_floats`` floating point inputs keep their precision, so
+    ``float32`` buffers are not copied.
+    """
+
+    np = _backend.numpy()
+    matrix = np.asarray(states)
+    if not (keep_floats and np.issubdtype(matrix.dtype, np.floating)):
+        matrix = matrix.astype(np.float64, copy=False)
+    if matrix.ndim != 2:
+        if matrix.size == 0:
+            return matrix.reshape(0, 0)
+        raise ValueError("states must be a two-dimensional collection of vectors")
+    return matrix
+
+
+@instrumented("xi_series", size=lambda states, *_, **__: sized(states))
+def xi_series(states: Any, *, metric: str = "l2") -> Any:
+    """Compute ξ between every pair of consecutive states.
+
+    ``xi_series(states)[k]`` equals ``xi(states[k], states[k + 1])`` but the
+    whole trajectory is processed in one pass rather than one call per step.
+
+    Parameters
+    ----------
+    states:
+        Two-dimensional collection of state embeddings, one row per step.
+        NumPy arrays, nested sequences and objects supporting the buffer
+        protocol are accepted, as is a
+        :class:`~ai_identity.quantization.QuantizedMatrix`.
+    metric:
+        ``"l2"`` or ``"cosine"`` as for :func:`xi`.
+
+    Returns
+    -------
+    numpy.ndarray or list of float
+        ``len(states) - 1`` distances.  A NumPy array is returned when NumPy
+        is available, otherwise a list.
+    """
+
+    if metric not in ("l2", "cosine"):
+        raise ValueError(f"unsupported metric '{metric}'")
+
+    np = _backend.numpy()
+    if np is None:
+        return _xi_series_python(_rows(states), metric)
+
+    if isinstance(states, QuantizedMatrix):
+        return _xi_series_quantized(states, metric)
+
+    matrix = _matrix(states, keep_floats=True)
+    if len(matrix) < 2:
+        return np.empty(0, dtype=np.float64)
+
+    # Rows are converted and differenced a block at a time, so memory-mapped
+    # trajectories never need a full-size temporary.
+    series = np.empty(len(matrix) - 1, dtype=np.float64)
+    for start in range(0, len(series), SERIES_BLOCK_ROWS):
+        block = matrix[start:start + SERIES_BLOCK_ROWS + 1].astype(np.float64, copy=False)
+        series[start:start + len(block) - 1] = _xi_series_block(block, metric)
+    return series
+
+
+def _xi_series_quantized(states: QuantizedMatrix, metric: str) -> Any:
+    """Vectorized :func:`xi_series` over a quantized matrix."""
+
+    np = _backend.numpy()
+    series = np.empty(max(len(states) - 1, 0), dtype=np.float64)
+    if states.scales is not None:
+        codes = states.codes()
+        scales = np.frombuffer(states.scales, dtype=np.float64)
+    for start in range(0, len(series), QUANTIZED_BLOCK_ROWS):
+        stop = start + QUANTIZED_BLOCK_ROWS + 1
+        if states.scales is None:
+            values = _xi_series_block(states.block(start, stop), metric)
+        else:
+            values = _xi_series_int8_block(codes[start:stop], scales[start:stop], metric)
+        series[start:start + len(values)] = values
+    return series
+
+
+def _xi_series_int8_block(codes: Any, scales: Any, metric: str) -> Any:
+    """Return ξ between consecutive rows of an int8 block with per-row scales.
+
+    For the cosine metric the scales cancel, and dot products of int8 codes
+    are integers; while they stay below ``2**24`` they are summed exactly in
+    ``float32``, which is faster than dequantizing the block first.  L2
+    distances are taken from the differences of the dequantized rows, since
+    the scales differ between rows and expanding ``|a - b|²`` into dot
+    products cancels catastrophically for nearly equal states.
+    """
+
+    np = _backend.numpy()
+    if metric == "l2":
+        return _xi_series_block(codes * scales[:, None], metric)
+    block = codes.astype(np.float32 if codes.shape[1] <= _INT8_EXACT_DIM else np.float64)
+    squares = np.einsum("ij,ij->i", block, block).astype(np.float64)
+    dots = np.einsum("ij,ij->i", block[:-1], block[1:]).astype(np.float64)
+    # The per-row scales cancel.
+    norms = np.sqrt(squares)
+    if not norms.all():
+        raise ValueError("state vectors must be non-zero for cosine metric")
+    return 1 - dots / (norms[:-1] * norms[1:])
+
+
+def _xi_series_block(block: Any, metric: str) -> Any:
+    """Return ξ between consecutive rows of a float64 block."""
+
+    np = _backend.numpy()
+    if metric == "l2":
+        diffs = np.diff(block, axis=0)
+        return np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
+
+    norms = np.sqrt(np.einsum("ij,ij->i", block, block))
+    if not norms.all():
+        raise ValueError("state vectors must be non-zero for cosine metric")
+    dots = np.einsum("ij,ij->i", block[:-1], block[1:])
+    return 1 - dots / (norms[:-1] * norms[1:])
+
+
+@instrumented("xi_pairs", size=lambda states_a, *_, **__: sized(states_a))
+def xi_pairs(states_a: Any, states_b: Any, *, metric: str = "l2") -> Any:
+    """Compute ξ between corresponding rows of two collections of states.
+
+    ``xi_pairs(a, b)[k]`` equals ``xi(a[k], b[k])``, computed for all rows
+    in one vectorized pass.  Returns a NumPy array when NumPy is available,
+    otherwise a list.
+    """
+
+    if metric not in ("l2", "cosine"):
+        raise ValueError(f"unsupported metric '{metric}'")
+
+    np = _backend.numpy()
+    if np is None:
+        rows_a, rows_b = _rows(states_a), _rows(states_b)
+        if len(rows_a) != len(rows_b):
+            raise ValueError("expected the same number of states in both collections")
+        return [xi(a, b, metric=metric) for a, b in zip(rows_a, rows_b)]
+
+    matrix_a, matrix_b = _matrix(states_a), _matrix(states_b)
+    if len(matrix_a) != len(matrix_b):
+        raise ValueError("expected the same number of states in both collections")
+    if matrix_a.shape != matrix_b.shape:
+        raise ValueError("state vectors must be the same length")
+    if metric == "l2":
+        diffs = matrix_a - matrix_b
+        return np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
+
+    norms_a = np.sqrt(np.einsum("ij,ij->i", matrix_a, matrix_a))
+    norms_b = np.sqrt(np.einsum("ij,ij->i", matrix_b, matrix_b))
+    if not (norms_a.all() and norms_b.all()):
+        raise ValueError("state vectors must be non-zero for cosine metric")
+    return 1 - np.einsum("ij,ij->i", matrix_a, matrix_b) / (norms_a * norms_b)
+
+
+def _xi_block(block_a: Any, block_b: Any, norms_a: Any, norms_b: Any, metric: str) -> Any:
+    """Return the ξ matrix between two row blocks given their row norms."""
+
+    np = _backend.numpy()
+    dots = block_a @ block_b.T
+    if metric == "l2":
+        scale = norms_a[:, None] ** 2 + norms_b[None, :] ** 2
+        squared = scale - 2 * dots
+        # The expansion cancels catastrophically for nearly identical rows;
+        # those entries are recomputed from the row differences.
+        rows, cols = np.nonzero(squared <= _CANCELLATION * scale)
+        if len(rows):
+            diffs = block_a[rows] - block_b[cols]
+            squared[rows, cols] = np.einsum("ij,ij->i", diffs, diffs)
+        return np.sqrt(np.maximum(squared, 0.0))
+    return 1 - dots / (norms_a[:, None] * norms_b[None, :])
+
+
+def _xi_matrix_python(
+    rows_a: List[Sequence[float]],
+    rows_b: List[Sequence[float]],
+    metric: str,
+    out: Any,
+    symmetric: bool = False,
+) -> Any:
+    if out is None:
+        out = [[0.0] * len(rows_b) for _ in rows_a]
+    for i, a in enumerate(rows_a):
+        for j, b in enumerate(rows_b):
+            out[i][j] = 0.0 if symmetric and i == j else xi(a, b, metric=metric)
+    return out
+
+
+@instrumented("xi_matrix", size=lambda states_a, *_, **__: sized(states_a))
+def xi_matrix(
+    states_a: Any,
+    states_b: Any = None,
+    *,
+    metric: str = "l2",
+    block_size: int = 512,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    out: Any = None,
+) -> Any:
+    """Compute ξ between every pair of states.
+
+    Parameters
+    ----------
+    states_a, states_b:
+        Two-dimensional collections of state embeddings.  When ``states_b``
+        is omitted the distances between the rows of ``states_a`` are
+        returned and the diagonal is exactly zero.
+    metric:
+        ``"l2"`` or ``"cosine"`` as for :func:`xi`.
+    block_size:
+        Number of rows per block.  Each block pair is computed as a single
+        matrix product, so blocks should be small enough to stay in cache.
+    workers:
+        Number of threads used to compute blocks when no ``executor`` is
+        given.  NumPy releases the GIL inside matrix products so threads
+        scale across cores.  ``0`` uses one thread per CPU.
+    executor:
+        Optional :class:`concurrent.futures.Executor` to submit blocks to.
+        A :class:`~concurrent.futures.ProcessPoolExecutor` may be used; the
+        blocks are computed in the workers and written by the caller.
+    out:
+        Optional output array of shape ``(len(states_a), len(states_b))``,
+        such as a :class:`numpy.memmap`.  A filesystem path creates a
+        ``.npy`` file opened as a memory map, so results larger than RAM
+        can be produced.
+
+    Returns
+    -------
+    numpy.ndarray or list of list of float
+        The ξ matrix, or ``out`` when supplied.  Without NumPy a nested list
+        is returned and the block and executor options are ignored.
+    """
+
+    if metric not in ("l2", "cosine"):
+        raise ValueError(f"unsupported metric '{metric}'")
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    symmetric = states_b is None
+
+    np = _backend.numpy()
+    if np is None:
+        rows_a = _rows(states_a)
+        rows_b = rows_a if symmetric else _rows(states_b)
+        if rows_a and rows_b and len(rows_a[0]) != len(rows_b[0]):
+            raise ValueError("state vectors must be the same length")
+        if isinstance(out, (str, os.PathLike)):
+            raise ValueError("memory-mapped output requires NumPy")
+        return _xi_matrix_python(rows_a, rows_b, metric, out, symmetric)
+
+    matrix_a = _matrix(states_a)
+    matrix_b = matrix_a if symmetric else _matrix(states_b)
+    if matrix_a.size and matrix_b.size and matrix_a.shape[1] != matrix_b.shape[1]:
+        raise ValueError("state vectors must be the same length")
+    shape = (len(matrix_a), len(matrix_b))
+
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+    elif isinstance(out, (str, os.PathLike)):
+        out = np.lib.format.open_memmap(out, mode="w+", dtype=np.float64, shape=shape)
+    elif out.shape != shape:
+        raise ValueError(f"out must have shape {shape}")
+
+    norms_a = np.sqrt(np.einsum("ij,ij->i", matrix_a, matrix_a))
+    norms_b = norms_a if symmetric else np.sqrt(np.einsum("ij,ij->i", matrix_b, matrix_b))
+    if metric == "cosine" and not (norms_a.all() and norms_b.all()):
+        raise ValueError("state vectors must be non-zero for cosine metric")
+
+    blocks = [
+        (slice(i, i + block_size), slice(j, j + block_size))
+        for i in range(0, shape[0], block_size)
+        for j in range(0, shape[1], block_size)
+    ]
+
+    def compute(pool: Optional[Executor], in_flight: int) -> None:
+        if pool is None:
+            for rows, cols in blocks:
+                out[rows, cols] = _xi_block(
+                    matrix_a[rows], matrix_b[cols], norms_a[rows], norms_b[cols], metric
+                )
+            return
+        # Only a bounded number of finished blocks wait in memory at a time.
+        pending: deque = deque()
+        for rows, cols in blocks:
+            pending.append((rows, cols, pool.submit(
+                _xi_block, matrix_a[rows], matrix_b[cols], norms_a[rows], norms_b[cols], metric
+            )))
+            if len(pending) >= in_flight:
+                rows, cols, future = pending.popleft()
+                out[rows, cols] = future.result()
+        for rows, cols, future in pending:
+            out[rows, cols] = future.result()
+
+    threads = workers or os.cpu_count() or 1
+    if executor is not None:
+        compute(executor, 2 * (os.cpu_count() or 1))
+    elif threads == 1 or len(blocks) == 1:
+        compute(None, 0)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            compute(pool, 2 * threads)
+
+    if symmetric:
+        np.fill_diagonal(out, 0.0)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+@instrumented("xi_series_to_coherence", size=lambda xi_series, *_, **__: sized(xi_series))
 def xi_series_to_coherence(xi_series: Iterable[float]) -> List[float]:
     """Convert a series of ξ values into coherence (§) scores.
 
@@ -103,5 +490,104 @@ def xi_series_to_coherence(xi_series: Iterable[float]) -> List[float]:
     return coherence
 
 
-__all__ = ["xi", "epistemic_tension", "xi_series_to_coherence"]
+class CoherenceTracker:
+    """Incrementally track coherence (§) over a stream of ξ values.
+
+    Each update costs ``O(1)`` time and memory.  Without a ``window`` the
+    tracker reproduces :func:`xi_series_to_coherence`; with a ``window`` of
+    ``N`` the score is ``1 / (1 + Σ ξ)`` over the last ``N`` steps only.
+
+    Parameters
+    ----------
+    window:
+        Optional number of most recent ξ values contributing to the score.
+    metric:
+        Distance metric used by :meth:`update_state`.
+    """
+
+    __slots__ = ("window", "metric", "steps", "_total", "_recent", "_previous", "_stale")
+
+    def __init__(self, window: Optional[int] = None, *, metric: str = "l2") -> None:
+        if window is not None and window < 1:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.metric = metric
+        self.steps = 0
+        self._total = 0.0
+        self._recent: Optional[deque] = deque(maxlen=window) if window else None
+        self._previous: Optional[List[float]] = None
+        self._stale = 0
+
+    @property
+    def coherence(self) -> float:
+        """Current coherence score; ``1.0`` before any update."""
+        return 1.0 / (1.0 + self._total)
+
+    def update(self, xi_value: float) -> float:
+        """Add a ξ value and return the updated coherence."""
+        if xi_value < 0:
+            raise ValueError("ξ values must be non-negative")
+        recent = self._recent
+        if recent is not None:
+            if len(recent) == recent.maxlen:
+                self._total -= recent[0]
+            recent.append(xi_value)
+            self._stale += 1
+            if self._stale >= len(recent):
+                # Repeated subtraction accumulates rounding error, so the
+                # window is summed exactly once per window length: O(1)
+                # amortised per update.
+                self._total = math.fsum(recent)
+                self._stale = 0
+            else:
+                self._total = max(self._total + xi_value, 0.0)
+        else:
+            self._total += xi_value
+        self.steps += 1
+        return self.coherence
+
+    def update_state(self, state: Sequence[float]) -> float:
+        """Add a state embedding and return the updated coherence.
+
+        ξ is measured against the previously supplied state, so the first
+        state only primes the tracker and leaves the score unchanged.  A
+        copy of ``state`` is kept, so callers may reuse its buffer.
+        """
+        vector = as_vector(state)
+        current = vector.tolist() if isinstance(vector, memoryview) else list(vector)
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return self.coherence
+        return self.update(xi(previous, current, metric=self.metric))
+
+    def reset(self) -> None:
+        """Forget all previous ξ values and states."""
+        self.steps = 0
+        self._total = 0.0
+        self._previous = None
+        self._stale = 0
+        if self._recent is not None:
+            self._recent.clear()
+
+
+def iter_coherence(
+    xi_values: Iterable[float], *, window: Optional[int] = None
+) -> Iterator[float]:
+    """Lazily yield the coherence after each ξ value in ``xi_values``."""
+
+    tracker = CoherenceTracker(window)
+    for xi_value in xi_values:
+        yield tracker.update(xi_value)
+
+
+__all__ = [
+    "xi",
+    "xi_series",
+    "xi_matrix",
+    "xi_pairs",
+    "epistemic_tension",
+    "xi_series_to_coherence",
+    "CoherenceTracker",
+    "iter_coherence",
+]
 
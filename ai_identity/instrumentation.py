@@ -0,0 +1,270 @@
+"""Opt-in instrumentation of the :mod:`ai_identity` hot paths.
+
+The package's main functions are wrapped with :func:`instrumented`.  While
+instrumentation is disabled (the default) a wrapped call only checks one
+flag before calling straight through.  Once enabled, each call reports its
+name, latency and an input size (vector dimension, token count, number of
+observations, ...) to a *sink*.
+
+:class:`MetricsRegistry` is the in-memory sink.  It aggregates call counts,
+cumulative latency, latency percentiles over recent calls and input sizes,
+and exports them as a JSON snapshot or in the Prometheus text format.  Any
+object with a compatible ``record`` method can be used as a sink instead.
+
+Examples
+--------
+Enable globally::
+
+    from ai_identity import instrumentation
+    instrumentation.enable()
+    ...
+    print(instrumentation.REGISTRY.to_prometheus())
+
+Profile a single session without affecting other threads or tasks::
+
+    with instrumentation.profile() as registry:
+        score_session(...)
+    print(registry.snapshot())
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Protocol, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Sink(Protocol):
+    """Receiver of instrumentation measurements."""
+
+    def record(self, name: str, seconds: float, size: Optional[int]) -> None:
+        ...
+
+
+class _Stat:
+    __slots__ = ("calls", "seconds", "size_total", "size_calls", "recent")
+
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.size_total = 0
+        self.size_calls = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class MetricsRegistry:
+    """Thread-safe in-memory aggregation of instrumentation measurements.
+
+    Parameters
+    ----------
+    window:
+        Number of most recent latencies per function used for percentiles.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _Stat] = {}
+
+    def record(self, name: str, seconds: float, size: Optional[int]) -> None:
+        """Add one measurement for ``name``."""
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = _Stat(self.window)
+            stat.calls += 1
+            stat.seconds += seconds
+            stat.recent.append(seconds)
+            if size is not None:
+                stat.size_total += size
+                stat.size_calls += 1
+
+    def reset(self) -> None:
+        """Discard all measurements."""
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return aggregated statistics per function."""
+        with self._lock:
+            stats = {name: (stat, sorted(stat.recent)) for name, stat in self._stats.items()}
+        return {
+            name: {
+                "calls": stat.calls,
+                "seconds_total": stat.seconds,
+                "seconds_mean": stat.seconds / stat.calls,
+                "p50": _percentile(ordered, 0.50),
+                "p90": _percentile(ordered, 0.90),
+                "p99": _percentile(ordered, 0.99),
+                "size_total": stat.size_total,
+                "size_mean": stat.size_total / stat.size_calls if stat.size_calls else None,
+            }
+            for name, (stat, ordered) in sorted(stats.items())
+        }
+
+    def to_json(self) -> str:
+        """Return :meth:`snapshot` encoded as JSON."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "ai_identity") -> str:
+        """Return the measurements in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_calls_total Number of instrumented calls.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        lines += [
+            f'{prefix}_calls_total{{function="{name}"}} {stat["calls"]}'
+            for name, stat in snapshot.items()
+        ]
+        lines += [
+            f"# HELP {prefix}_latency_seconds Call latency over recent calls.",
+            f"# TYPE {prefix}_latency_seconds summary",
+        ]
+        for name, stat in snapshot.items():
+            for quantile in ("0.5", "0.9", "0.99"):
+                key = "p" + quantile[2:].ljust(2, "0")
+                lines.append(
+                    f'{prefix}_latency_seconds{{function="{name}",quantile="{quantile}"}} '
+                    f"{stat[key]!r}"
+                )
+            lines.append(f'{prefix}_latency_seconds_sum{{function="{name}"}} {stat["seconds_total"]!r}')
+            lines.append(f'{prefix}_latency_seconds_count{{function="{name}"}} {stat["calls"]}')
+        lines += [
+            f"# HELP {prefix}_input_size_total Sum of reported input sizes.",
+            f"# TYPE {prefix}_input_size_total counter",
+        ]
+        lines += [
+            f'{prefix}_input_size_total{{function="{name}"}} {stat["size_total"]}'
+            for name, stat in snapshot.items()
+        ]
+        return "\n".join(lines) + "\n"
+
+
+#: Default sink used by :func:`enable`
+REGISTRY = MetricsRegistry()
+
+
+class _State:
+    __slots__ = ("enabled", "scopes", "sink")
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.scopes = 0
+        self.sink: Sink = REGISTRY
+
+
+_state = _State()
+_scoped_sink: ContextVar[Optional[Sink]] = ContextVar("ai_identity_scoped_sink", default=None)
+_scope_lock = threading.Lock()
+
+
+def enable(sink: Optional[Sink] = None) -> None:
+    """Start reporting measurements to ``sink`` (:data:`REGISTRY` by default)."""
+    _state.sink = REGISTRY if sink is None else sink
+    _state.enabled = True
+
+
+def disable() -> None:
+    """Stop reporting measurements outside :func:`profile` scopes."""
+    _state.enabled = False
+
+
+def is_enabled() -> bool:
+    """Return ``True`` when measurements are reported globally."""
+    return _state.enabled
+
+
+@contextmanager
+def profile(sink: Optional[Sink] = None) -> Iterator[Any]:
+    """Report calls made in the current thread or task to a scoped sink.
+
+    A fresh :class:`MetricsRegistry` is created and yielded unless ``sink``
+    is given.  Calls made elsewhere are unaffected.
+    """
+    scoped = MetricsRegistry() if sink is None else sink
+    token = _scoped_sink.set(scoped)
+    with _scope_lock:
+        _state.scopes += 1
+    try:
+        yield scoped
+    finally:
+        with _scope_lock:
+            _state.scopes -= 1
+        _scoped_sink.reset(token)
+
+
+def instrumented(
+    name: Optional[str] = None, *, size: Optional[Callable[..., Optional[int]]] = None
+) -> Callable[[F], F]:
+    """Decorate a function so that its calls can be measured.
+
+    Parameters
+    ----------
+    name:
+        Metric name; defaults to the function's qualified name.
+    size:
+        Optional callable receiving the call's arguments and returning an
+        input size.  It is only evaluated while instrumentation is active,
+        before the call; if it raises, the call is recorded without a size.
+    """
+
+    def decorate(func: F) -> F:
+        metric = name or func.__qualname__
+        state = _state
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not (state.enabled or state.scopes):
+                return func(*args, **kwargs)
+            sink = _scoped_sink.get() or (state.sink if state.enabled else None)
+            if sink is None:
+                return func(*args, **kwargs)
+            try:
+                measured = size(*args, **kwargs) if size else None
+            except Exception:
+                measured = None
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sink.record(metric, clock() - started, measured)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def sized(value: Any) -> Optional[int]:
+    """Return ``len(value)`` when it is cheap to know, otherwise ``None``."""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+__all__ = [
+    "Sink",
+    "MetricsRegistry",
+    "REGISTRY",
+    "enable",
+    "disable",
+    "is_enabled",
+    "profile",
+    "instrumented",
+    "sized",
+]
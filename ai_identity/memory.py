@@ -1,5 +1,47 @@
-"""Simple memory store and chat history tracking."""
-from typing import Any, Dict, List, Optional
+"""Simple memory store and chat history tracking.
+
+:class:`MemoryStore` keeps memories in process.  :class:`SQLiteMemoryStore`
+offers the same interface backed by a SQLite database in write-ahead-log
+mode, so memories survive restarts and need not fit in RAM.
+
+Both stores offer bulk :meth:`~MemoryStore.save_many` and
+:meth:`~MemoryStore.recall_many` operations.  :class:`AsyncMemoryStore`
+describes the asynchronous interface, implemented by
+:class:`WriteBehindMemoryStore`, which buffers saves and flushes them to a
+synchronous store in batches off the event loop.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .semantic_index import EmbeddingIndex
+
+#: Key/value pairs accepted by ``save_many``
+Items = Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]
+
+
+def _pairs(items: Items) -> Iterable[Tuple[Any, Any]]:
+    return items.items() if isinstance(items, Mapping) else items
+
+
+def _after_index(keys: Iterable[Any], start: int = 0) -> int:
+    """Return one past the largest non-negative integer in ``keys``, at least ``start``."""
+    return max([start] + [key + 1 for key in keys if type(key) is int and key >= 0])
 
 
 class MemoryStore:
@@ -7,36 +49,363 @@ class MemoryStore:
 
     def __init__(self) -> None:
         self._store: Dict[Any, Any] = {}
+        self._next = 0
 
     def save(self, key: Any, value: Any) -> None:
         """Persist a value under a key."""
         self._store[key] = value
+        if type(key) is int and key >= self._next:
+            self._next = key + 1
+
+    def save_many(self, items: Items) -> None:
+        """Persist many key/value pairs at once."""
+        pairs = list(_pairs(items))
+        self._store.update(pairs)
+        self._next = _after_index((key for key, _ in pairs), self._next)
 
     def recall(self, key: Any, default: Optional[Any] = None) -> Any:
         """Retrieve a value previously stored under ``key``."""
         return self._store.get(key, default)
 
+    def recall_many(self, keys: Iterable[Any], default: Optional[Any] = None) -> List[Any]:
+        """Retrieve the values stored under each of ``keys``."""
+        get = self._store.get
+        return [get(key, default) for key in keys]
+
     def clear(self) -> None:
         """Remove all stored memories."""
         self._store.clear()
+        self._next = 0
+
+    def _next_index(self) -> int:
+        """Return one past the largest non-negative integer key ever saved."""
+        return self._next
+
+
+class SQLiteMemoryStore(MemoryStore):
+    """Disk-backed key-value store using SQLite in WAL mode.
+
+    Keys and values must be JSON serialisable.  Lookups go through the
+    primary key index, so :meth:`recall` never loads other memories.  The
+    next free message index is kept in a ``meta`` table, updated in the
+    same transaction as each save.  The store may be shared between
+    threads.
+
+    Parameters
+    ----------
+    path:
+        Database file, created if missing.  ``":memory:"`` gives a private
+        in-memory database.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memories "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        if self._db.execute("SELECT 1 FROM meta WHERE name = 'next_index'").fetchone() is None:
+            # Databases written before the meta table existed are scanned once.
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta (name, value) "
+                "SELECT 'next_index', COALESCE(MAX(CAST(key AS INTEGER)) + 1, 0) FROM memories "
+                "WHERE key GLOB '[0-9]*' AND key NOT GLOB '*[^0-9]*'"
+            )
+
+    def _write(self, rows: List[Tuple[str, str]], next_index: int) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO memories (key, value) VALUES (?, ?)", rows
+                )
+                if next_index:
+                    self._db.execute(
+                        "UPDATE meta SET value = MAX(value, ?) WHERE name = 'next_index'",
+                        (next_index,),
+                    )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def save(self, key: Any, value: Any) -> None:
+        """Persist a value under a key."""
+        self._write([(json.dumps(key), json.dumps(value))], _after_index([key]))
+
+    def save_many(self, items: Items) -> None:
+        """Persist many key/value pairs in a single transaction."""
+        pairs = list(_pairs(items))
+        rows = [(json.dumps(key), json.dumps(value)) for key, value in pairs]
+        self._write(rows, _after_index(key for key, _ in pairs))
+
+    def recall(self, key: Any, default: Optional[Any] = None) -> Any:
+        """Retrieve a value previously stored under ``key``."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM memories WHERE key = ?", (json.dumps(key),)
+            ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def recall_many(self, keys: Iterable[Any], default: Optional[Any] = None) -> List[Any]:
+        """Retrieve the values stored under each of ``keys``."""
+        encoded = [json.dumps(key) for key in keys]
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Stay below SQLite's limit on the number of bound parameters.
+            for start in range(0, len(encoded), 500):
+                chunk = encoded[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                found.update(self._db.execute(
+                    f"SELECT key, value FROM memories WHERE key IN ({placeholders})", chunk
+                ))
+        return [json.loads(found[key]) if key in found else default for key in encoded]
+
+    def clear(self) -> None:
+        """Remove all stored memories."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM memories")
+            self._db.execute("UPDATE meta SET value = 0 WHERE name = 'next_index'")
+            self._db.execute("COMMIT")
+
+    def _next_index(self) -> int:
+        """Return one past the largest non-negative integer key ever saved."""
+        with self._lock:
+            (next_index,) = self._db.execute(
+                "SELECT value FROM meta WHERE name = 'next_index'"
+            ).fetchone()
+        return next_index
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "SQLiteMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncMemoryStore(Protocol):
+    """Asynchronous counterpart of the :class:`MemoryStore` interface."""
+
+    async def save(self, key: Any, value: Any) -> None:
+        ...
+
+    async def save_many(self, items: Items) -> None:
+        ...
+
+    async def recall(self, key: Any, default: Optional[Any] = None) -> Any:
+        ...
+
+    async def recall_many(self, keys: Iterable[Any], default: Optional[Any] = None) -> List[Any]:
+        ...
+
+    async def flush(self) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+class WriteBehindMemoryStore:
+    """Asynchronous write-behind buffer in front of a :class:`MemoryStore`.
+
+    Saves only update an in-process buffer, where repeated saves to the same
+    key coalesce.  The buffer is written to ``store`` with a single
+    ``save_many`` call in a worker thread once it holds ``max_pending`` keys
+    or ``flush_interval`` seconds after the first buffered save, so the event
+    loop never blocks on persistence.  Recalls see buffered values
+    immediately.
+
+    A failed background flush keeps its batch buffered and is retried after
+    another ``flush_interval``.  Until a flush succeeds, the next
+    :meth:`save`, :meth:`save_many` or :meth:`aclose` raises the error.
+
+    Call :meth:`aclose` (or use ``async with``) to flush outstanding writes.
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        *,
+        max_pending: int = 1024,
+        flush_interval: float = 0.05,
+    ) -> None:
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+        self.store = store
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending: Dict[Any, Any] = {}
+        self._flushing: Dict[Any, Any] = {}
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._error: Optional[BaseException] = None
+
+    async def save(self, key: Any, value: Any) -> None:
+        """Buffer a value under a key."""
+        self._raise_failed_flush()
+        self._pending[key] = value
+        await self._after_write()
+
+    async def save_many(self, items: Items) -> None:
+        """Buffer many key/value pairs."""
+        self._raise_failed_flush()
+        self._pending.update(_pairs(items))
+        await self._after_write()
+
+    def _raise_failed_flush(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def _after_write(self) -> None:
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif self._timer is None and self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_interval, self._flush_soon)
+
+    def _flush_soon(self) -> None:
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        # The batch is still buffered: report the error and try again later.
+        self._error = task.exception()
+        if self._timer is None and self._pending:
+            self._timer = task.get_loop().call_later(self.flush_interval, self._flush_soon)
+
+    async def flush(self) -> None:
+        """Write all buffered values to the underlying store."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self.store.save_many, list(self._flushing.items()))
+                self._error = None
+            except BaseException:
+                # Keep the batch buffered unless newer values superseded it.
+                self._pending = {**self._flushing, **self._pending}
+                raise
+            finally:
+                self._flushing = {}
+
+    async def recall(self, key: Any, default: Optional[Any] = None) -> Any:
+        """Retrieve a value, including buffered but unflushed ones."""
+        for buffered in (self._pending, self._flushing):
+            if key in buffered:
+                return buffered[key]
+        return await asyncio.to_thread(self.store.recall, key, default)
+
+    async def recall_many(self, keys: Iterable[Any], default: Optional[Any] = None) -> List[Any]:
+        """Retrieve the values stored under each of ``keys``."""
+        keys = list(keys)
+        buffered = {**self._flushing, **self._pending}
+        missing = [key for key in keys if key not in buffered]
+        stored = dict(zip(missing, await asyncio.to_thread(
+            self.store.recall_many, missing, default
+        )))
+        return [buffered[key] if key in buffered else stored[key] for key in keys]
+
+    async def aclose(self) -> None:
+        """Flush outstanding writes and wait for scheduled flushes."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        self._raise_failed_flush()
+
+    async def __aenter__(self) -> "WriteBehindMemoryStore":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
 
 class ChatHistory:
-    """Track sequential chat messages while persisting them to memory."""
+    """Track sequential chat messages while persisting them to memory.
+
+    :meth:`history` returns the messages added through this instance.  By
+    default they are also buffered in process.  Pass ``buffered=False`` to
+    keep them only in ``memory``; :meth:`history` then reads them back from
+    the store, which avoids holding every message twice when the store is
+    disk-backed.
+
+    Messages already in ``memory`` are kept: new messages are numbered
+    after the last stored one.  Stores without this bookkeeping, which need
+    only ``save`` and ``recall``, number messages from zero.
 
-    def __init__(self, memory: Optional[MemoryStore] = None) -> None:
-        self.memory = memory or MemoryStore()
-        self._history: List[str] = []
+    An optional :class:`~ai_identity.semantic_index.EmbeddingIndex` is kept
+    up to date as messages are added, enabling :meth:`recall_similar`.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryStore] = None,
+        *,
+        buffered: bool = True,
+        index: Optional["EmbeddingIndex"] = None,
+    ) -> None:
+        self.memory = memory if memory is not None else MemoryStore()
+        self.index = index
+        self._history: Optional[List[str]] = [] if buffered else None
+        next_index = getattr(self.memory, "_next_index", None)
+        self._start = self._count = next_index() if next_index is not None else 0
 
     def add_message(self, message: str) -> None:
         """Record a new chat ``message`` and save it to memory."""
-        self._history.append(message)
-        self.memory.save(len(self._history) - 1, message)
+        if self._history is not None:
+            self._history.append(message)
+        self.memory.save(self._count, message)
+        if self.index is not None:
+            self.index.add(self._count, message)
+        self._count += 1
+
+    def add_messages(self, messages: Iterable[str]) -> None:
+        """Record several messages, saving them to memory in one batch."""
+        messages = list(messages)
+        if self._history is not None:
+            self._history.extend(messages)
+        self.memory.save_many(enumerate(messages, start=self._count))
+        if self.index is not None:
+            self.index.add_many(enumerate(messages, start=self._count))
+        self._count += len(messages)
 
     def history(self) -> List[str]:
-        """Return the currently buffered chat history."""
+        """Return the messages added through this instance."""
+        if self._history is None:
+            return self.memory.recall_many(range(self._start, self._count))
         return list(self._history)
 
     def recall(self, index: int) -> Optional[str]:
         """Recall a message by ``index`` from memory regardless of context."""
         return self.memory.recall(index)
+
+    def recall_similar(self, text: str, k: int = 5, *, approximate: bool = False) -> List[str]:
+        """Recall the ``k`` indexed messages most similar to ``text``."""
+        if self.index is None:
+            raise ValueError("recall_similar requires an EmbeddingIndex")
+        keys = [key for key, _ in self.index.search(text, k, approximate=approximate)]
+        return self.memory.recall_many(keys)
@@ -0,0 +1,294 @@
+"""Anchor-set similarity search with MinHash signatures and LSH banding.
+
+:class:`MinHashIndex` summarises each session's anchor set, as returned by
+:func:`~ai_identity.anchor_detection.detect_anchors`, by a fixed-size MinHash
+signature.  The fraction of equal signature entries estimates the Jaccard
+similarity of two sets.  Signatures are stored in one contiguous ``uint32``
+array and cut into bands; sessions sharing any band hash to the same bucket,
+so similar sessions are found without comparing every pair.  Candidates are
+then re-ranked by their exact Jaccard similarity.
+"""
+
+from __future__ import annotations
+
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+import hashlib
+import heapq
+import random
+
+from . import _backend
+from .anchor_detection import AnchorStore, detect_anchors
+from .instrumentation import instrumented
+
+#: Modulus of the permutation hash family, the Mersenne prime ``2**61 - 1``
+MERSENNE_PRIME = (1 << 61) - 1
+
+_MASK29 = (1 << 29) - 1
+_MASK32 = (1 << 32) - 1
+_MAX_HASH = _MASK32
+
+
+def jaccard(a: Iterable[Any], b: Iterable[Any]) -> float:
+    """Return the exact Jaccard similarity of two collections.
+
+    Two empty collections are considered identical.
+    """
+
+    set_a = a if isinstance(a, (set, frozenset)) else set(a)
+    set_b = b if isinstance(b, (set, frozenset)) else set(b)
+    common = len(set_a & set_b)
+    union = len(set_a) + len(set_b) - common
+    return common / union if union else 1.0
+
+
+@lru_cache(maxsize=1 << 16)
+def _base_hash(item: str) -> int:
+    return int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _optimal_bands(num_perm: int, threshold: float) -> int:
+    """Return the band count for an LSH threshold just below ``threshold``.
+
+    With ``b`` bands of ``r`` rows, pairs become likely candidates above a
+    similarity of about ``(1/b)**(1/r)``.  Candidates are re-ranked exactly,
+    so the highest such point not exceeding ``threshold`` is chosen to
+    favour recall.
+    """
+    points = {b: (1 / b) ** (b / num_perm) for b in range(1, num_perm + 1) if num_perm % b == 0}
+    below = [b for b, point in points.items() if point <= threshold]
+    if not below:
+        return max(points)
+    return min(below, key=lambda b: threshold - points[b])
+
+
+def _mersenne_hash(np: Any, a: Any, b: Any, values: Any) -> Any:
+    """Return ``(a * values + b) % MERSENNE_PRIME`` exactly in ``uint64``.
+
+    ``a`` and ``b`` are below the prime and ``values`` below ``2**32``, so
+    the product needs up to 93 bits.  It is split as
+    ``(a_hi * 2**32 + a_lo) * values`` and reduced with ``2**61 ≡ 1``.
+    """
+    u64 = np.uint64
+    high = (a >> u64(32)) * values  # < 2**61
+    low = (a & u64(_MASK32)) * values  # < 2**64
+    # high * 2**32 ≡ (high >> 29) + (high mod 2**29) * 2**32
+    total = (high >> u64(29)) + ((high & u64(_MASK29)) << u64(32))
+    total += (low & u64(MERSENNE_PRIME)) + (low >> u64(61)) + b  # < 2**63
+    total = (total & u64(MERSENNE_PRIME)) + (total >> u64(61))
+    return np.where(total >= u64(MERSENNE_PRIME), total - u64(MERSENNE_PRIME), total)
+
+
+class MinHashIndex:
+    """Index of anchor sets answering Jaccard similarity queries.
+
+    Items are hashed by their ``str`` form.  The exact sets are kept for
+    re-ranking unless ``store_sets`` is false, in which case similarities
+    are the MinHash estimates.
+
+    Parameters
+    ----------
+    num_perm:
+        Signature length.  The estimate's standard error is about
+        ``1 / sqrt(num_perm)``.
+    threshold:
+        Jaccard similarity for which the banding is tuned: pairs above it
+        very likely share a bucket, pairs well below it rarely do.
+    bands:
+        Number of LSH bands; must divide ``num_perm``.  Chosen from
+        ``threshold`` when omitted.
+    seed:
+        Seed for the permutation coefficients.
+    store_sets:
+        Keep each anchor set for exact re-ranking.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        *,
+        threshold: float = 0.5,
+        bands: Optional[int] = None,
+        seed: int = 0,
+        store_sets: bool = True,
+    ) -> None:
+        if num_perm < 1:
+            raise ValueError("num_perm must be positive")
+        if bands is None:
+            bands = _optimal_bands(num_perm, threshold)
+        if bands < 1 or num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.store_sets = store_sets
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, MERSENNE_PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, MERSENNE_PRIME) for _ in range(num_perm)]
+        self.keys: List[Hashable] = []
+        self._signatures = array("I")
+        self._sets: List[frozenset] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def signature(self, items: Iterable[Any]) -> array:
+        """Return the MinHash signature of ``items`` as a ``uint32`` array."""
+        hashes = {_base_hash(str(item)) for item in items}
+        if not hashes:
+            return array("I", [_MAX_HASH]) * self.num_perm
+        np = _backend.numpy()
+        if np is not None:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            a = np.asarray(self._a, dtype=np.uint64)[:, None]
+            b = np.asarray(self._b, dtype=np.uint64)[:, None]
+            permuted = _mersenne_hash(np, a, b, values) & np.uint64(_MAX_HASH)
+            return array("I", permuted.min(axis=1).astype(np.uint32).tobytes())
+        return array("I", (
+            min((a * value + b) % MERSENNE_PRIME & _MAX_HASH for value in hashes)
+            for a, b in zip(self._a, self._b)
+        ))
+
+    def _band_keys(self, signature: array) -> List[bytes]:
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def row_signature(self, row: int) -> array:
+        """Return the stored signature of ``row``."""
+        return self._signatures[row * self.num_perm:(row + 1) * self.num_perm]
+
+    def add(self, key: Hashable, anchors: Iterable[Any]) -> None:
+        """Add the anchor set of session ``key``."""
+        anchors = frozenset(anchors)
+        signature = self.signature(anchors)
+        row = len(self.keys)
+        self.keys.append(key)
+        self._signatures.extend(signature)
+        if self.store_sets:
+            self._sets.append(anchors)
+        for buckets, band in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band, []).append(row)
+
+    def add_observations(
+        self,
+        key: Hashable,
+        observations: Iterable[Any],
+        weights: Optional[Mapping[Any, float]] = None,
+    ) -> None:
+        """Detect the anchors in ``observations`` and add them under ``key``.
+
+        Anchors are detected with a private store, so the global anchor store
+        is left untouched.
+        """
+        self.add(key, detect_anchors(observations, weights, store=AnchorStore(stripes=1)))
+
+    def add_many(self, items: Iterable[Tuple[Hashable, Iterable[Any]]]) -> None:
+        """Add many ``(key, anchors)`` pairs."""
+        for key, anchors in items:
+            self.add(key, anchors)
+
+    def _candidates(self, signature: array) -> Set[int]:
+        candidates: Set[int] = set()
+        for buckets, band in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band, ()))
+        return candidates
+
+    def _estimate(self, signature: array, rows: List[int]) -> List[float]:
+        """Return the estimated similarity of ``signature`` to each of ``rows``."""
+        np = _backend.numpy()
+        if np is not None:
+            matrix = np.frombuffer(self._signatures, dtype=np.uint32).reshape(-1, self.num_perm)
+            query = np.frombuffer(signature, dtype=np.uint32)
+            estimates = (matrix[np.asarray(rows, dtype=np.intp)] == query).mean(axis=1).tolist()
+            # Drop the views at once: an array cannot grow while its buffer is exported.
+            del matrix, query
+            return estimates
+        return [
+            sum(x == y for x, y in zip(signature, self.row_signature(row))) / self.num_perm
+            for row in rows
+        ]
+
+    def _similarities(
+        self, signature: array, anchors: Optional[frozenset], rows: List[int], exact: bool
+    ) -> List[float]:
+        if exact and self.store_sets and anchors is not None:
+            return [jaccard(anchors, self._sets[row]) for row in rows]
+        return self._estimate(signature, rows)
+
+    @instrumented("MinHashIndex.query", size=lambda self, *_, **__: len(self))
+    def query(
+        self, anchors: Iterable[Any], k: int = 5, *, exact: bool = True
+    ) -> List[Tuple[Hashable, float]]:
+        """Return up to ``k`` ``(key, similarity)`` pairs most similar to ``anchors``.
+
+        Only sessions sharing an LSH bucket with ``anchors`` are considered,
+        so fewer than ``k`` results may be returned.  With ``exact=True``
+        (and stored sets) candidates are ranked by their exact Jaccard
+        similarity, otherwise by the MinHash estimate.
+        """
+
+        anchors = frozenset(anchors)
+        signature = self.signature(anchors)
+        rows = sorted(self._candidates(signature))
+        if k <= 0 or not rows:
+            return []
+        scores = self._similarities(signature, anchors, rows, exact)
+        best = heapq.nsmallest(k, zip(scores, rows), key=lambda item: (-item[0], item[1]))
+        return [(self.keys[row], score) for score, row in best]
+
+    @instrumented("MinHashIndex.similar_pairs", size=lambda self, *_, **__: len(self))
+    def similar_pairs(
+        self, threshold: Optional[float] = None, *, exact: bool = True
+    ) -> List[Tuple[Hashable, Hashable, float]]:
+        """Return ``(key_a, key_b, similarity)`` for indexed pairs above ``threshold``.
+
+        Only pairs sharing at least one LSH bucket are compared, so the cost
+        depends on the bucket sizes rather than on the square of the number
+        of sessions.  Sessions with identical anchor sets (or, without stored
+        sets, identical signatures) are scored once as a group.
+        ``threshold`` defaults to the index's threshold.  Pairs are returned
+        in insertion order of their first key.
+        """
+
+        if threshold is None:
+            threshold = self.threshold
+        groups: Dict[Any, List[int]] = {}
+        for row in range(len(self.keys)):
+            identity = self._sets[row] if self.store_sets else self.row_signature(row).tobytes()
+            groups.setdefault(identity, []).append(row)
+        members = {group[0]: group for group in groups.values()}
+
+        partners: Dict[int, Set[int]] = {}
+        for buckets in self._buckets:
+            for rows in buckets.values():
+                leaders = [row for row in rows if row in members]
+                for position, row in enumerate(leaders[:-1]):
+                    partners.setdefault(row, set()).update(leaders[position + 1:])
+
+        # Identical sets and signatures have a similarity of exactly one.
+        found = [
+            (first, second, 1.0)
+            for group in members.values()
+            if 1.0 >= threshold
+            for position, first in enumerate(group)
+            for second in group[position + 1:]
+        ]
+        for row in sorted(partners):
+            others = sorted(partners[row])
+            anchors = self._sets[row] if self.store_sets else None
+            scores = self._similarities(self.row_signature(row), anchors, others, exact)
+            for other, score in zip(others, scores):
+                if score >= threshold:
+                    found.extend(
+                        (min(a, b), max(a, b), score)
+                        for a in members[row]
+                        for b in members[other]
+                    )
+        found.sort(key=lambda pair: pair[:2])
+        return [(self.keys[a], self.keys[b], score) for a, b, score in found]
+
+
+__all__ = ["MERSENNE_PRIME", "MinHashIndex", "jaccard"]
@@ -2,13 +2,48 @@
 
 from __future__ import annotations
 
-from typing import Iterable, Sequence, List
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple, Sequence, List
 
 import hashlib
 import math
+import zlib
 
+from . import _backend
+from .instrumentation import instrumented, sized
+from .phrase_matching import PhraseMatcher
+from .trajectory import as_vector
 
-def embed_sentence(text: str, *, dim: int = 32) -> List[float]:
+#: Supported token hash functions.  ``"sha256"`` is the historical default;
+#: ``"crc32"`` is a much cheaper, non-cryptographic but equally stable hash
+#: which produces different embeddings.
+HASHERS = ("sha256", "crc32")
+
+#: Maximum number of ``(token, dim, hasher)`` buckets kept in the LRU cache.
+BUCKET_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=BUCKET_CACHE_SIZE)
+def token_bucket(token: str, dim: int, hasher: str = "sha256") -> int:
+    """Return the embedding dimension ``token`` is hashed into.
+
+    Results are memoised in a bounded LRU cache since natural language
+    reuses a small vocabulary.  Use ``token_bucket.cache_clear()`` to drop
+    cached buckets.
+    """
+
+    data = token.encode("utf-8")
+    if hasher == "sha256":
+        # Equivalent to ``int(hexdigest, 16)`` without the hex round trip.
+        return int.from_bytes(hashlib.sha256(data).digest(), "big") % dim
+    if hasher == "crc32":
+        return zlib.crc32(data) % dim
+    raise ValueError(f"unsupported hasher '{hasher}'")
+
+
+@instrumented("embed_sentence", size=lambda text, *_, **__: len(text.split()))
+def embed_sentence(text: str, *, dim: int = 32, hasher: str = "sha256") -> List[float]:
     """Return a simple deterministic sentence embedding.
 
     Each token in ``text`` is hashed into a ``dim`` sized vector. The vector is
@@ -16,14 +51,22 @@ def embed_sentence(text: str, *, dim: int = 32) -> List[float]:
     similarity scores.  This function is intentionally lightweight so that the
     tests do not require any heavy external models while still providing a
     numeric "sentence embedding" representation.
+
+    ``hasher`` selects the token hash from :data:`HASHERS`.
     """
 
+    return embed_tokens(text.lower().split(), dim=dim, hasher=hasher)
+
+
+def embed_tokens(
+    tokens: Iterable[str], *, dim: int = 32, hasher: str = "sha256"
+) -> List[float]:
+    """Embed already lowercased and split ``tokens`` like :func:`embed_sentence`."""
+
     vec = [0.0] * dim
-    for token in text.lower().split():
+    for token in tokens:
         # Stable hash to keep embeddings deterministic across Python runs
-        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
-        index = int(digest, 16) % dim
-        vec[index] += 1.0
+        vec[token_bucket(token, dim, hasher)] += 1.0
 
     norm = math.sqrt(sum(v * v for v in vec))
     if norm > 0:
@@ -31,12 +74,46 @@ def embed_sentence(text: str, *, dim: int = 32) -> List[float]:
     return vec
 
 
+@instrumented("embed_sentences", size=lambda texts, *_, **__: sized(texts))
+def embed_sentences(
+    texts: Iterable[str], *, dim: int = 32, hasher: str = "sha256"
+) -> Any:
+    """Embed many texts at once.
+
+    Returns a C-contiguous ``(len(texts), dim)`` float64 NumPy array whose rows
+    are bit-identical to :func:`embed_sentence`, or a list of embeddings when
+    NumPy is not installed.
+    """
+
+    np = _backend.numpy()
+    if np is None:
+        return [embed_sentence(text, dim=dim, hasher=hasher) for text in texts]
+
+    rows: List[int] = []
+    buckets: List[int] = []
+    count = 0
+    for row, text in enumerate(texts):
+        count += 1
+        for token in text.lower().split():
+            rows.append(row)
+            buckets.append(token_bucket(token, dim, hasher))
+
+    flat = np.asarray(rows, dtype=np.int64) * dim + np.asarray(buckets, dtype=np.int64)
+    matrix = np.bincount(flat, minlength=count * dim).astype(np.float64).reshape(count, dim)
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    nonzero = norms > 0
+    matrix[nonzero] /= norms[nonzero, None]
+    return matrix
+
+
+@instrumented("mirror_score", size=lambda reflection, *_, **__: len(reflection.split()))
 def mirror_score(
     reflection: str,
     self_embedding: Sequence[float],
     *,
     threshold: float = 0.5,
     sabotage_phrases: Iterable[str] | None = None,
+    hasher: str = "sha256",
 ) -> float:
     """Measure self-recognition using embedding similarity.
 
@@ -47,22 +124,149 @@ def mirror_score(
     ``sabotage_phrases`` can be provided to penalise the score when any of the
     phrases appear in ``reflection``.  Each matched phrase subtracts ``0.5``
     from the similarity before thresholding.
+
+    ``hasher`` must match the one used to embed ``self_embedding``, which
+    may also be a reduced-precision
+    :class:`~ai_identity.quantization.QuantizedVector`.
     """
 
-    self_vec = [float(v) for v in self_embedding]
+    self_vec = normalise_embedding(self_embedding)
+    reflection_vec = embed_sentence(reflection, dim=len(self_vec), hasher=hasher)
+
+    similarity = sum(a * b for a, b in zip(self_vec, reflection_vec))
+
+    if sabotage_phrases:
+        lower = reflection.lower()
+        for phrase in sabotage_phrases:
+            if phrase.lower() in lower:
+                similarity -= 0.5
+
+    return 1.0 if similarity >= threshold else 0.0
+
+
+class MirrorScores(NamedTuple):
+    """Result of :func:`mirror_scores`."""
+
+    #: Similarity of each reflection after sabotage penalties.
+    similarities: Any
+    #: ``1.0`` where the similarity meets the threshold, otherwise ``0.0``.
+    scores: Any
+
+
+def normalise_embedding(self_embedding: Sequence[float]) -> List[float]:
+    """Return ``self_embedding`` as a list of floats scaled to unit length.
+
+    Zero vectors are returned unscaled.  Quantized vectors and buffers are
+    accepted like everywhere else in this module.
+    """
+    vector = as_vector(self_embedding)
+    if isinstance(vector, memoryview) and vector.format in ("f", "d"):
+        self_vec = vector.tolist()
+    else:
+        self_vec = [float(v) for v in vector]
     # Ensure the provided self embedding is normalised
     self_norm = math.sqrt(sum(v * v for v in self_vec))
     if self_norm > 0:
         self_vec = [v / self_norm for v in self_vec]
+    return self_vec
 
-    reflection_vec = embed_sentence(reflection, dim=len(self_vec))
 
-    similarity = sum(a * b for a, b in zip(self_vec, reflection_vec))
+@instrumented("mirror_scores", size=lambda reflections, *_, **__: sized(reflections))
+def mirror_scores(
+    reflections: Iterable[str],
+    self_embedding: Sequence[float],
+    *,
+    threshold: float = 0.5,
+    sabotage_phrases: Iterable[str] | None = None,
+    hasher: str = "sha256",
+) -> MirrorScores:
+    """Score many reflections against one self embedding.
+
+    Equivalent to calling :func:`mirror_score` for every reflection, but the
+    self embedding is normalised once, reflections are embedded as a batch
+    and the sabotage phrases are located with one precompiled
+    :class:`~ai_identity.phrase_matching.PhraseMatcher`, which scans each
+    text once when there are many phrases.
+
+    The penalised similarities are returned alongside the scores so that a
+    different ``threshold`` can be applied later without rescoring.  Both are
+    NumPy arrays when NumPy is available, otherwise lists.
+    """
+
+    np = _backend.numpy()
+    reflections = list(reflections)
+    self_vec = normalise_embedding(self_embedding)
+    embeddings = embed_sentences(reflections, dim=len(self_vec), hasher=hasher)
+
+    if np is not None:
+        similarities = embeddings @ np.asarray(self_vec, dtype=np.float64)
+    else:
+        similarities = [sum(a * b for a, b in zip(self_vec, vec)) for vec in embeddings]
+    return _threshold(reflections, similarities, threshold, sabotage_phrases)
 
+
+@instrumented("mirror_score_pairs", size=lambda reflections, *_, **__: sized(reflections))
+def mirror_score_pairs(
+    reflections: Iterable[str],
+    self_embeddings: Iterable[Sequence[float]],
+    *,
+    threshold: float = 0.5,
+    sabotage_phrases: Iterable[str] | None = None,
+    hasher: str = "sha256",
+) -> MirrorScores:
+    """Score each reflection against its own self embedding.
+
+    ``mirror_score_pairs(reflections, embeddings).scores[k]`` equals
+    ``mirror_score(reflections[k], embeddings[k])``, with the reflections
+    embedded as one batch and the similarities computed row by row.  All
+    self embeddings must have the same length.
+    """
+
+    np = _backend.numpy()
+    reflections = list(reflections)
+    self_vecs = [normalise_embedding(embedding) for embedding in self_embeddings]
+    if len(self_vecs) != len(reflections):
+        raise ValueError("expected one self embedding per reflection")
+    dim = len(self_vecs[0]) if self_vecs else 0
+    if any(len(vec) != dim for vec in self_vecs):
+        raise ValueError("self embeddings must be the same length")
+    embeddings = embed_sentences(reflections, dim=dim, hasher=hasher)
+
+    if np is not None:
+        matrix = np.asarray(self_vecs, dtype=np.float64).reshape(len(self_vecs), dim)
+        similarities = np.einsum("ij,ij->i", embeddings, matrix)
+    else:
+        similarities = [
+            sum(a * b for a, b in zip(self_vec, vec))
+            for self_vec, vec in zip(self_vecs, embeddings)
+        ]
+    return _threshold(reflections, similarities, threshold, sabotage_phrases)
+
+
+def _threshold(
+    reflections: List[str],
+    similarities: Any,
+    threshold: float,
+    sabotage_phrases: Iterable[str] | None,
+) -> MirrorScores:
+    """Apply sabotage penalties in place and threshold ``similarities``."""
+
+    np = _backend.numpy()
     if sabotage_phrases:
-        for phrase in sabotage_phrases:
-            if phrase.lower() in reflection.lower():
-                similarity -= 0.5
+        # Duplicated phrases are penalised once per occurrence, as in
+        # :func:`mirror_score`.
+        multiplicity = Counter(phrase.lower() for phrase in sabotage_phrases)
+        matcher = PhraseMatcher(multiplicity)
+        for row, reflection in enumerate(reflections):
+            found = matcher.find(reflection.lower())
+            if found:
+                similarities[row] -= 0.5 * sum(
+                    multiplicity[matcher.phrases[i]] for i in found
+                )
 
-    return 1.0 if similarity >= threshold else 0.0
+    if np is not None:
+        scores = np.where(similarities >= threshold, 1.0, 0.0)
+    else:
+        scores = [1.0 if similarity >= threshold else 0.0 for similarity in similarities]
+    return MirrorScores(similarities, scores)
 
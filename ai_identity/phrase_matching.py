@@ -0,0 +1,101 @@
+"""Multi-phrase matching.
+
+:class:`PhraseMatcher` holds a fixed set of phrases and finds which of them
+occur in a text.  Larger phrase sets are compiled once into a regular
+expression shaped like a trie of the phrases, so every phrase in a text is
+found in a single C-level scan whatever the number of phrases.  Below
+:data:`SINGLE_PASS_MIN_PHRASES` phrases, one substring search per phrase is
+faster and used instead.  Phrases and texts may be ``str`` or ``bytes``; the
+two must not be mixed within one matcher.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Sequence
+
+#: Phrase count from which texts are scanned once by a compiled pattern
+SINGLE_PASS_MIN_PHRASES = 16
+
+
+def _trie_source(phrases: List[str]) -> str:
+    """Return a regular expression matching the longest of ``phrases`` at a position."""
+
+    trie: Dict[Optional[str], dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = {}
+
+    def build(node: Dict[Optional[str], dict]) -> str:
+        # Follow single-child chains iteratively to keep the recursion shallow.
+        parts = []
+        while len(node) == 1 and None not in node:
+            (char, node), = node.items()
+            parts.append(re.escape(char))
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if branches:
+            group = "(?:" + "|".join(branches) + ")"
+            # Greedy, so a longer phrase is preferred to one ending here.
+            parts.append(group + "?" if None in node else group)
+        return "".join(parts)
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    """Find which of a fixed set of phrases occur in a text.
+
+    Matching is exact and case sensitive; callers wanting case-insensitive
+    matching should lower both the phrases and the text.  Overlapping and
+    nested phrases are all reported.
+
+    Parameters
+    ----------
+    phrases:
+        Phrases to search for.  Duplicates are collapsed, so
+        :attr:`phrases` holds each distinct phrase once.
+    """
+
+    def __init__(self, phrases: Iterable[Sequence]) -> None:
+        self.phrases: List[Sequence] = list(dict.fromkeys(phrases))
+        self._indexed = list(enumerate(self.phrases))
+        self._pattern: Optional[Pattern] = None
+        if len(self.phrases) < SINGLE_PASS_MIN_PHRASES:
+            return
+        # An empty phrase occurs in every text, so it is kept out of the pattern.
+        self._always = frozenset(i for i, phrase in self._indexed if not phrase)
+        # A phrase found implies every phrase it contains.
+        self._implied: Dict[Sequence, FrozenSet[int]] = {
+            phrase: frozenset(i for i, other in self._indexed if other in phrase)
+            for phrase in self.phrases
+            if phrase
+        }
+        is_bytes = isinstance(self.phrases[0], bytes)
+        texts = [p.decode("latin-1") if is_bytes else p for p in self._implied]
+        # The lookahead matches at every position where a phrase starts and
+        # captures the longest such phrase, which holds the shorter ones.
+        source = "(?=(" + _trie_source(texts) + "))"
+        self._pattern = re.compile(source.encode("latin-1") if is_bytes else source)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def find(self, text: Sequence) -> FrozenSet[int]:
+        """Return the indices into :attr:`phrases` of every phrase in ``text``."""
+
+        if self._pattern is None:
+            return frozenset([index for index, phrase in self._indexed if phrase in text])
+        implied = self._implied
+        return self._always.union(*[implied[match] for match in set(self._pattern.findall(text))])
+
+    def contains_any(self, text: Sequence) -> bool:
+        """Return ``True`` as soon as any phrase is found in ``text``."""
+
+        if self._pattern is None:
+            return any(phrase in text for phrase in self.phrases)
+        return bool(self._always) or self._pattern.search(text) is not None
+
+
+__all__ = ["PhraseMatcher", "SINGLE_PASS_MIN_PHRASES"]
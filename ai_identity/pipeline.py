@@ -0,0 +1,240 @@
+"""Single-pass identity metrics over session transcripts.
+
+A :class:`Pipeline` reads each message of a transcript once, lowercases,
+tokenizes and embeds it a single time, and hands the resulting
+:class:`Message` to every registered stage.  Stages are small objects with a
+``name``, a ``process(message)`` method and a ``result()`` method; the
+built-in stages compute anchors, mirror scores, ξ/coherence and refusal
+counts.  Time spent in the shared preprocessing and in each stage is
+reported alongside the results.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import Counter
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Union,
+)
+
+from .anchor_detection import AnchorDetector
+from .epistemic_tension import CoherenceTracker, xi
+from .instrumentation import instrumented, sized
+from .mirror_test import MirrorScores, embed_tokens, normalise_embedding
+from .phrase_matching import PhraseMatcher
+from .refusal import REFUSAL_PHRASES
+
+
+class Message(NamedTuple):
+    """Shared representation of one transcript message."""
+
+    index: int
+    text: str
+    lowered: str
+    tokens: List[str]
+    embedding: List[float]
+
+
+class Stage(Protocol):
+    """Interface implemented by pipeline stages."""
+
+    name: str
+
+    def process(self, message: Message) -> None:
+        ...
+
+    def result(self) -> Any:
+        ...
+
+
+class AnchorStage:
+    """Detect anchors among the tokens of all messages."""
+
+    name = "anchors"
+
+    def __init__(
+        self, weights: Optional[Dict[Any, float]] = None, *, capacity: Optional[int] = None
+    ) -> None:
+        self.detector = AnchorDetector(weights, capacity=capacity)
+
+    def process(self, message: Message) -> None:
+        self.detector.update(message.tokens)
+
+    def result(self) -> list:
+        return self.detector.anchors()
+
+
+class MirrorStage:
+    """Score every message against a self embedding like ``mirror_score``."""
+
+    name = "mirror"
+
+    def __init__(
+        self,
+        self_embedding: Sequence[float],
+        *,
+        threshold: float = 0.5,
+        sabotage_phrases: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.self_vec = normalise_embedding(self_embedding)
+        self.threshold = threshold
+        self._penalties = Counter(phrase.lower() for phrase in sabotage_phrases or ())
+        self._matcher = PhraseMatcher(self._penalties) if self._penalties else None
+        self.similarities: List[float] = []
+        self.scores: List[float] = []
+
+    def process(self, message: Message) -> None:
+        if len(message.embedding) != len(self.self_vec):
+            raise ValueError("self embedding must match the pipeline dimension")
+        similarity = sum(a * b for a, b in zip(self.self_vec, message.embedding))
+        if self._matcher is not None:
+            for i in self._matcher.find(message.lowered):
+                similarity -= 0.5 * self._penalties[self._matcher.phrases[i]]
+        self.similarities.append(similarity)
+        self.scores.append(1.0 if similarity >= self.threshold else 0.0)
+
+    def result(self) -> MirrorScores:
+        return MirrorScores(self.similarities, self.scores)
+
+
+class TensionStage:
+    """Measure ξ between successive message embeddings and track coherence.
+
+    ``xi`` holds one value per pair of successive messages.  With the cosine
+    metric a message without tokens has no direction, so ξ of a pair
+    involving one is ``nan`` and leaves the coherence unchanged.
+    """
+
+    name = "tension"
+
+    def __init__(self, *, metric: str = "l2", window: Optional[int] = None) -> None:
+        self.metric = metric
+        self.tracker = CoherenceTracker(window, metric=metric)
+        self.xi_values: List[float] = []
+        self._previous: Optional[List[float]] = None
+
+    def process(self, message: Message) -> None:
+        previous, self._previous = self._previous, message.embedding
+        if previous is not None:
+            if self.metric == "cosine" and not (any(previous) and any(message.embedding)):
+                self.xi_values.append(math.nan)
+                return
+            value = xi(previous, message.embedding, metric=self.metric)
+            self.xi_values.append(value)
+            self.tracker.update(value)
+
+    def result(self) -> Dict[str, Any]:
+        return {"xi": self.xi_values, "coherence": self.tracker.coherence}
+
+
+class RefusalStage:
+    """Count messages containing a refusal phrase."""
+
+    name = "refusals"
+
+    def __init__(self, phrases: Iterable[str] = REFUSAL_PHRASES) -> None:
+        self._matcher = PhraseMatcher(phrase.lower() for phrase in phrases)
+        self.count = 0
+
+    def process(self, message: Message) -> None:
+        if self._matcher.contains_any(message.lowered):
+            self.count += 1
+
+    def result(self) -> int:
+        return self.count
+
+
+class PipelineResult(NamedTuple):
+    """Outcome of :meth:`Pipeline.run`."""
+
+    #: Number of messages processed.
+    messages: int
+    #: Result of each stage keyed by stage name.
+    results: Dict[str, Any]
+    #: Seconds spent per stage; ``"preprocess"`` covers tokenizing and embedding.
+    timings: Dict[str, float]
+
+
+class Pipeline:
+    """Feed each message of a transcript to several stages in one pass.
+
+    Parameters
+    ----------
+    stages:
+        Stage objects; their ``name`` attributes must be unique.
+    dim, hasher:
+        Embedding options passed to
+        :func:`~ai_identity.mirror_test.embed_tokens`.
+    """
+
+    def __init__(
+        self, stages: Iterable[Stage], *, dim: int = 32, hasher: str = "sha256"
+    ) -> None:
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("stage names must be unique")
+        self.dim = dim
+        self.hasher = hasher
+
+    @instrumented("Pipeline.run", size=lambda self, messages, *_, **__: sized(messages))
+    def run(self, messages: Iterable[str]) -> PipelineResult:
+        """Process ``messages`` once and return every stage's result."""
+
+        clock = time.perf_counter
+        timings = dict.fromkeys(["preprocess", *(stage.name for stage in self.stages)], 0.0)
+        count = 0
+        for index, text in enumerate(messages):
+            started = clock()
+            lowered = text.lower()
+            tokens = lowered.split()
+            embedding = embed_tokens(tokens, dim=self.dim, hasher=self.hasher)
+            message = Message(index, text, lowered, tokens, embedding)
+            timings["preprocess"] += clock() - started
+            for stage in self.stages:
+                started = clock()
+                stage.process(message)
+                timings[stage.name] += clock() - started
+            count += 1
+        results = {stage.name: stage.result() for stage in self.stages}
+        return PipelineResult(count, results, timings)
+
+
+def read_transcript(path: Union[str, "os.PathLike[str]"], *, field: str = "text") -> Iterator[str]:
+    """Lazily yield the messages of a JSONL transcript.
+
+    Each non-blank line holds either a JSON string or an object whose
+    ``field`` entry is the message text.
+    """
+
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record if isinstance(record, str) else record[field]
+
+
+__all__ = [
+    "Message",
+    "Stage",
+    "AnchorStage",
+    "MirrorStage",
+    "TensionStage",
+    "RefusalStage",
+    "Pipeline",
+    "PipelineResult",
+    "read_transcript",
+]
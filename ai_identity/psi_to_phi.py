@@ -1,6 +1,17 @@
 """Polynomial model converting Ψ(t) into a stabilized Φ."""
 
+import math
+from typing import Any, List, Tuple
 
+from . import _backend
+from .instrumentation import instrumented, sized
+
+# Coefficients of Ψ(t) = A t³ + B t² + C t and dΨ/dt = 3A t² + 2B t + C.
+_A, _B, _C = 0.0072, -0.144, 0.72
+_DA, _DB, _DC = 0.0216, -0.288, 0.72
+
+
+@instrumented("psi_to_phi")
 def psi_to_phi(t: float, epsilon: float = 1e-3) -> float:
     """Evaluate Ψ(t) and stabilise to Φ.
 
@@ -27,3 +38,60 @@ def psi_to_phi(t: float, epsilon: float = 1e-3) -> float:
     psi = 0.0072 * t**3 - 0.144 * t**2 + 0.72 * t
     dpsi_dt = 0.0216 * t**2 - 0.288 * t + 0.72
     return 1.0 if abs(dpsi_dt) < epsilon else psi
+
+
+@instrumented("psi_to_phi_array", size=lambda ts, *_, **__: sized(ts))
+def psi_to_phi_array(ts: Any, epsilon: float = 1e-3) -> Any:
+    """Evaluate :func:`psi_to_phi` at every time in ``ts``.
+
+    A float64 NumPy array is returned when NumPy is available, otherwise a
+    list.  The NumPy path evaluates both polynomials in Horner form in a
+    single vectorized pass, so it rounds differently from the scalar
+    expressions.  Results agree with :func:`psi_to_phi` to within
+    ``2e-15 * (0.0072 |t|³ + 0.144 t² + 0.72 |t|)``, and a time whose
+    ``|dΨ/dt|`` lies within ``2e-15 * (0.0216 t² + 0.288 |t| + 0.72)`` of
+    ``epsilon`` may be classified differently.
+    """
+
+    np = _backend.numpy()
+    if np is None:
+        return [psi_to_phi(float(t), epsilon) for t in ts]
+    t = np.asarray(ts, dtype=np.float64)
+    psi = ((_A * t + _B) * t + _C) * t
+    dpsi_dt = (_DA * t + _DB) * t + _DC
+    return np.where(np.abs(dpsi_dt) < epsilon, 1.0, psi)
+
+
+def _roots(a: float, b: float, c: float) -> List[float]:
+    """Real roots of ``a t² + b t + c`` in ascending order."""
+
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return []
+    root = math.sqrt(discriminant)
+    # Numerically stable form avoiding cancellation between ``b`` and ``root``.
+    q = -0.5 * (b + math.copysign(root, b))
+    return sorted((q / a, c / q)) if q else [0.0, 0.0]
+
+
+def stable_intervals(epsilon: float = 1e-3) -> List[Tuple[float, float]]:
+    """Return the open intervals of ``t`` where :func:`psi_to_phi` gives ``Φ``.
+
+    The intervals solve ``|dΨ/dt| < epsilon`` analytically.  Since the
+    derivative is an upward parabola with roots at ``t = 10/3`` and
+    ``t = 10``, the result is empty for ``epsilon <= 0``, two intervals
+    around the roots for small ``epsilon`` and a single interval once
+    ``epsilon`` exceeds the magnitude of the derivative's minimum.
+    """
+
+    if epsilon <= 0:
+        return []
+    # dΨ/dt < ε between the roots of dΨ/dt − ε ...
+    below = _roots(_DA, _DB, _DC - epsilon)
+    if not below:
+        return []
+    # ... and dΨ/dt > −ε outside the roots of dΨ/dt + ε.
+    above = _roots(_DA, _DB, _DC + epsilon)
+    if not above:
+        return [(below[0], below[1])]
+    return [(below[0], above[0]), (above[1], below[1])]
@@ -0,0 +1,318 @@
+"""Reduced-precision and quantized storage of state embeddings.
+
+:func:`quantize` stores one embedding as ``float32``, ``float16`` or
+``int8`` codes with a per-vector scale, and :func:`quantize_matrix` stores a
+whole trajectory in one flat buffer.  Compared with ``float64`` arrays this
+uses 2x, 4x and about 8x less memory (and 8x to 30x less than lists of
+Python floats), so more rows fit in cache while distances are computed.
+
+A :class:`QuantizedVector` is a read-only sequence of its dequantized
+values, so :func:`~ai_identity.epistemic_tension.xi` and
+:func:`~ai_identity.mirror_test.mirror_score` accept it like any other
+vector.  The cosine metric uses the codes directly since the scale cancels.
+:func:`~ai_identity.epistemic_tension.xi_series` reads a
+:class:`QuantizedMatrix` in cache-sized blocks of rows; ``int8`` blocks are
+multiplied as exact small integers in ``float32`` rather than dequantized.
+
+Error bounds
+------------
+Write ``x`` for an original vector of length ``d``, ``x̂`` for its
+dequantized values and ``e = ‖x - x̂‖`` for the L2 quantization error, which
+:func:`error_bound` bounds from ``x̂`` alone:
+
+``float32``, ``float16``
+    Round to nearest, so ``|x_i - x̂_i| <= u·|x_i|`` with unit roundoff
+    ``u = 2**-24`` and ``2**-11`` respectively, plus an absolute ``2**-150``
+    and ``2**-25`` for subnormal values.  Hence
+    ``e <= u/(1 - u)·‖x̂‖ + √d·subnormal``.
+``int8``
+    ``x̂_i = s·round(x_i / s)`` with ``s = max|x_i| / 127``, so
+    ``|x_i - x̂_i| <= s/2`` and ``e <= √d·s/2``.
+
+By the triangle inequality the L2 tension between quantized vectors is
+within ``e_a + e_b`` of the ``float64`` result, and the cosine tension is
+within ``2·(e_a/‖â‖ + e_b/‖b̂‖)``; :func:`xi_error_bound` evaluates these.
+The bounds ignore the ``float64`` rounding of the distance computation
+itself.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from array import array
+from collections.abc import Sequence as _Sequence
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+from . import _backend
+from .trajectory import as_vector
+
+#: Supported storage types, in order of decreasing precision
+DTYPES = ("float32", "float16", "int8")
+
+_FORMATS = {"float32": "f", "float16": "e", "int8": "b"}
+_ITEMSIZE = {"float32": 4, "float16": 2, "int8": 1}
+_LIMITS = {"float32": 3.4028234663852886e38, "float16": 65504.0, "int8": math.inf}
+#: Unit roundoff and worst absolute error of subnormal values per float type
+_ROUNDING = {"float32": (2.0 ** -24, 2.0 ** -150), "float16": (2.0 ** -11, 2.0 ** -25)}
+_INT8_MAX = 127
+
+
+def _check_dtype(dtype: str) -> None:
+    if dtype not in _FORMATS:
+        raise ValueError(f"unsupported dtype '{dtype}'")
+
+
+def _check_finite(peak: float, finite: bool, dtype: str) -> None:
+    if not finite:
+        raise ValueError("values must be finite")
+    if peak > _LIMITS[dtype]:
+        raise ValueError(f"values exceed the {dtype} range")
+
+
+class QuantizedVector(_Sequence):
+    """Read-only embedding stored in reduced precision.
+
+    Iterating or indexing yields the dequantized ``float`` values.
+    :attr:`codes` exposes the stored values, which for ``int8`` must be
+    multiplied by :attr:`scale`.
+    """
+
+    __slots__ = ("dtype", "scale", "_data")
+
+    def __init__(self, dtype: str, data: Any, scale: float = 1.0) -> None:
+        _check_dtype(dtype)
+        self.dtype = dtype
+        self.scale = scale
+        self._data = memoryview(data).cast("B")
+
+    @property
+    def codes(self) -> Sequence[float]:
+        """Stored values: ``int8`` codes or reduced-precision floats."""
+        if self.dtype == "float16":
+            # ``memoryview`` cannot cast to half floats; ``struct`` decodes them.
+            return struct.unpack(f"={len(self)}e", self._data)
+        return self._data.cast(_FORMATS[self.dtype])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the codes and, for ``int8``, the scale."""
+        return self._data.nbytes + (8 if self.dtype == "int8" else 0)
+
+    def __len__(self) -> int:
+        return self._data.nbytes // _ITEMSIZE[self.dtype]
+
+    def __iter__(self) -> Iterator[float]:
+        if self.dtype == "int8":
+            return map(self.scale.__mul__, self.codes)
+        return iter(self.codes)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return self.tolist()[index]
+        return float(self.codes[index] * self.scale)
+
+    def tolist(self) -> List[float]:
+        """Return the dequantized values."""
+        return list(self)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> Any:
+        np = _backend.numpy()
+        values = np.asarray(self.codes, dtype=np.float64)
+        if self.dtype == "int8":
+            values *= self.scale
+        return values if dtype is None else values.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"QuantizedVector({self.dtype!r}, dim={len(self)}, scale={self.scale!r})"
+
+
+def _quantize_values(values: List[float], dtype: str) -> tuple:
+    """Return ``(data, scale)`` for a list of floats."""
+    peak = max(map(abs, values), default=0.0)
+    _check_finite(peak, all(map(math.isfinite, values)), dtype)
+    if dtype == "float32":
+        return array("f", values), 1.0
+    if dtype == "float16":
+        return struct.pack(f"={len(values)}e", *values), 1.0
+    scale = peak / _INT8_MAX
+    if not scale:
+        return array("b", bytes(len(values))), 0.0
+    return array("b", [round(v / scale) for v in values]), scale
+
+
+def quantize(vector: Sequence[float], dtype: str = "int8") -> QuantizedVector:
+    """Return ``vector`` stored as ``dtype``, one of :data:`DTYPES`.
+
+    ``int8`` codes use a per-vector scale of ``max|x| / 127``; a zero
+    vector has scale ``0``.  Raises :class:`ValueError` for non-finite
+    values or values outside the range of ``dtype``.
+    """
+
+    _check_dtype(dtype)
+    values = as_vector(vector)
+    if isinstance(values, memoryview) and values.format in ("f", "d"):
+        values = values.tolist()
+    data, scale = _quantize_values([float(v) for v in values], dtype)
+    return QuantizedVector(dtype, data, scale)
+
+
+class QuantizedMatrix(_Sequence):
+    """Rows of equal length stored in one reduced-precision buffer.
+
+    Indexing yields zero-copy :class:`QuantizedVector` rows.  With NumPy,
+    :meth:`block` dequantizes a range of rows and ``numpy.asarray`` the whole
+    matrix, both as ``float64``.
+    """
+
+    __slots__ = ("dtype", "rows", "dim", "scales", "_data")
+
+    def __init__(
+        self, dtype: str, data: Any, rows: int, dim: int, scales: Optional[array] = None
+    ) -> None:
+        _check_dtype(dtype)
+        self._data = memoryview(data).cast("B")
+        if self._data.nbytes != rows * dim * _ITEMSIZE[dtype]:
+            raise ValueError("data does not match the matrix shape")
+        if (dtype == "int8") != (scales is not None) or (scales is not None and len(scales) != rows):
+            raise ValueError("int8 matrices need one scale per row")
+        self.dtype = dtype
+        self.rows = rows
+        self.dim = dim
+        #: Per-row ``float64`` scales of ``int8`` matrices, otherwise ``None``.
+        self.scales = scales
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the codes and scales."""
+        return self._data.nbytes + (len(self.scales) * 8 if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("matrix index out of range")
+        width = self.dim * _ITEMSIZE[self.dtype]
+        scale = self.scales[index] if self.scales is not None else 1.0
+        return QuantizedVector(self.dtype, self._data[index * width:(index + 1) * width], scale)
+
+    def __iter__(self) -> Iterator[QuantizedVector]:
+        return (self[i] for i in range(self.rows))
+
+    def codes(self) -> Any:
+        """Return the stored codes as a read-only ``(rows, dim)`` NumPy array."""
+        np = _backend.numpy()
+        if np is None:
+            raise ValueError("QuantizedMatrix.codes requires NumPy")
+        return np.frombuffer(self._data, dtype=_FORMATS[self.dtype]).reshape(self.rows, self.dim)
+
+    def block(self, start: int, stop: int) -> Any:
+        """Return rows ``start:stop`` dequantized into a ``float64`` array."""
+        np = _backend.numpy()
+        codes = self.codes()[start:stop]
+        if self.scales is None:
+            return codes.astype(np.float64)
+        scales = np.frombuffer(self.scales, dtype=np.float64)[start:stop, None]
+        return np.multiply(codes, scales, dtype=np.float64)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> Any:
+        block = self.block(0, self.rows)
+        return block if dtype is None else block.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"QuantizedMatrix({self.dtype!r}, rows={self.rows}, dim={self.dim})"
+
+
+def quantize_matrix(states: Iterable[Sequence[float]], dtype: str = "int8") -> QuantizedMatrix:
+    """Return a two-dimensional collection of states stored as ``dtype``.
+
+    Every row is quantized exactly as by :func:`quantize`.  NumPy arrays
+    are converted in one vectorized pass; other iterables are consumed one
+    row at a time.
+    """
+
+    _check_dtype(dtype)
+    np = _backend.numpy()
+    if np is not None and not isinstance(states, Iterator):
+        matrix = np.asarray(states, dtype=np.float64)
+        if matrix.ndim != 2:
+            if matrix.size:
+                raise ValueError("states must be a two-dimensional collection of vectors")
+            matrix = matrix.reshape(0, 0)
+        peaks = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(len(matrix))
+        _check_finite(float(peaks.max(initial=0.0)), bool(np.isfinite(matrix).all()), dtype)
+        scales = None
+        if dtype == "int8":
+            step = peaks / _INT8_MAX
+            safe = np.where(step > 0, step, 1.0)
+            data = np.rint(matrix / safe[:, None]).astype(np.int8)
+            scales = array("d", step.tobytes())
+        else:
+            data = matrix.astype(_FORMATS[dtype])
+        return QuantizedMatrix(dtype, np.ascontiguousarray(data), *matrix.shape, scales)
+
+    data = bytearray()
+    scales = array("d") if dtype == "int8" else None
+    rows = dim = 0
+    for row in states:
+        vector = quantize(row, dtype)
+        if rows == 0:
+            dim = len(vector)
+        elif len(vector) != dim:
+            raise ValueError("state vectors must be the same length")
+        data += vector._data
+        if scales is not None:
+            scales.append(vector.scale)
+        rows += 1
+    return QuantizedMatrix(dtype, data, rows, dim, scales)
+
+
+def error_bound(vector: Sequence[float]) -> float:
+    """Return an upper bound on the L2 quantization error of ``vector``.
+
+    Unquantized vectors are exact and have a bound of ``0``.
+    """
+
+    if not isinstance(vector, QuantizedVector):
+        return 0.0
+    root_d = math.sqrt(len(vector))
+    if vector.dtype == "int8":
+        return root_d * vector.scale / 2
+    roundoff, subnormal = _ROUNDING[vector.dtype]
+    norm = math.sqrt(sum(v * v for v in vector.codes))
+    return roundoff / (1 - roundoff) * norm + root_d * subnormal
+
+
+def xi_error_bound(
+    state_a: Sequence[float], state_b: Sequence[float], *, metric: str = "l2"
+) -> float:
+    """Return the largest possible difference between ξ of the given vectors
+    and ξ of the original ``float64`` vectors they were quantized from.
+    """
+
+    error_a, error_b = error_bound(state_a), error_bound(state_b)
+    if metric == "l2":
+        return error_a + error_b
+    if metric == "cosine":
+        norm_a = math.sqrt(sum(v * v for v in state_a))
+        norm_b = math.sqrt(sum(v * v for v in state_b))
+        if norm_a == 0 or norm_b == 0:
+            raise ValueError("state vectors must be non-zero for cosine metric")
+        return 2 * (error_a / norm_a + error_b / norm_b)
+    raise ValueError(f"unsupported metric '{metric}'")
+
+
+__all__ = [
+    "DTYPES",
+    "QuantizedVector",
+    "QuantizedMatrix",
+    "quantize",
+    "quantize_matrix",
+    "error_bound",
+    "xi_error_bound",
+]
@@ -1,6 +1,32 @@
-"""Sabotage resistance logging."""
+"""Sabotage resistance logging.
+
+:class:`SabotageLogger` keeps every event in a list.  For high event rates
+:class:`SegmentedSabotageLogger` stores timestamped records in a fixed-size
+ring buffer, optionally spilling full segments to a JSONL file, and answers
+time-range and event-type queries using per-segment indexes.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
 
 @dataclass
 class SabotageLogger:
@@ -10,3 +36,296 @@ class SabotageLogger:
     def log(self, event: str) -> None:
         """Record a potential sabotage event."""
         self.events.append(event)
+
+
+class Event(NamedTuple):
+    """A single record of a :class:`SegmentedSabotageLogger`."""
+
+    timestamp: float
+    event: str
+    payload: Any = None
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """Location and summary of a spilled block of records."""
+
+    offset: int
+    length: int
+    count: int
+    first: float
+    last: float
+    types: FrozenSet[str]
+
+
+class SegmentedSabotageLogger:
+    """Ring-buffered, optionally disk-backed sabotage event log.
+
+    Records are stored column-wise: a timestamp array, an array of interned
+    event type ids and a slot for an optional JSON serialisable payload.
+    Appending takes a lock only for a few array writes.
+
+    When the buffer holds ``capacity`` records it is appended to
+    ``spill_path`` as one segment of JSON lines, and the segment's byte
+    range, time span and event types are remembered so :meth:`query` can
+    skip segments which cannot match.  Payloads are serialised as they are
+    logged, so :meth:`log` rejects a payload which is not JSON serialisable,
+    and the file is written after the segment has been swapped out of the
+    buffer, without holding up other threads' appends.  Without a
+    ``spill_path`` the oldest record is overwritten instead and counted in
+    :attr:`dropped`.
+
+    :attr:`events` lists the event names of every retained record, like
+    :attr:`SabotageLogger.events`, but reads spilled segments lazily.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        *,
+        spill_path: Optional[Union[str, "os.PathLike[str]"]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.spill_path = os.fspath(spill_path) if spill_path is not None else None
+        #: Number of records overwritten because the buffer was full
+        self.dropped = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._types = array("I", [0]) * capacity
+        self._payloads: List[Any] = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._type_ids: Dict[str, int] = {}
+        self._type_names: List[str] = []
+        self._segments: List[_Segment] = []
+        self._segment_ends: List[int] = []
+        # Segments swapped out of the buffer but not yet written, oldest first.
+        self._spilling: "deque[List[Event]]" = deque()
+        self._spill_lock = threading.Lock()
+
+    def log(self, event: str, payload: Any = None, *, timestamp: Optional[float] = None) -> None:
+        """Record a potential sabotage event with an optional ``payload``."""
+        if timestamp is None:
+            timestamp = self._clock()
+        if self.spill_path is not None:
+            # Buffered payloads are kept as JSON, ready to be spilled.
+            payload = json.dumps(payload)
+        spilled = False
+        with self._lock:
+            type_id = self._type_ids.get(event)
+            if type_id is None:
+                type_id = self._type_ids[event] = len(self._type_names)
+                self._type_names.append(event)
+            if self._size == self.capacity:
+                if self.spill_path is not None:
+                    self._take_segment()
+                    spilled = True
+                else:
+                    self._head = (self._head + 1) % self.capacity
+                    self._size -= 1
+                    self.dropped += 1
+            slot = (self._head + self._size) % self.capacity
+            self._timestamps[slot] = timestamp
+            self._types[slot] = type_id
+            self._payloads[slot] = payload
+            self._size += 1
+        if spilled:
+            self._write_segments()
+
+    def _buffered(self) -> List[Event]:
+        """Return the buffered records; payloads are JSON when spilling."""
+        names = self._type_names
+        slots = [(self._head + i) % self.capacity for i in range(self._size)]
+        return [
+            Event(self._timestamps[slot], names[self._types[slot]], self._payloads[slot])
+            for slot in slots
+        ]
+
+    def _unwritten(self, decode: bool = True) -> List[Event]:
+        """Return the records not yet on disk; the caller holds the lock."""
+        records = [record for segment in self._spilling for record in segment]
+        records.extend(self._buffered())
+        if self.spill_path is None or not decode:
+            return records
+        return [record._replace(payload=json.loads(record.payload)) for record in records]
+
+    def _unwritten_event(self, index: int) -> str:
+        """Return the event name of unwritten record ``index``; the caller holds the lock."""
+        for segment in self._spilling:
+            if index < len(segment):
+                return segment[index].event
+            index -= len(segment)
+        return self._type_names[self._types[(self._head + index) % self.capacity]]
+
+    def _take_segment(self) -> None:
+        """Queue the buffered records for writing; the caller holds the lock."""
+        records = self._buffered()
+        if records:
+            self._spilling.append(records)
+        for slot in range(self.capacity):
+            self._payloads[slot] = None
+        self._head = self._size = 0
+
+    def _write_segments(self) -> None:
+        """Append the queued segments to the spill file in order."""
+        with self._spill_lock:
+            while True:
+                with self._lock:
+                    if not self._spilling:
+                        return
+                    records = self._spilling[0]
+                data = "".join(
+                    f'{{"t": {json.dumps(r.timestamp)}, "event": {json.dumps(r.event)}, '
+                    f'"payload": {r.payload}}}\n'
+                    for r in records
+                ).encode("utf-8")
+                with open(self.spill_path, "ab") as handle:
+                    offset = handle.tell()
+                    handle.write(data)
+                times = [r.timestamp for r in records]
+                segment = _Segment(
+                    offset, len(data), len(records), min(times), max(times),
+                    frozenset(r.event for r in records),
+                )
+                with self._lock:
+                    self._segments.append(segment)
+                    previous = self._segment_ends[-1] if self._segment_ends else 0
+                    self._segment_ends.append(previous + len(records))
+                    self._spilling.popleft()
+
+    def flush(self) -> None:
+        """Spill buffered records to disk now, if a spill file is configured."""
+        if self.spill_path is None:
+            return
+        with self._lock:
+            self._take_segment()
+        self._write_segments()
+
+    def _read_segment(self, segment: _Segment) -> List[Event]:
+        with open(self.spill_path, "rb") as handle:
+            handle.seek(segment.offset)
+            data = handle.read(segment.length)
+        return [
+            Event(record["t"], record["event"], record["payload"])
+            for record in map(json.loads, data.splitlines())
+        ]
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        event_type: Optional[str] = None,
+    ) -> Iterator[Event]:
+        """Yield records with ``start <= timestamp < end`` and matching type.
+
+        Every bound is optional.  Records are yielded in logging order.
+        """
+
+        def matches(record: Event) -> bool:
+            return (
+                (start is None or record.timestamp >= start)
+                and (end is None or record.timestamp < end)
+                and (event_type is None or record.event == event_type)
+            )
+
+        with self._lock:
+            segments = list(self._segments)
+            buffered = self._unwritten()
+        for segment in segments:
+            if start is not None and segment.last < start:
+                continue
+            if end is not None and segment.first >= end:
+                continue
+            if event_type is not None and event_type not in segment.types:
+                continue
+            yield from filter(matches, self._read_segment(segment))
+        yield from filter(matches, buffered)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._spilled_count() + self._size
+
+    def _spilled_count(self) -> int:
+        """Return the number of records moved out of the buffer."""
+        written = self._segment_ends[-1] if self._segment_ends else 0
+        return written + sum(len(segment) for segment in self._spilling)
+
+    @property
+    def events(self) -> "EventsView":
+        """Lazy, read-only sequence of logged event names."""
+        return EventsView(self)
+
+
+class EventsView(Sequence[str]):
+    """Read-only view over the event names of a :class:`SegmentedSabotageLogger`.
+
+    The names of the last spilled segment read are kept, so indexing
+    consecutive records or slicing reads each segment once.
+    """
+
+    def __init__(self, logger: SegmentedSabotageLogger) -> None:
+        self._logger = logger
+        self._cached: Tuple[Optional[_Segment], List[str]] = (None, [])
+
+    def __len__(self) -> int:
+        return len(self._logger)
+
+    def _segment_names(self, segment: _Segment) -> List[str]:
+        cached, names = self._cached
+        if cached is not segment:
+            names = [record.event for record in self._logger._read_segment(segment)]
+            self._cached = (segment, names)
+        return names
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        logger = self._logger
+        # Segments are never rewritten, so they can be read after the lock
+        # is released; the records not yet on disk are copied under it.
+        with logger._lock:
+            ends = list(logger._segment_ends)
+            segments = list(logger._segments)
+            spilled = ends[-1] if ends else 0
+            length = logger._spilled_count() + logger._size
+            if isinstance(index, slice):
+                indices = range(*index.indices(length))
+                unwritten: List[str] = []
+                if indices and max(indices[0], indices[-1]) >= spilled:
+                    unwritten = [record.event for record in logger._unwritten(decode=False)]
+            else:
+                if index < 0:
+                    index += length
+                if not 0 <= index < length:
+                    raise IndexError("event index out of range")
+                indices = range(index, index + 1)
+                if index >= spilled:
+                    return logger._unwritten_event(index - spilled)
+        found = []
+        for position in indices:
+            if position >= spilled:
+                found.append(unwritten[position - spilled])
+                continue
+            segment = bisect.bisect_right(ends, position)
+            first = ends[segment - 1] if segment else 0
+            found.append(self._segment_names(segments[segment])[position - first])
+        return found if isinstance(index, slice) else found[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return (record.event for record in self._logger.query())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (EventsView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EventsView({list(self)!r})"
@@ -0,0 +1,199 @@
+"""Cosine similarity search over sentence embeddings.
+
+:class:`EmbeddingIndex` embeds texts with
+:func:`~ai_identity.mirror_test.embed_sentence` as they are added and keeps the
+vectors in one contiguous ``float32`` array.  Queries scan the whole array in
+a single vectorized pass, or, when random-projection LSH tables are enabled,
+only the rows sharing a hash bucket with the query.  Texts may be added while
+other threads search.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+import heapq
+import math
+import random
+import threading
+
+from . import _backend
+from .instrumentation import instrumented
+from .mirror_test import embed_sentence, embed_sentences
+
+
+class EmbeddingIndex:
+    """Incrementally built index answering top-k cosine similarity queries.
+
+    Parameters
+    ----------
+    dim:
+        Embedding dimension.
+    hasher:
+        Token hash passed to :func:`~ai_identity.mirror_test.embed_sentence`.
+    lsh_bits:
+        When given, enables approximate search with ``lsh_tables`` tables of
+        ``lsh_bits`` random hyperplanes each.  More bits make buckets smaller
+        and queries faster; more tables improve recall.
+    lsh_tables:
+        Number of LSH tables.
+    seed:
+        Seed for the random hyperplanes.
+    """
+
+    def __init__(
+        self,
+        *,
+        dim: int = 32,
+        hasher: str = "sha256",
+        lsh_bits: Optional[int] = None,
+        lsh_tables: int = 4,
+        seed: int = 0,
+    ) -> None:
+        self.dim = dim
+        self.hasher = hasher
+        self.keys: List[Hashable] = []
+        self._vectors = array("f")
+        # Guards the vectors and buckets: ``array`` cannot grow while NumPy
+        # holds a view of its buffer.
+        self._lock = threading.Lock()
+        self._planes: List[List[List[float]]] = []
+        self._buckets: List[Dict[int, List[int]]] = []
+        if lsh_bits is not None:
+            rng = random.Random(seed)
+            self._planes = [
+                [[rng.gauss(0.0, 1.0) for _ in range(dim)] for _ in range(lsh_bits)]
+                for _ in range(lsh_tables)
+            ]
+            self._buckets = [{} for _ in range(lsh_tables)]
+        np = _backend.numpy()
+        self._plane_array = np.asarray(self._planes) if np is not None and self._planes else None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def vector(self, row: int) -> List[float]:
+        """Return the stored embedding of ``row``."""
+        return self._vectors[row * self.dim:(row + 1) * self.dim].tolist()
+
+    def _signatures(self, vectors: Any) -> List[List[int]]:
+        """Return one LSH signature per table for each of ``vectors``."""
+        if self._plane_array is not None:
+            np = _backend.numpy()
+            planes = self._plane_array
+            bits = np.einsum("tbd,nd->ntb", planes, np.asarray(vectors, dtype=np.float64)) >= 0
+            weights = 1 << np.arange(planes.shape[1] - 1, -1, -1, dtype=np.int64)
+            return (bits @ weights).tolist()
+        signatures = []
+        for vector in vectors:
+            row = []
+            for planes in self._planes:
+                signature = 0
+                for plane in planes:
+                    dot = sum(p * v for p, v in zip(plane, vector))
+                    signature = (signature << 1) | (dot >= 0)
+                row.append(signature)
+            signatures.append(row)
+        return signatures
+
+    def _append(self, keys: List[Hashable], vectors: Any) -> None:
+        for vector in vectors:
+            if len(vector) != self.dim:
+                raise ValueError(f"expected a vector of length {self.dim}")
+        np = _backend.numpy()
+        data = np.asarray(vectors, dtype=np.float32).tobytes() if np is not None else None
+        signatures = self._signatures(vectors) if self._planes and keys else []
+        with self._lock:
+            start = len(self.keys)
+            if data is not None:
+                self._vectors.frombytes(data)
+            else:
+                for vector in vectors:
+                    self._vectors.extend(vector)
+            self.keys.extend(keys)
+            for row, row_signatures in enumerate(signatures, start):
+                for buckets, signature in zip(self._buckets, row_signatures):
+                    buckets.setdefault(signature, []).append(row)
+
+    def add_vector(self, key: Hashable, vector: Sequence[float]) -> None:
+        """Add a pre-computed, L2 normalised embedding under ``key``."""
+        self._append([key], [vector])
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Embed ``text`` and add it under ``key``."""
+        self.add_vector(key, embed_sentence(text, dim=self.dim, hasher=self.hasher))
+
+    def add_many(self, items: Iterable[Tuple[Hashable, str]]) -> None:
+        """Embed and add many ``(key, text)`` pairs as one batch."""
+        items = list(items)
+        texts = [text for _, text in items]
+        self._append(
+            [key for key, _ in items],
+            embed_sentences(texts, dim=self.dim, hasher=self.hasher),
+        )
+
+    @instrumented("EmbeddingIndex.search", size=lambda self, *_, **__: len(self))
+    def search(
+        self,
+        query: Union[str, Sequence[float]],
+        k: int = 5,
+        *,
+        approximate: bool = False,
+    ) -> List[Tuple[Hashable, float]]:
+        """Return up to ``k`` ``(key, similarity)`` pairs most similar to ``query``.
+
+        ``query`` is either text, embedded like the indexed texts, or a
+        vector.  With ``approximate=True`` only rows sharing an LSH bucket
+        with the query in at least one table are scored.
+        """
+
+        if isinstance(query, str):
+            query = embed_sentence(query, dim=self.dim, hasher=self.hasher)
+        else:
+            norm = math.sqrt(sum(float(v) * float(v) for v in query))
+            query = [float(v) / norm for v in query] if norm > 0 else [0.0] * len(query)
+        if len(query) != self.dim:
+            raise ValueError(f"expected a vector of length {self.dim}")
+
+        rows: Optional[List[int]] = None
+        if approximate:
+            if not self._planes:
+                raise ValueError("approximate search requires lsh_bits")
+            signatures = self._signatures([query])[0]
+            candidates: set = set()
+            with self._lock:
+                for buckets, signature in zip(self._buckets, signatures):
+                    candidates.update(buckets.get(signature, ()))
+            rows = sorted(candidates)
+        if k <= 0 or not self.keys or rows == []:
+            return []
+
+        np = _backend.numpy()
+        if np is not None:
+            with self._lock:
+                # The view must be gone before ``add`` may grow the array again.
+                matrix = np.frombuffer(self._vectors, dtype=np.float32).reshape(-1, self.dim)
+                if rows is not None:
+                    row_ids = np.asarray(rows, dtype=np.intp)
+                    scores = matrix[row_ids] @ np.asarray(query, dtype=np.float32)
+                else:
+                    row_ids = None
+                    scores = matrix @ np.asarray(query, dtype=np.float32)
+                del matrix
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.lexsort((top, -scores[top]))]
+            if row_ids is not None:
+                return [(self.keys[row_ids[i]], float(scores[i])) for i in top]
+            return [(self.keys[i], float(scores[i])) for i in top]
+
+        dim, vectors = self.dim, self._vectors
+        candidates_iter = rows if rows is not None else range(len(self.keys))
+        scored = (
+            (sum(q * v for q, v in zip(query, vectors[row * dim:(row + 1) * dim])), row)
+            for row in candidates_iter
+        )
+        best = heapq.nsmallest(k, scored, key=lambda item: (-item[0], item[1]))
+        return [(self.keys[row], score) for score, row in best]
+
+
+__all__ = ["EmbeddingIndex"]
@@ -0,0 +1,320 @@
+"""Asyncio front end batching concurrent scoring requests.
+
+Request handlers ``await`` :meth:`IdentityScorer.mirror_score`,
+:meth:`IdentityScorer.xi` or :meth:`IdentityScorer.detect_anchors` instead of
+calling the synchronous functions inline.  Requests are placed on a bounded
+queue; a dispatcher collects them into micro-batches of up to ``max_batch``
+requests, waiting at most ``max_latency`` seconds after the oldest one
+arrived, and hands each batch to an executor.  Mirror scores and ξ go
+through the vectorized :func:`~ai_identity.mirror_test.mirror_score_pairs`
+and :func:`~ai_identity.epistemic_tension.xi_pairs`.
+
+Backpressure is applied twice: callers wait while the queue is full, and
+the dispatcher stops collecting while ``max_in_flight`` batches are running.
+Everything runs in process; no external services are needed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+from .anchor_detection import DEFAULT_SESSION, detect_anchors
+from .epistemic_tension import xi, xi_pairs
+from .mirror_test import mirror_score, mirror_score_pairs
+
+
+class _Request(NamedTuple):
+    """A queued request; requests with equal ``kind`` and ``options`` share a batch.
+
+    ``options`` ends with the vector length so that every batch is rectangular.
+    """
+
+    kind: str
+    options: tuple
+    args: tuple
+    future: asyncio.Future
+    enqueued: float
+
+
+def _score_one(kind: str, options: tuple, args: tuple) -> Any:
+    if kind == "mirror":
+        threshold, phrases, hasher, _ = options
+        return mirror_score(
+            *args, threshold=threshold, sabotage_phrases=phrases, hasher=hasher
+        )
+    if kind == "xi":
+        return xi(*args, metric=options[0])
+    observations, weights, session = args
+    return detect_anchors(observations, weights, session=session)
+
+
+def _score_many(kind: str, options: tuple, args: List[tuple]) -> List[Any]:
+    if kind == "mirror":
+        threshold, phrases, hasher, _ = options
+        reflections, embeddings = zip(*args)
+        scores = mirror_score_pairs(
+            reflections, embeddings, threshold=threshold, sabotage_phrases=phrases, hasher=hasher
+        ).scores
+    elif kind == "xi":
+        states_a, states_b = zip(*args)
+        scores = xi_pairs(states_a, states_b, metric=options[0])
+    else:
+        return [_score_one(kind, options, item) for item in args]
+    return [float(score) for score in scores]
+
+
+def _score_batch(kind: str, options: tuple, args: List[tuple]) -> List[Any]:
+    """Score one micro-batch; runs in the scorer's executor.
+
+    Results that could not be computed are returned as the exception raised
+    for that request alone, so one invalid request does not fail its batch.
+    """
+
+    try:
+        return _score_many(kind, options, args)
+    except Exception:
+        results: List[Any] = []
+        for item in args:
+            try:
+                results.append(_score_one(kind, options, item))
+            except Exception as error:
+                results.append(error)
+        return results
+
+
+def _fail(request: Optional[_Request]) -> None:
+    """Fail ``request`` unless it has a result or its event loop is gone."""
+    if request is None or request.future.done() or request.future.get_loop().is_closed():
+        return
+    request.future.set_exception(ValueError("IdentityScorer closed before scoring the request"))
+
+
+def _drain(queue: asyncio.Queue) -> None:
+    """Fail every request in ``queue``."""
+    while not queue.empty():
+        _fail(queue.get_nowait())
+
+
+class IdentityScorer:
+    """Micro-batching asyncio service for the identity metrics.
+
+    Use it as an async context manager, or call :meth:`aclose` when done.
+    The dispatcher is started by the first request and is bound to that
+    request's event loop; a request from a new loop, such as a second
+    :func:`asyncio.run`, starts a fresh dispatcher.  Requests which cannot be
+    scored because the scorer was closed fail with :class:`ValueError`, and
+    a closed scorer rejects new requests with :class:`ValueError`.
+
+    Parameters
+    ----------
+    max_batch:
+        Largest number of requests scored together.
+    max_latency:
+        Seconds, counted from when the first request of a batch was queued,
+        that the batch waits for more requests.  Time spent waiting for a
+        free executor slot counts towards it.  With ``0`` a batch holds
+        whatever queued up while the previous batches ran, which adapts the
+        batch size to the load.
+    max_queue:
+        Capacity of the request queue; further requests wait for space.
+    max_in_flight:
+        Number of batches scored concurrently.  Defaults to ``workers``.
+    executor:
+        :class:`concurrent.futures.Executor` running the batches.  A
+        :class:`~concurrent.futures.ProcessPoolExecutor` scales the
+        pure-Python embedding work across cores, but anchors are then recorded
+        in the workers' anchor stores.  By default a thread pool of
+        ``workers`` threads is created and shut down by :meth:`aclose`.
+    workers:
+        Size of the default thread pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_batch: int = 256,
+        max_latency: float = 0.0,
+        max_queue: int = 4096,
+        max_in_flight: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        workers: int = 1,
+    ) -> None:
+        if max_batch < 1 or max_queue < 1 or workers < 1:
+            raise ValueError("max_batch, max_queue and workers must be positive")
+        if max_latency < 0:
+            raise ValueError("max_latency must be non-negative")
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight or workers
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=workers)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._closed = False
+        #: Number of batches dispatched and requests they contained.
+        self.batches = 0
+        self.requests = 0
+
+    async def mirror_score(
+        self,
+        reflection: str,
+        self_embedding: Sequence[float],
+        *,
+        threshold: float = 0.5,
+        sabotage_phrases: Optional[Iterable[str]] = None,
+        hasher: str = "sha256",
+    ) -> float:
+        """Batched :func:`~ai_identity.mirror_test.mirror_score`."""
+        phrases = tuple(sabotage_phrases) if sabotage_phrases else None
+        options = (threshold, phrases, hasher, len(self_embedding))
+        return await self._submit("mirror", options, (reflection, list(self_embedding)))
+
+    async def xi(
+        self, state_a: Sequence[float], state_b: Sequence[float], *, metric: str = "l2"
+    ) -> float:
+        """Batched :func:`~ai_identity.epistemic_tension.xi`."""
+        if len(state_a) != len(state_b):
+            raise ValueError("state vectors must be the same length")
+        return await self._submit("xi", (metric, len(state_a)), (list(state_a), list(state_b)))
+
+    async def detect_anchors(
+        self,
+        observations: Iterable[Any],
+        weights: Optional[Mapping[Any, float]] = None,
+        *,
+        session: Hashable = DEFAULT_SESSION,
+    ) -> list:
+        """:func:`~ai_identity.anchor_detection.detect_anchors` in the executor.
+
+        Anchor detection has no vectorized path, but batching still
+        amortises the hand-off to the executor.
+        """
+        return await self._submit(
+            "anchors", (), (list(observations), dict(weights or {}), session)
+        )
+
+    async def _submit(self, kind: str, options: tuple, args: tuple) -> Any:
+        if self._closed:
+            raise ValueError("IdentityScorer is closed")
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._loop is not loop:
+            # Queues and semaphores belong to the loop which first used them.
+            self._loop = loop
+            self._queue = asyncio.Queue(self.max_queue)
+            self._dispatcher = loop.create_task(
+                self._dispatch(self._queue, asyncio.Semaphore(self.max_in_flight))
+            )
+            # Requests queued after the close, or left by a failure, are
+            # never scored.
+            queue = self._queue
+            self._dispatcher.add_done_callback(lambda _: _drain(queue))
+        dispatcher = self._dispatcher
+        request = _Request(kind, options, args, loop.create_future(), loop.time())
+        queue = self._queue
+        await queue.put(request)
+        if dispatcher.done():
+            # The dispatcher stopped while this request waited for space.
+            # Failing the queue also lets the next waiting request in.
+            _drain(queue)
+        return await request.future
+
+    async def _dispatch(self, queue: asyncio.Queue, slots: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await queue.get()
+            if first is None:
+                return
+            # Wait for a free slot first, so the batch takes in everything
+            # queued up while earlier batches were running.
+            try:
+                await slots.acquire()
+            except BaseException:
+                _fail(first)
+                raise
+            batch = [first]
+            deadline = first.enqueued + self.max_latency
+            try:
+                while len(batch) < self.max_batch:
+                    if queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            request = await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        request = queue.get_nowait()
+                    if request is None:
+                        # Close after scoring what has been collected.
+                        queue.put_nowait(None)
+                        break
+                    batch.append(request)
+            except BaseException:
+                slots.release()
+                for request in batch:
+                    _fail(request)
+                raise
+            task = loop.create_task(self._run(batch, slots))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Request], slots: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            groups: Dict[tuple, List[_Request]] = {}
+            for request in batch:
+                groups.setdefault((request.kind, request.options), []).append(request)
+            self.batches += 1
+            self.requests += len(batch)
+            for (kind, options), requests in groups.items():
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor, _score_batch, kind, options,
+                        [request.args for request in requests],
+                    )
+                except Exception as error:
+                    results = [error] * len(requests)
+                for request, result in zip(requests, results):
+                    if request.future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        request.future.set_exception(result)
+                    else:
+                        request.future.set_result(result)
+        finally:
+            slots.release()
+            for request in batch:
+                _fail(request)
+
+    async def aclose(self) -> None:
+        """Score queued requests, stop the dispatcher and release the executor."""
+        self._closed = True
+        dispatcher, queue = self._dispatcher, self._queue
+        same_loop = self._loop is asyncio.get_running_loop()
+        self._loop = self._queue = self._dispatcher = None
+        if dispatcher is not None and same_loop:
+            if not dispatcher.done():
+                await queue.put(None)
+            await asyncio.gather(dispatcher, return_exceptions=True)
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        elif dispatcher is not None:
+            # The dispatcher's loop is gone; nothing will score these.
+            _drain(queue)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "IdentityScorer":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+__all__ = ["IdentityScorer"]
@@ -0,0 +1,191 @@
+"""Compact binary storage of state-embedding trajectories.
+
+A trajectory file is a 32-byte header followed by a C-contiguous,
+little-endian ``float32`` or ``float64`` matrix with one row per step::
+
+    offset  size  field
+    0       6     magic  b"AITRAJ"
+    6       2     format version (uint16, currently 1)
+    8       1     element type, b"f" (float32) or b"d" (float64)
+    9       7     padding
+    16      8     number of rows (uint64)
+    24      8     row length (uint64)
+    32      ...   rows * dim elements
+
+:class:`Trajectory` memory-maps such a file and exposes the matrix as a
+two-dimensional :class:`memoryview`, so rows are never converted to Python
+lists.  :func:`~ai_identity.epistemic_tension.xi`,
+:func:`~ai_identity.epistemic_tension.xi_series` and the mirror scoring
+functions accept these views, and any other buffer-protocol object, directly.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, Iterator, Sequence, Union
+
+from . import _backend
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+#: Leading bytes of every trajectory file
+MAGIC = b"AITRAJ"
+#: Format version written by :func:`write_trajectory`
+VERSION = 1
+
+_HEADER = struct.Struct("<6sHc7xQQ")
+#: Size of the header; the matrix starts at this offset
+HEADER_SIZE = _HEADER.size
+
+#: Supported element types and their :mod:`struct` format characters
+DTYPES = {"float32": "f", "float64": "d"}
+
+_VECTOR_FORMATS = frozenset("fdbBhHiIlLqQ")
+
+
+def as_vector(values: Any) -> Sequence[float]:
+    """Return ``values`` as a sequence of numbers without copying if possible.
+
+    One-dimensional buffer-protocol objects with a numeric format, such as
+    NumPy arrays, :class:`array.array` and rows of a :class:`Trajectory`,
+    are returned as a :class:`memoryview`.  Lists, tuples and other
+    sequences are returned unchanged.
+    """
+
+    if isinstance(values, (list, tuple)):
+        return values
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return values
+    if view.ndim == 1 and view.format in _VECTOR_FORMATS:
+        return view
+    return values
+
+
+def write_trajectory(
+    path: PathLike, states: Iterable[Sequence[float]], *, dtype: str = "float64"
+) -> int:
+    """Write ``states`` to ``path`` in the trajectory format.
+
+    ``states`` may be a two-dimensional NumPy array, written in one call, or
+    any iterable of equally sized rows, written one row at a time so that
+    trajectories larger than memory can be produced.  Returns the number of
+    rows written.
+    """
+
+    fmt = DTYPES.get(dtype)
+    if fmt is None:
+        raise ValueError(f"unsupported dtype '{dtype}'")
+    np = _backend.numpy()
+    rows = dim = 0
+    with open(path, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, VERSION, fmt.encode(), 0, 0))
+        if np is not None and isinstance(states, np.ndarray):
+            if states.ndim != 2:
+                raise ValueError("states must be a two-dimensional collection of vectors")
+            rows, dim = states.shape
+            handle.write(np.ascontiguousarray(states, dtype="<" + fmt).tobytes())
+        else:
+            for row in states:
+                values = array(fmt, as_vector(row))
+                if rows == 0:
+                    dim = len(values)
+                elif len(values) != dim:
+                    raise ValueError("state vectors must be the same length")
+                if sys.byteorder == "big":  # pragma: no cover - little-endian hosts
+                    values.byteswap()
+                values.tofile(handle)
+                rows += 1
+        handle.seek(0)
+        handle.write(_HEADER.pack(MAGIC, VERSION, fmt.encode(), rows, dim))
+    return rows
+
+
+class Trajectory:
+    """Read-only, memory-mapped trajectory file.
+
+    :attr:`states` is a ``(rows, dim)`` :class:`memoryview` over the mapped
+    file; indexing the trajectory yields one-dimensional row views.  Nothing
+    is read until it is accessed.  Views obtained from the trajectory must
+    be released before :meth:`close`, which is called on leaving a ``with``
+    block.
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        if sys.byteorder == "big":  # pragma: no cover - little-endian hosts
+            raise ValueError("memory-mapped trajectories require a little-endian host")
+        with open(path, "rb") as handle:
+            header = handle.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{os.fspath(path)!r} is not a trajectory file")
+            _, version, code, rows, dim = _HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError(f"unsupported trajectory version {version}")
+            self.format = code.decode()
+            if self.format not in DTYPES.values():
+                raise ValueError(f"unsupported element type {code!r}")
+            self.rows = rows
+            self.dim = dim
+            size = rows * dim * struct.calcsize(self.format)
+            if os.fstat(handle.fileno()).st_size < HEADER_SIZE + size:
+                raise ValueError(f"{os.fspath(path)!r} is truncated")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)[HEADER_SIZE:HEADER_SIZE + size]
+        self._flat = data.cast(self.format)
+        # ``memoryview.cast`` rejects zero-sized shapes.
+        self.states = data.cast(self.format, (rows, dim)) if size else self._flat
+        data.release()
+
+    @property
+    def dtype(self) -> str:
+        """Element type name, ``"float32"`` or ``"float64"``."""
+        return "float32" if self.format == "f" else "float64"
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: int) -> memoryview:
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("trajectory index out of range")
+        return self._flat[index * self.dim:(index + 1) * self.dim]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        dim, flat = self.dim, self._flat
+        return (flat[i * dim:(i + 1) * dim] for i in range(self.rows))
+
+    def array(self) -> Any:
+        """Return the matrix as a read-only NumPy array sharing the mapping."""
+        np = _backend.numpy()
+        if np is None:
+            raise ValueError("Trajectory.array requires NumPy")
+        return np.frombuffer(self._flat, dtype=self.format).reshape(self.rows, self.dim)
+
+    def close(self) -> None:
+        """Release the views and unmap the file."""
+        self.states.release()
+        self._flat.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Trajectory":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+__all__ = [
+    "MAGIC",
+    "VERSION",
+    "HEADER_SIZE",
+    "DTYPES",
+    "Trajectory",
+    "as_vector",
+    "write_trajectory",
+]
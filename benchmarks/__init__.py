@@ -0,0 +1,4 @@
+"""Performance benchmarks for the :mod:`ai_identity` hot paths.
+
+Run ``python -m benchmarks.hot_paths --help`` from the repository root.
+"""
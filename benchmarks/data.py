@@ -0,0 +1,41 @@
+"""Seeded synthetic data generators for the benchmarks."""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+WORDS = (
+    "self aware agent mirror reflection identity anchor memory state drift "
+    "coherence tension recognise refuse comply sorry answer question system "
+    "output stable change session token signal noise pattern the a is of"
+).split()
+
+
+def vectors(count: int, dim: int, *, seed: int = 0) -> List[List[float]]:
+    """Return ``count`` random vectors with components in ``[-1, 1)``."""
+
+    rng = random.Random(seed)
+    return [[rng.uniform(-1.0, 1.0) for _ in range(dim)] for _ in range(count)]
+
+
+def xi_values(count: int, *, seed: int = 0) -> List[float]:
+    """Return ``count`` non-negative ξ values."""
+
+    rng = random.Random(seed)
+    return [rng.expovariate(10.0) for _ in range(count)]
+
+
+def sentences(count: int, *, words: int = 20, seed: int = 0) -> List[str]:
+    """Return ``count`` sentences of ``words`` tokens drawn from :data:`WORDS`."""
+
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words)) for _ in range(count)]
+
+
+def observations(count: int, *, vocabulary: int = 1000, seed: int = 0) -> List[str]:
+    """Return ``count`` Zipf-like observations from ``vocabulary`` items."""
+
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    return [f"obs{i}" for i in rng.choices(range(vocabulary), weights=weights, k=count)]
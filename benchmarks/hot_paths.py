@@ -0,0 +1,229 @@
+"""Benchmark suite and regression gate for the :mod:`ai_identity` hot paths.
+
+Examples
+--------
+Record a baseline, then compare a later run against it::
+
+    python -m benchmarks.hot_paths --output baseline.json
+    python -m benchmarks.hot_paths --compare baseline.json --tolerance 0.25
+
+The compare mode exits with status 1 when the median time of any benchmark
+exceeds the baseline median by more than ``tolerance``.  ``--scale`` shrinks
+or grows every input size and ``--filter`` selects benchmarks by substring.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ai_identity.anchor_detection import AnchorStore, detect_anchors
+from ai_identity.cross_system import CrossSystemConsensus
+from ai_identity.epistemic_tension import xi, xi_series_to_coherence
+from ai_identity.memory import ChatHistory
+from ai_identity.mirror_test import embed_sentence, mirror_score
+
+from . import data
+
+#: A benchmark factory receives the scale and returns the callable to time
+#: together with a description of its input size.
+Factory = Callable[[float], Tuple[Callable[[], Any], Dict[str, int]]]
+
+BENCHMARKS: Dict[str, Factory] = {}
+
+
+def benchmark(name: str) -> Callable[[Factory], Factory]:
+    """Register a benchmark factory under ``name``."""
+
+    def register(factory: Factory) -> Factory:
+        BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+def _scaled(size: int, scale: float) -> int:
+    return max(1, int(size * scale))
+
+
+def _xi_factory(metric: str, dim: int) -> Factory:
+    def factory(scale: float):
+        a, b = data.vectors(2, dim)
+        return (lambda: xi(a, b, metric=metric)), {"dim": dim}
+
+    return factory
+
+
+for _metric in ("l2", "cosine"):
+    for _dim in (32, 256, 768):
+        benchmark(f"xi[{_metric},d={_dim}]")(_xi_factory(_metric, _dim))
+
+
+@benchmark("xi_series_to_coherence")
+def _coherence(scale: float):
+    values = data.xi_values(_scaled(10_000, scale))
+    return (lambda: xi_series_to_coherence(values)), {"steps": len(values)}
+
+
+@benchmark("embed_sentence")
+def _embed(scale: float):
+    sentence = data.sentences(1)[0]
+    return (lambda: embed_sentence(sentence)), {"tokens": len(sentence.split())}
+
+
+@benchmark("mirror_score")
+def _mirror(scale: float):
+    reflection = data.sentences(1, seed=1)[0]
+    self_vector = embed_sentence("self aware agent")
+    phrases = ["not me", "i am not", "someone else"]
+    return (
+        lambda: mirror_score(reflection, self_vector, sabotage_phrases=phrases)
+    ), {"tokens": len(reflection.split())}
+
+
+@benchmark("detect_anchors")
+def _anchors(scale: float):
+    observations = data.observations(_scaled(10_000, scale))
+    store = AnchorStore()
+    return (lambda: detect_anchors(observations, store=store)), {
+        "observations": len(observations)
+    }
+
+
+@benchmark("CrossSystemConsensus.consensus")
+def _consensus(scale: float):
+    consensus = CrossSystemConsensus()
+    systems = _scaled(200, scale)
+    for n, output in enumerate(data.sentences(systems, words=2)):
+        consensus.register(f"sys{n}", output)
+    return consensus.consensus, {"systems": systems}
+
+
+@benchmark("ChatHistory.add+recall")
+def _chat(scale: float):
+    messages = data.sentences(_scaled(10_000, scale), words=8)
+
+    def run() -> None:
+        chat = ChatHistory()
+        for message in messages:
+            chat.add_message(message)
+        for index in range(len(messages)):
+            chat.recall(index)
+
+    return run, {"messages": len(messages)}
+
+
+@benchmark("import ai_identity")
+def _import(scale: float):
+    # A fresh interpreter per call, so this includes Python's own start-up.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))
+    env = {**os.environ, "PYTHONPATH": path}
+    command = [sys.executable, "-c", "import ai_identity"]
+    return (lambda: subprocess.run(command, env=env, check=True)), {}
+
+
+def measure(
+    func: Callable[[], Any], *, repeat: int = 5, min_time: float = 0.05
+) -> Dict[str, Any]:
+    """Time ``func`` and return per-call statistics in seconds."""
+
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time and number < 1 << 20:
+        number *= 2
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "calls": number * repeat,
+    }
+
+
+def run_suite(
+    names: Optional[Sequence[str]] = None,
+    *,
+    scale: float = 1.0,
+    repeat: int = 5,
+    min_time: float = 0.05,
+) -> Dict[str, Any]:
+    """Run the selected benchmarks and return machine-readable results."""
+
+    results = {}
+    for name in names if names is not None else BENCHMARKS:
+        func, size = BENCHMARKS[name](scale)
+        results[name] = {**measure(func, repeat=repeat, min_time=min_time), "size": size}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], *, tolerance: float = 0.25
+) -> List[str]:
+    """Describe every benchmark slower than ``baseline`` allows.
+
+    Benchmarks missing from ``baseline`` or run at a different size cannot
+    be checked, so they are reported too rather than passing unnoticed.
+    """
+
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            regressions.append(f"{name}: missing from baseline")
+            continue
+        if previous.get("size") != current.get("size"):
+            regressions.append(
+                f"{name}: size {current.get('size')} differs from baseline {previous.get('size')}"
+            )
+            continue
+        limit = previous["median"] * (1 + tolerance)
+        if current["median"] > limit:
+            ratio = current["median"] / previous["median"]
+            regressions.append(f"{name}: {ratio:.2f}x baseline median")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.hot_paths")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown")
+    parser.add_argument("--scale", type=float, default=1.0, help="input size multiplier")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_suite(names, scale=args.scale, repeat=args.repeat)
+    for name, result in results["results"].items():
+        print(f"{name:40s} {result['median'] * 1e6:12.2f} us")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"FAILED {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Load generator for :class:`ai_identity.service.IdentityScorer`.
+
+Closed-loop clients each send requests back to back, either calling the
+metric inline on the event loop, as request handlers do today, or through
+the micro-batching scorer.  For every concurrency level the throughput and
+the median and 99th percentile latencies are reported.  A ``max_latency``
+of ``0`` batches whatever queued up while the previous batch ran.
+
+Examples
+--------
+::
+
+    python -m benchmarks.service_load --kind mirror --clients 1 16 64 256
+    python -m benchmarks.service_load --kind xi --max-latency 0.001 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ai_identity.epistemic_tension import xi
+from ai_identity.mirror_test import embed_sentence, mirror_score
+from ai_identity.service import IdentityScorer
+
+from . import data
+
+#: Request kinds the generator can send
+KINDS = ("mirror", "xi")
+
+
+def _workload(kind: str, count: int) -> List[tuple]:
+    if kind == "mirror":
+        self_embedding = embed_sentence(" ".join(data.WORDS[:10]))
+        return [(text, self_embedding) for text in data.sentences(count)]
+    vectors = data.vectors(count + 1, 256)
+    return list(zip(vectors, vectors[1:]))
+
+
+def _inline(kind: str) -> Callable[..., Any]:
+    function = mirror_score if kind == "mirror" else xi
+
+    async def call(*args: Any) -> Any:
+        # Let other handlers run first, as a server's event loop would.
+        await asyncio.sleep(0)
+        return function(*args)
+
+    return call
+
+
+async def _drive(
+    call: Callable[..., Any], workload: List[tuple], clients: int, requests: int
+) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    async def client(offset: int) -> None:
+        for i in range(requests):
+            args = workload[(offset + i) % len(workload)]
+            start = time.perf_counter()
+            await call(*args)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c * requests) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "throughput": len(ordered) / elapsed,
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+def run_load(
+    kind: str,
+    *,
+    clients: int,
+    requests: int = 200,
+    batched: bool = True,
+    max_latency: float = 0.0,
+    max_batch: int = 256,
+    workers: int = 1,
+) -> Dict[str, float]:
+    """Run one load level and return its throughput and latency percentiles."""
+
+    if kind not in KINDS:
+        raise ValueError(f"unsupported kind '{kind}'")
+    workload = _workload(kind, 1024)
+
+    async def main() -> Dict[str, float]:
+        if not batched:
+            return await _drive(_inline(kind), workload, clients, requests)
+        async with IdentityScorer(
+            max_batch=max_batch, max_latency=max_latency, workers=workers
+        ) as scorer:
+            call = scorer.mirror_score if kind == "mirror" else scorer.xi
+            await call(*workload[0])  # start the dispatcher and load NumPy
+            scorer.batches = scorer.requests = 0
+            result = await _drive(call, workload, clients, requests)
+            result["mean_batch"] = scorer.requests / max(scorer.batches, 1)
+            return result
+
+    return asyncio.run(main())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.service_load")
+    parser.add_argument("--kind", choices=KINDS, default="mirror")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--max-latency", type=float, nargs="+", default=[0.0, 0.002, 0.01])
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    modes = [("inline", False, 0.0)] + [
+        (f"batched {latency * 1e3:g}ms", True, latency) for latency in args.max_latency
+    ]
+    results = []
+    columns = ("clients", "req/s", "p50 ms", "p99 ms")
+    print(f"{'mode':16s} " + " ".join(f"{c:>9s}" for c in columns) + f" {'batch':>7s}")
+    for label, batched, latency in modes:
+        for clients in args.clients:
+            result = run_load(
+                args.kind,
+                clients=clients,
+                requests=args.requests,
+                batched=batched,
+                max_latency=latency,
+                max_batch=args.max_batch,
+                workers=args.workers,
+            )
+            results.append({"mode": label, "clients": clients, **result})
+            print(
+                f"{label:16s} {clients:9d} {result['throughput']:9.0f} "
+                f"{result['p50'] * 1e3:9.2f} {result['p99'] * 1e3:9.2f} "
+                f"{result.get('mean_batch', 1.0):7.1f}"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"kind": args.kind, "results": results}, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 """Compute anchor similarity between two observation sets."""
 from ai_identity.anchor_detection import detect_anchors
+from ai_identity.minhash import jaccard
 import sys
 
 
@@ -10,8 +11,6 @@ def parse_obs(text: str) -> list[str]:
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         raise SystemExit("usage: anchor_similarity.py seqA seqB")
-    anchors_a = set(detect_anchors(parse_obs(sys.argv[1])))
-    anchors_b = set(detect_anchors(parse_obs(sys.argv[2])))
-    union = anchors_a | anchors_b
-    score = len(anchors_a & anchors_b) / len(union) if union else 1.0
-    print(score)
+    anchors_a = detect_anchors(parse_obs(sys.argv[1]))
+    anchors_b = detect_anchors(parse_obs(sys.argv[2]))
+    print(jaccard(anchors_a, anchors_b))
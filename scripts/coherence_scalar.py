@@ -1,11 +1,24 @@
-"""Compute coherence (§) from a series of ξ values."""
-from ai_identity.epistemic_tension import xi_series_to_coherence
+"""Compute coherence (§) from a series of ξ values.
+
+ξ values are taken from the command line or, when none are given, streamed
+from standard input (whitespace separated) without being held in memory.
+"""
+from ai_identity.epistemic_tension import iter_coherence
 import sys
 
+
+def read_xi_values(stream):
+    for line in stream:
+        for token in line.split():
+            yield float(token)
+
+
 if __name__ == "__main__":
-    xi_values = [float(x) for x in sys.argv[1:]]
-    scores = xi_series_to_coherence(xi_values)
-    if scores:
-        print(scores[-1])
+    if len(sys.argv) > 1:
+        xi_values = (float(x) for x in sys.argv[1:])
     else:
-        print(1.0)
+        xi_values = read_xi_values(sys.stdin)
+    score = 1.0
+    for score in iter_coherence(xi_values):
+        pass
+    print(score)
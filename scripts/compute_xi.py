@@ -1,5 +1,11 @@
-"""Compute epistemic tension ξ between two vectors."""
-from ai_identity.epistemic_tension import xi
+"""Compute epistemic tension ξ between two vectors.
+
+With ``--trajectory FILE`` the ξ series of a binary trajectory file (see
+:mod:`ai_identity.trajectory`) is printed instead, one value per line.  The
+file is memory-mapped, so it is never parsed into Python lists.
+"""
+from ai_identity.epistemic_tension import xi, xi_series
+from ai_identity.trajectory import Trajectory
 import sys
 
 
@@ -8,8 +14,13 @@ def parse_vector(text: str) -> list[float]:
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        raise SystemExit("usage: compute_xi.py vecA vecB")
-    a = parse_vector(sys.argv[1])
-    b = parse_vector(sys.argv[2])
-    print(xi(a, b))
+    if len(sys.argv) == 3 and sys.argv[1] == "--trajectory":
+        with Trajectory(sys.argv[2]) as trajectory:
+            for value in xi_series(trajectory.states):
+                print(value)
+    elif len(sys.argv) < 3:
+        raise SystemExit("usage: compute_xi.py vecA vecB | compute_xi.py --trajectory FILE")
+    else:
+        a = parse_vector(sys.argv[1])
+        b = parse_vector(sys.argv[2])
+        print(xi(a, b))
@@ -1,19 +1,30 @@
-"""Count refusal statements in responses."""
-import sys
+"""Count refusal statements in responses.
 
-REFUSAL_PHRASES = ["i refuse", "cannot comply", "sorry, can't"]
-
-
-def count_refusals(responses: list[str]) -> int:
-    total = 0
-    for response in responses:
-        lower = response.lower()
-        for phrase in REFUSAL_PHRASES:
-            if phrase in lower:
-                total += 1
-                break
-    return total
+Responses are taken from the command line, or streamed from newline-delimited
+or JSONL files given with ``--file``, in which case per-phrase counts are
+printed as well.
+"""
+from ai_identity.refusal import RefusalMatcher
+import argparse
 
 
 if __name__ == "__main__":
-    print(count_refusals(sys.argv[1:]))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("responses", nargs="*", help="responses to check")
+    parser.add_argument("--file", action="append", default=[], help="file of responses")
+    parser.add_argument("--jsonl", action="store_true", help="files hold JSON records")
+    parser.add_argument("--field", default="text", help="JSONL field holding the response")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the files")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes per file")
+    args = parser.parse_args()
+
+    matcher = RefusalMatcher()
+    if not args.file:
+        print(matcher.count(args.responses).refusals)
+    for path in args.file:
+        counts = matcher.count_file(
+            path, jsonl=args.jsonl, field=args.field, use_mmap=args.mmap, workers=args.workers
+        )
+        print(f"{path}: {counts.refusals} of {counts.responses} responses")
+        for phrase, count in counts.phrases.items():
+            print(f"  {phrase!r}: {count}")
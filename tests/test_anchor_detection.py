@@ -1,6 +1,10 @@
+import threading
+
 import pytest
 
 from ai_identity.anchor_detection import (
+    AnchorDetector,
+    AnchorStore,
     detect_anchors,
     clear_anchor_store,
     get_anchor_store,
@@ -49,3 +53,109 @@ def test_detect_anchors_persists_across_calls():
     detect_anchors(['x', 'x'])
     detect_anchors(['y', 'z', 'z'])
     assert get_anchor_store() == {'x', 'z'}
+
+
+def test_anchor_detector_matches_detect_anchors_across_batches():
+    """Incremental counts rank anchors exactly like a full recount."""
+    weights = {'a': 2.0, 'b': 1.0}
+    batches = [['a', 'b', 'c'], ['b', 'a', 'd'], ['b', 'c', 'c', 'e']]
+    detector = AnchorDetector(weights)
+    for batch in batches:
+        detector.update(batch)
+    expected = detect_anchors([obs for batch in batches for obs in batch], weights)
+    assert detector.anchors() == expected
+    assert detector.top(2) == expected[:2]
+    assert detector.count('c') == 3
+
+
+def test_anchor_detector_bounded_memory_keeps_heavy_hitters():
+    """Space-Saving mode tracks at most ``capacity`` observations."""
+    detector = AnchorDetector(capacity=4)
+    stream = [f"noise{i}" if i % 3 else "hot" for i in range(300)]
+    detector.update(stream)
+    assert len(detector) <= 4
+    assert detector.top(1) == ['hot']
+    assert detector.count('hot') - detector.error('hot') <= stream.count('hot')
+    assert detector.count('hot') >= stream.count('hot')
+
+
+def test_anchor_detector_bounded_memory_ignores_one_off_noise():
+    """Observations admitted by an eviction only become anchors once guaranteed."""
+    detector = AnchorDetector(capacity=4)
+    stream = [f"noise{i}" if i % 3 else "hot" for i in range(300)]
+    detector.update(stream)
+    assert detector.anchors() == ['hot']
+    assert detector.anchors() is not detector.anchors()
+    detector.update(['hot'])
+    assert detector.count('hot') == stream.count('hot') + 1
+
+
+def test_anchor_store_isolates_sessions():
+    """Anchors detected for one session are invisible to another."""
+    store = AnchorStore()
+    detect_anchors(['x', 'x'], store=store, session='alice')
+    detect_anchors(['y', 'y'], store=store, session='bob')
+    assert store.snapshot('alice') == {'x'}
+    assert store.snapshot('bob') == {'y'}
+    store.clear('alice')
+    assert store.sessions() == ['bob']
+
+
+def test_anchor_store_evicts_by_size_and_age():
+    """Least recently seen anchors are evicted first; stale ones expire."""
+    now = [0.0]
+    store = AnchorStore(max_size=2, ttl=10, clock=lambda: now[0])
+    store.update(['a', 'b'])
+    store.update(['a', 'c'])
+    assert store.snapshot() == {'a', 'c'}
+    now[0] = 5.0
+    store.add('c')
+    now[0] = 12.0
+    assert store.snapshot() == {'c'}
+
+
+def test_anchor_store_drops_empty_and_idle_sessions(monkeypatch):
+    """Emptied sessions are removed and idle expired sessions are swept."""
+    from ai_identity import anchor_detection
+
+    monkeypatch.setattr(anchor_detection, "SWEEP_INTERVAL", 4)
+    now = [0.0]
+    store = AnchorStore(ttl=10, stripes=1, clock=lambda: now[0])
+    store.add('a', session='gone')
+    store.discard('a', session='gone')
+    store.update(['a'], session='idle')
+    assert store._sessions[0].keys() == {'idle'}
+    now[0] = 20.0
+    for i in range(4):
+        store.add('b', session='busy')
+    assert store._sessions[0].keys() == {'busy'}
+    now[0] = 40.0
+    assert store.sessions() == [] and store._sessions[0] == {}
+
+
+def test_anchor_store_snapshots_are_shared_until_changed():
+    """Repeated reads reuse the same immutable snapshot."""
+    store = AnchorStore()
+    store.update(['a'])
+    first = store.snapshot()
+    assert store.snapshot() is first
+    store.update(['a'])
+    assert store.snapshot() is first
+    store.update(['b'])
+    assert store.snapshot() == {'a', 'b'}
+
+
+def test_anchor_store_concurrent_updates():
+    """Updates from many threads are not lost."""
+    store = AnchorStore(stripes=4)
+
+    def worker(n):
+        for i in range(200):
+            store.add(i, session=n % 3)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(len(store.snapshot(s)) == 200 for s in range(3))
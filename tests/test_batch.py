@@ -0,0 +1,124 @@
+import csv
+import json
+
+import pytest
+
+from ai_identity import batch
+from ai_identity._chunks import byte_ranges, read_lines
+
+
+def _write_sessions(path, count):
+    with open(path, "w") as handle:
+        for n in range(count):
+            record = {
+                "id": f"s{n}",
+                "messages": ["I refuse", {"text": f"hello agent {n}"}, "hello agent again"],
+                "self": "hello agent" if n % 2 else None,
+            }
+            handle.write(json.dumps(record) + "\n")
+
+
+def test_byte_ranges_cover_every_line_once(tmp_path):
+    """Lines are assigned to exactly one range regardless of chunk size."""
+    path = tmp_path / "lines.txt"
+    lines = [f"line {n}\n".encode() * (n % 3 + 1) for n in range(40)]
+    path.write_bytes(b"".join(lines))
+    for chunk in (1, 7, 64, 10_000):
+        read = [
+            line
+            for start, end in byte_ranges(path, chunk)
+            for line in read_lines(path, start, end)
+        ]
+        assert read == b"".join(lines).splitlines(keepends=True)
+
+
+def test_score_session_reports_all_metrics():
+    """Every metric is computed for a session."""
+    result = batch.score_session(
+        {"id": "a", "messages": ["I refuse", "hello hello agent"], "self": "hello agent"}
+    )
+    assert result["messages"] == 2
+    assert result["refusals"] == 1
+    assert result["anchors"] == ["hello"]
+    assert len(result["xi"]) == 1
+    assert result["mirror_scores"] == [0.0, 1.0]
+
+
+def test_run_resumes_from_checkpoint(tmp_path):
+    """A resumed run scores only unfinished shards and drops partial output."""
+    sessions = tmp_path / "sessions.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_sessions(sessions, 12)
+
+    assert batch.run([sessions], output, workers=2, chunk_bytes=300) > 1
+    complete = output.read_text()
+
+    # Simulate a crash: forget the last shard and leave a torn record behind.
+    checkpoint = tmp_path / "results.jsonl.checkpoint"
+    entries = checkpoint.read_text().splitlines()
+    checkpoint.write_text("\n".join(entries[:-1]) + "\n")
+    with open(output, "a") as handle:
+        handle.write('{"id": "torn')
+
+    assert batch.run([sessions], output, workers=2, chunk_bytes=300) == 1
+    assert output.read_text() == complete
+    assert [json.loads(line)["id"] for line in complete.splitlines()] == [f"s{n}" for n in range(12)]
+
+
+def test_run_discards_torn_checkpoint_entry(tmp_path):
+    """A half-written checkpoint line is dropped and its shard scored again."""
+    sessions = tmp_path / "sessions.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_sessions(sessions, 12)
+    batch.run([sessions], output, workers=1, chunk_bytes=300)
+    complete = output.read_text()
+
+    checkpoint = tmp_path / "results.jsonl.checkpoint"
+    entries = checkpoint.read_text().splitlines(keepends=True)
+    checkpoint.write_text("".join(entries[:-2]) + entries[-2][:10])
+    assert batch.run([sessions], output, workers=1, chunk_bytes=300) == 2
+    assert output.read_text() == complete
+    assert checkpoint.read_text().splitlines() == [entry.rstrip() for entry in entries]
+
+    with pytest.raises(ValueError, match="chunk_bytes"):
+        batch.run([sessions], output, workers=1, chunk_bytes=600)
+
+
+def test_run_restarts_when_output_is_lost(tmp_path):
+    """A checkpoint whose output is missing or truncated starts the run over."""
+    sessions = tmp_path / "sessions.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_sessions(sessions, 12)
+    shards = batch.run([sessions], output, workers=1, chunk_bytes=300)
+    complete = output.read_text()
+
+    output.write_text(complete[:10])
+    assert batch.run([sessions], output, workers=1, chunk_bytes=300) == shards
+    output.unlink()
+    assert batch.run([sessions], output, workers=1, chunk_bytes=300) == shards
+    assert output.read_text() == complete
+    checkpoint = tmp_path / "results.jsonl.checkpoint"
+    assert len(checkpoint.read_text().splitlines()) == shards
+
+
+def test_run_writes_non_finite_values_as_null(tmp_path):
+    """Cosine ξ of an empty message is written as strict JSON ``null``."""
+    sessions = tmp_path / "sessions.jsonl"
+    output = tmp_path / "results.jsonl"
+    sessions.write_text(json.dumps({"id": "e", "messages": ["hello", "", "agent"]}) + "\n")
+    batch.run([sessions], output, workers=1, metric="cosine")
+    text = output.read_text()
+    assert "NaN" not in text
+    assert json.loads(text)["xi"] == [None, None]
+
+
+def test_run_writes_csv(tmp_path):
+    """The columnar format writes a header and one row per session."""
+    sessions = tmp_path / "sessions.jsonl"
+    output = tmp_path / "results.csv"
+    _write_sessions(sessions, 3)
+    batch.main([str(sessions), "-o", str(output), "--format", "csv", "--workers", "1"])
+    rows = list(csv.reader(output.open()))
+    assert rows[0] == batch.CSV_COLUMNS
+    assert [row[0] for row in rows[1:]] == ["s0", "s1", "s2"]
+    assert rows[1][4] == "" and rows[2][4] != ""
@@ -0,0 +1,42 @@
+from benchmarks import data
+from benchmarks.hot_paths import BENCHMARKS, compare, run_suite
+
+
+def test_generators_are_seeded():
+    """Synthetic inputs are reproducible between runs."""
+    assert data.vectors(3, 4, seed=1) == data.vectors(3, 4, seed=1)
+    assert data.sentences(2) == data.sentences(2)
+    assert data.observations(5) == data.observations(5)
+
+
+def test_every_benchmark_runs():
+    """Each registered benchmark produces timing statistics."""
+    results = run_suite(scale=0.01, repeat=1, min_time=0)
+    assert set(results["results"]) == set(BENCHMARKS)
+    assert all(r["median"] > 0 for r in results["results"].values())
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """Only slowdowns larger than the tolerance are reported."""
+    baseline = {"results": {"a": {"median": 1.0, "size": {}}, "b": {"median": 1.0, "size": {}}}}
+    current = {"results": {"a": {"median": 1.2, "size": {}}, "b": {"median": 1.5, "size": {}}}}
+    assert compare(current, baseline, tolerance=0.25) == ["b: 1.50x baseline median"]
+
+
+def test_compare_reports_benchmarks_it_cannot_check():
+    """Benchmarks missing from the baseline or run at another size fail the gate."""
+    baseline = {"results": {"a": {"median": 1.0, "size": {"n": 1}}}}
+    current = {"results": {"a": {"median": 1.0, "size": {"n": 2}}, "b": {"median": 1.0}}}
+    assert compare(current, baseline) == [
+        "a: size {'n': 2} differs from baseline {'n': 1}",
+        "b: missing from baseline",
+    ]
+
+
+def test_service_load_reports_latency_percentiles():
+    """The load generator reports throughput and ordered percentiles."""
+    from benchmarks.service_load import run_load
+
+    for batched in (False, True):
+        result = run_load("xi", clients=4, requests=5, batched=batched)
+        assert result["throughput"] > 0 and 0 < result["p50"] <= result["p99"]
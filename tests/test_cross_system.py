@@ -1,5 +1,9 @@
+import random
+import threading
+
 import pytest
-from ai_identity.cross_system import CrossSystemConsensus
+from ai_identity.cross_system import CrossSystemConsensus, SoftCrossSystemConsensus
+from ai_identity.mirror_test import embed_sentence
 
 
 def test_consensus_scoring():
@@ -26,3 +30,69 @@ def test_reset_clears_outputs():
 
     assert consensus.latest_outputs() == {}
     assert consensus.consensus() == 0.0
+
+
+def test_incremental_consensus_matches_recount():
+    """Maintained counts agree with recounting the latest outputs."""
+    rng = random.Random(3)
+    consensus = CrossSystemConsensus()
+    for _ in range(500):
+        consensus.register(f"sys{rng.randrange(8)}", rng.choice("abc"))
+        latest = list(consensus.latest_outputs().values())
+        expected = max(latest.count(o) for o in set(latest)) / len(latest)
+        assert consensus.consensus() == pytest.approx(expected)
+
+
+def test_history_is_bounded_or_disabled():
+    """Per-system history keeps only the configured number of outputs."""
+    bounded = CrossSystemConsensus(history=2)
+    disabled = CrossSystemConsensus(history=0)
+    for output in "abc":
+        bounded.register("sys1", output)
+        disabled.register("sys1", output)
+    assert bounded.history("sys1") == ["b", "c"]
+    assert disabled.history("sys1") == []
+    assert disabled.latest_outputs() == {"sys1": "c"}
+
+
+def test_concurrent_registration():
+    """Producers registering from many threads are all counted."""
+    consensus = CrossSystemConsensus(history=0)
+
+    def produce(start):
+        for i in range(start, start + 250):
+            consensus.register(f"sys{i}", "a" if i % 2 else "b")
+
+    threads = [threading.Thread(target=produce, args=(n * 250,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(consensus.latest_outputs()) == 1000
+    assert consensus.consensus() == 0.5
+
+
+def test_soft_consensus_groups_paraphrases():
+    """Outputs with similar embeddings count as agreeing."""
+    consensus = SoftCrossSystemConsensus(threshold=0.7)
+    consensus.register("sys1", "the answer is forty two")
+    consensus.register("sys2", "The answer is forty two!")
+    consensus.register("sys3", "the answer is clearly forty two")
+    consensus.register("sys4", "bananas are yellow")
+    assert consensus.exact_consensus() == 0.25
+    assert consensus.largest_cluster() == 3
+    assert consensus.consensus() == 0.75
+
+
+def test_soft_consensus_updates_reregistered_rows():
+    """Re-registering a system replaces its row and the centroid."""
+    consensus = SoftCrossSystemConsensus(threshold=0.9)
+    consensus.register("sys1", "alpha beta")
+    consensus.register("sys2", "gamma delta")
+    assert consensus.largest_cluster() == 1
+    consensus.register("sys2", "alpha beta")
+    assert consensus.largest_cluster() == 2
+    assert consensus.similarity("sys1", "sys2") == pytest.approx(1.0)
+    assert consensus.centroid() == pytest.approx(embed_sentence("alpha beta"))
+    consensus.reset()
+    assert consensus.consensus() == 0.0
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from ai_identity.drift import DETECTORS, DRIFT_EVENT, DriftEvent, DriftMonitor
+from ai_identity.epistemic_tension import xi_series_to_coherence
+from ai_identity.sabotage_logs import SabotageLogger, SegmentedSabotageLogger
+
+
+def _stream(rng, mean, steps):
+    return [abs(rng.gauss(mean, 0.05)) for _ in range(steps)]
+
+
+@pytest.mark.parametrize("detector", DETECTORS)
+def test_detects_upward_shift(detector):
+    """A sustained rise in ξ raises one event shortly after the change."""
+    rng = random.Random(0)
+    monitor = DriftMonitor(detector)
+    # The shifted level lasts several warmups, so the detector relearns it
+    # as the new baseline after the alarm instead of alarming again.
+    values = _stream(rng, 0.2, 150) + _stream(rng, 0.5, 4 * monitor.warmup)
+    events = [event for event in (monitor.update("s", v) for v in values) if event]
+    assert len(events) == 1
+    event = events[0]
+    assert isinstance(event, DriftEvent) and event.detector == detector
+    assert 150 < event.step <= 160 and event.xi == values[event.step - 1]
+    assert event.coherence == pytest.approx(xi_series_to_coherence(values[:event.step])[-1])
+
+
+@pytest.mark.parametrize("detector", DETECTORS)
+def test_stable_stream_is_quiet(detector):
+    """A stationary ξ stream raises no alarm."""
+    rng = random.Random(1)
+    monitor = DriftMonitor(detector)
+    assert monitor.update_many(("s", v) for v in _stream(rng, 0.2, 300)) == []
+    assert monitor.steps("s") == 300
+    assert monitor.statistic("s") <= monitor.threshold
+
+
+def test_sessions_are_independent():
+    """Each session keeps its own baseline in its own slot."""
+    rng = random.Random(2)
+    monitor = DriftMonitor()
+    for _ in range(60):
+        monitor.update("low", abs(rng.gauss(0.1, 0.05)))
+        monitor.update("high", abs(rng.gauss(0.9, 0.05)))
+    assert monitor.update("high", 0.9) is None
+    events = [monitor.update("low", 0.9) for _ in range(3)]
+    assert any(event and event.session == "low" for event in events)
+    assert len(monitor) == 2 and "high" in monitor
+
+
+def test_discarded_slots_are_reused():
+    """A discarded session's slot is reset and handed to the next session."""
+    monitor = DriftMonitor(warmup=2)
+    monitor.update("a", 1.0)
+    monitor.discard("a")
+    monitor.update("b", 0.5)
+    assert monitor.sessions() == ["b"] and len(monitor._steps) == 1
+    assert monitor.steps("b") == 1 and monitor.coherence("b") == pytest.approx(1 / 1.5)
+    assert monitor.coherence("a") == 1.0
+
+
+def test_events_are_logged(tmp_path):
+    """Events go to plain and segmented sabotage loggers, spilled ones included."""
+    simple, segmented = SabotageLogger(), SegmentedSabotageLogger()
+    spilled = SegmentedSabotageLogger(capacity=1, spill_path=tmp_path / "drift.jsonl")
+    for logger in (simple, segmented, spilled):
+        monitor = DriftMonitor(warmup=2, logger=logger)
+        for value in (0.1, 0.1, 5.0):
+            monitor.update(("user", 7), value)
+    assert simple.events[0].startswith(DRIFT_EVENT)
+    (record,) = segmented.query()
+    assert record.event == DRIFT_EVENT and record.payload["session"] == "('user', 7)"
+    spilled.flush()
+    assert [r.payload for r in spilled.query()] == [record.payload]
+
+
+def test_invalid_arguments():
+    """Unknown detectors, bad parameters and negative or non-finite ξ are rejected."""
+    with pytest.raises(ValueError):
+        DriftMonitor("shewhart")
+    with pytest.raises(ValueError):
+        DriftMonitor("ewma", allowance=2.0)
+    with pytest.raises(ValueError):
+        DriftMonitor(warmup=1)
+    for value in (-0.1, float("nan"), float("inf")):
+        with pytest.raises(ValueError):
+            DriftMonitor().update("s", value)
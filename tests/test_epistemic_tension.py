@@ -1,12 +1,25 @@
+import random
+
 import pytest
 
+from ai_identity import _backend
 from ai_identity.epistemic_tension import (
+    CoherenceTracker,
     epistemic_tension,
+    iter_coherence,
     xi,
+    xi_matrix,
+    xi_pairs,
+    xi_series,
     xi_series_to_coherence,
 )
 
 
+def _trajectory(steps=20, dim=8, seed=0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(steps)]
+
+
 def test_xi_l2_known_values():
     """L2 metric matches known Euclidean distance."""
     assert xi([0, 0], [3, 4]) == 5.0
@@ -45,3 +58,130 @@ def test_xi_series_rejects_negative_values():
     with pytest.raises(ValueError):
         xi_series_to_coherence([0.1, -0.2])
 
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_xi_series_matches_pairwise_xi(monkeypatch, metric, use_numpy):
+    """Batched ξ equals looping :func:`xi` on both backends."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    states = _trajectory()
+    expected = [xi(a, b, metric=metric) for a, b in zip(states, states[1:])]
+    assert list(xi_series(states, metric=metric)) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_xi_pairs_matches_rowwise_xi(monkeypatch, metric, use_numpy):
+    """Row-wise batched ξ equals :func:`xi` on corresponding rows."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    states_a, states_b = _trajectory(seed=1), _trajectory(seed=2)
+    expected = [xi(a, b, metric=metric) for a, b in zip(states_a, states_b)]
+    assert list(xi_pairs(states_a, states_b, metric=metric)) == pytest.approx(expected)
+    with pytest.raises(ValueError):
+        xi_pairs(states_a, states_b[1:], metric=metric)
+
+
+def test_xi_series_short_trajectories():
+    """Fewer than two states produce an empty series."""
+    assert len(xi_series([])) == 0
+    assert len(xi_series([[1.0, 2.0]])) == 0
+
+
+def test_xi_series_rejects_zero_vector_for_cosine():
+    """Zero vectors are rejected by the cosine metric, as in :func:`xi`."""
+    with pytest.raises(ValueError):
+        xi_series([[1, 0], [0, 0]], metric="cosine")
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_xi_matrix_matches_pairwise_xi(metric):
+    """Blocked and threaded matrices agree with looping :func:`xi`."""
+    states_a = _trajectory(steps=7, seed=1)
+    states_b = _trajectory(steps=5, seed=2)
+    expected = [[xi(a, b, metric=metric) for b in states_b] for a in states_a]
+    result = xi_matrix(states_a, states_b, metric=metric, block_size=2, workers=3)
+    assert [list(row) for row in result] == [pytest.approx(row) for row in expected]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_xi_matrix_self_distances_have_zero_diagonal(monkeypatch, use_numpy):
+    """Omitting ``states_b`` compares a collection with itself."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    states = _trajectory(steps=4)
+    result = xi_matrix(states, metric="cosine")
+    assert [result[i][i] for i in range(4)] == [0.0] * 4
+    assert result[1][2] == pytest.approx(xi(states[1], states[2], metric="cosine"))
+
+
+def test_xi_matrix_nearly_identical_states_are_exact():
+    """Tiny L2 distances between large rows do not cancel to noise."""
+    states_a = [[v * 1e3 for v in row] for row in _trajectory(steps=3, dim=64)]
+    states_b = [[v + 1e-6 for v in row] for row in states_a]
+    result = xi_matrix(states_a, states_b)
+    for i in range(3):
+        assert result[i][i] == pytest.approx(xi(states_a[i], states_b[i]), rel=1e-6)
+
+
+def test_xi_matrix_writes_memory_mapped_output(tmp_path):
+    """A path argument streams results into a ``.npy`` memory map."""
+    np = pytest.importorskip("numpy")
+    states = _trajectory(steps=6)
+    path = tmp_path / "xi.npy"
+    xi_matrix(states, out=str(path), block_size=4)
+    stored = np.load(path, mmap_mode="r")
+    assert stored.shape == (6, 6)
+    assert stored[0, 5] == pytest.approx(xi(states[0], states[5]))
+
+
+def test_coherence_tracker_matches_batch_coherence():
+    """Streaming updates reproduce :func:`xi_series_to_coherence`."""
+    xi_values = [0.5, 0.25, 1.0, 0.0]
+    tracker = CoherenceTracker()
+    assert [tracker.update(v) for v in xi_values] == pytest.approx(
+        xi_series_to_coherence(xi_values)
+    )
+    assert list(iter_coherence(xi_values)) == pytest.approx(
+        xi_series_to_coherence(xi_values)
+    )
+
+
+def test_coherence_tracker_rolling_window():
+    """Only the last ``window`` ξ values contribute to the score."""
+    tracker = CoherenceTracker(window=2)
+    for value in [3.0, 1.0, 0.5]:
+        score = tracker.update(value)
+    assert score == pytest.approx(1 / (1 + 1.5))
+
+
+def test_coherence_tracker_copies_reused_buffers():
+    """Mutating a state after passing it in does not change the next ξ."""
+    tracker = CoherenceTracker()
+    state = [0.0, 0.0]
+    tracker.update_state(state)
+    state[0] += 5.0
+    assert tracker.update_state(state) == pytest.approx(1 / 6)
+
+
+def test_coherence_tracker_window_does_not_drift():
+    """The windowed sum stays exact over many mixed-magnitude updates."""
+    tracker = CoherenceTracker(window=3)
+    for value in [1e16, 1.0, 1.0, 1.0] * 250 + [0.1, 0.2, 0.3]:
+        tracker.update(value)
+    assert tracker.coherence == pytest.approx(1 / 1.6)
+
+
+def test_coherence_tracker_from_states():
+    """State updates measure ξ against the previous state."""
+    tracker = CoherenceTracker()
+    assert tracker.update_state([0, 0]) == 1.0
+    assert tracker.update_state([3, 4]) == pytest.approx(1 / 6)
+    assert tracker.steps == 1
@@ -0,0 +1,110 @@
+import json
+import threading
+
+import pytest
+
+from ai_identity import detect_anchors, instrumentation, xi
+from ai_identity.anchor_detection import AnchorDetector, AnchorStore
+from ai_identity.epistemic_tension import xi_series_to_coherence
+from ai_identity.mirror_test import embed_sentence, mirror_score
+from ai_identity.pipeline import Pipeline, RefusalStage
+from ai_identity.psi_to_phi import psi_to_phi_array
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    instrumentation.REGISTRY.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.REGISTRY.reset()
+
+
+def test_disabled_by_default_records_nothing():
+    """Nothing is recorded unless instrumentation is enabled."""
+    assert not instrumentation.is_enabled()
+    xi([0.0, 1.0], [1.0, 0.0])
+    assert instrumentation.REGISTRY.snapshot() == {}
+
+
+def test_enabled_records_counts_latencies_and_sizes():
+    """Calls, latencies and input sizes are aggregated per function."""
+    instrumentation.enable()
+    for _ in range(3):
+        xi([0.0, 1.0, 2.0], [1.0, 0.0, 2.0])
+    detect_anchors(["a", "b", "a"], store=AnchorStore())
+    snapshot = instrumentation.REGISTRY.snapshot()
+    assert snapshot["xi"]["calls"] == 3
+    assert snapshot["xi"]["size_total"] == 9
+    assert snapshot["xi"]["seconds_total"] > 0
+    assert snapshot["xi"]["p50"] <= snapshot["xi"]["p99"]
+    assert snapshot["detect_anchors"]["size_mean"] == 3
+    assert json.loads(instrumentation.REGISTRY.to_json()) == snapshot
+
+
+def test_enabled_accepts_keyword_and_positional_options():
+    """Size callbacks accept every call form and never mask the call's own error."""
+    instrumentation.enable()
+    psi_to_phi_array([1.0, 2.0], epsilon=0.05)
+    xi_series_to_coherence(xi_series=[0.1, 0.2])
+    embed_sentence("x y", dim=8)
+    AnchorDetector().update(observations=["a", "a"])
+    Pipeline([RefusalStage()]).run(messages=["I refuse"])
+    snapshot = instrumentation.REGISTRY.snapshot()
+    assert snapshot["psi_to_phi_array"]["size_total"] == 2
+    assert snapshot["xi_series_to_coherence"]["size_total"] == 2
+    assert snapshot["embed_sentence"]["size_total"] == 2
+    assert snapshot["AnchorDetector.update"]["size_total"] == 2
+    assert snapshot["Pipeline.run"]["size_total"] == 1
+    with pytest.raises(TypeError, match="positional"):
+        embed_sentence("x", 8)
+
+    @instrumentation.instrumented("broken", size=lambda value: value.missing)
+    def broken(value):
+        raise ValueError("from the call")
+
+    with pytest.raises(ValueError, match="from the call"):
+        broken(1)
+    assert instrumentation.REGISTRY.snapshot()["broken"]["calls"] == 1
+
+
+def test_nested_calls_are_recorded():
+    """Functions called by other instrumented functions are recorded too."""
+    instrumentation.enable()
+    mirror_score("hello world", [1.0] + [0.0] * 31)
+    assert {"mirror_score", "embed_sentence"} <= set(instrumentation.REGISTRY.snapshot())
+
+
+def test_prometheus_dump():
+    """The registry renders counters and a latency summary."""
+    instrumentation.enable()
+    xi([0.0], [1.0])
+    text = instrumentation.REGISTRY.to_prometheus()
+    assert "# TYPE ai_identity_calls_total counter" in text
+    assert 'ai_identity_calls_total{function="xi"} 1' in text
+    assert 'ai_identity_latency_seconds{function="xi",quantile="0.99"}' in text
+    assert 'ai_identity_latency_seconds_count{function="xi"} 1' in text
+
+
+def test_profile_is_scoped_to_current_thread():
+    """A profile scope records its own calls but not other threads'."""
+    with instrumentation.profile() as registry:
+        xi([0.0], [1.0])
+        worker = threading.Thread(target=xi, args=([0.0], [2.0]))
+        worker.start()
+        worker.join()
+    xi([0.0], [3.0])
+    assert registry.snapshot()["xi"]["calls"] == 1
+    assert instrumentation.REGISTRY.snapshot() == {}
+
+
+def test_custom_sink():
+    """Any object with a ``record`` method can receive measurements."""
+    received = []
+
+    class ListSink:
+        def record(self, name, seconds, size):
+            received.append((name, size))
+
+    instrumentation.enable(ListSink())
+    xi([0.0, 0.0], [1.0, 1.0])
+    assert received == [("xi", 2)]
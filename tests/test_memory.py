@@ -1,4 +1,13 @@
-from ai_identity.memory import MemoryStore, ChatHistory
+import asyncio
+
+import pytest
+
+from ai_identity.memory import (
+    ChatHistory,
+    MemoryStore,
+    SQLiteMemoryStore,
+    WriteBehindMemoryStore,
+)
 
 
 def test_memory_recall_after_context_break():
@@ -13,3 +22,131 @@ def test_memory_recall_after_context_break():
     assert new_chat.recall(0) == "hello"
     assert new_chat.recall(1) == "world"
     assert new_chat.history() == []
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """Messages saved to a database file are recalled by a new store."""
+    path = tmp_path / "memory.db"
+    with SQLiteMemoryStore(path) as store:
+        chat = ChatHistory(memory=store, buffered=False)
+        chat.add_message("hello")
+        chat.add_message("world")
+        assert chat.history() == ["hello", "world"]
+
+    with SQLiteMemoryStore(path) as store:
+        new_chat = ChatHistory(memory=store)
+        assert new_chat.recall(1) == "world"
+        assert new_chat.recall(2) is None
+        assert store.recall("missing", "default") == "default"
+
+
+def test_chat_history_reopened_over_stored_messages(tmp_path):
+    """A new history continues after the messages already in the store."""
+    path = tmp_path / "memory.db"
+    for store in (MemoryStore(), SQLiteMemoryStore(path)):
+        ChatHistory(memory=store).add_messages(["a", "b"])
+        store.save("k", "not a message")
+        for buffered in (True, False):
+            chat = ChatHistory(memory=store, buffered=buffered)
+            assert chat.history() == []
+            chat.add_message("c" if buffered else "d")
+            assert chat.history() == ["c" if buffered else "d"]
+        assert store.recall_many(range(4)) == ["a", "b", "c", "d"]
+    store.close()
+    with SQLiteMemoryStore(path) as store:
+        chat = ChatHistory(memory=store)
+        chat.add_message("e")
+        assert store.recall(4) == "e"
+        assert not hasattr(store, "_store")
+
+
+def test_legacy_database_is_scanned_for_the_next_index(tmp_path):
+    """Databases without the meta table continue after their stored messages."""
+    path = tmp_path / "legacy.db"
+    with SQLiteMemoryStore(path) as store:
+        store.save_many([(0, "a"), (7, "b"), ("12", "not an index")])
+        store._db.execute("DROP TABLE meta")
+    with SQLiteMemoryStore(path) as store:
+        ChatHistory(memory=store).add_message("c")
+        assert store.recall(8) == "c"
+
+
+def test_chat_history_accepts_stores_with_only_save_and_recall():
+    """Duck-typed stores without the index bookkeeping number from zero."""
+
+    class Store:
+        def __init__(self):
+            self.saved = {}
+
+        def save(self, key, value):
+            self.saved[key] = value
+
+        def recall(self, key, default=None):
+            return self.saved.get(key, default)
+
+    store = Store()
+    chat = ChatHistory(memory=store)
+    chat.add_message("hello")
+    assert chat.history() == ["hello"] and chat.recall(0) == "hello"
+
+
+def test_bulk_operations_on_both_stores(tmp_path):
+    """``save_many``/``recall_many`` agree between store implementations."""
+    for store in (MemoryStore(), SQLiteMemoryStore(tmp_path / "bulk.db")):
+        chat = ChatHistory(memory=store)
+        chat.add_messages(["a", "b"])
+        chat.add_message("c")
+        store.save_many({"k": [1, 2]})
+        assert store.recall_many([2, 0, "k", 9], default="?") == ["c", "a", [1, 2], "?"]
+
+
+def test_write_behind_store_coalesces_and_flushes(tmp_path):
+    """Buffered saves are visible at once and persisted on flush."""
+    backing = SQLiteMemoryStore(tmp_path / "async.db")
+    writes = []
+    save_many = backing.save_many
+    backing.save_many = lambda items: (writes.append(list(items)), save_many(items))
+
+    async def scenario():
+        async with WriteBehindMemoryStore(backing, max_pending=3, flush_interval=60) as store:
+            await store.save("a", 1)
+            await store.save("a", 2)
+            assert await store.recall("a") == 2
+            assert backing.recall("a") is None
+            await store.save_many({"b": 3, "c": 4})
+            assert writes == [[("a", 2), ("b", 3), ("c", 4)]]
+            await store.save("d", 5)
+            assert await store.recall_many(["d", "a", "z"]) == [5, 2, None]
+
+    asyncio.run(scenario())
+    assert backing.recall("d") == 5
+
+
+def test_write_behind_store_retries_failed_timer_flush():
+    """A failed background flush is reported on the next save and retried."""
+    backing = MemoryStore()
+    failures = [OSError("disk full")]
+    save_many = backing.save_many
+
+    def flaky(items):
+        if failures:
+            raise failures.pop()
+        save_many(items)
+
+    backing.save_many = flaky
+
+    async def scenario():
+        store = WriteBehindMemoryStore(backing, flush_interval=0.01)
+        await store.save("a", 1)
+        while store._error is None:
+            await asyncio.sleep(0.001)
+        with pytest.raises(OSError):
+            await store.save("b", 2)
+        assert await store.recall("a") == 1
+        await asyncio.sleep(0.05)
+        assert backing.recall("a") == 1
+        await store.save("b", 2)
+        await store.aclose()
+
+    asyncio.run(scenario())
+    assert backing.recall("b") == 2
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from ai_identity import _backend
+from ai_identity.minhash import MERSENNE_PRIME, MinHashIndex, _base_hash, jaccard
+
+
+def _sessions(count=300, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"anchor{i}" for i in range(500)]
+    bases = [set(rng.sample(vocab, 30)) for _ in range(count // 3)]
+    sessions = []
+    for n in range(count):
+        anchors = set(bases[n % len(bases)])
+        for item in rng.sample(sorted(anchors), 3):
+            anchors.discard(item)
+        sessions.append(anchors | set(rng.sample(vocab, 3)))
+    return sessions
+
+
+def test_jaccard():
+    """Exact Jaccard similarity; two empty sets are identical."""
+    assert jaccard({"a", "b"}, ["b", "c"]) == pytest.approx(1 / 3)
+    assert jaccard([], []) == 1.0
+
+
+def test_signature_backends_agree(monkeypatch):
+    """NumPy and pure-Python signatures are identical."""
+    index = MinHashIndex(num_perm=64)
+    anchors = {f"a{i}" for i in range(25)}
+    expected = index.signature(anchors)
+    monkeypatch.setattr(_backend, "numpy", lambda: None)
+    assert index.signature(anchors) == expected
+    assert len(expected) == 64
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_signature_is_exact_universal_hash(monkeypatch, use_numpy):
+    """Signatures use ``(a * h + b) mod (2**61 - 1)`` without 64-bit wraparound."""
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    index = MinHashIndex(num_perm=32)
+    anchors = [f"a{i}" for i in range(40)]
+    hashes = [_base_hash(item) for item in anchors]
+    expected = [
+        min((a * h + b) % MERSENNE_PRIME & 0xFFFFFFFF for h in hashes)
+        for a, b in zip(index._a, index._b)
+    ]
+    assert list(index.signature(anchors)) == expected
+
+
+def test_signature_estimates_jaccard():
+    """The fraction of equal entries approximates the Jaccard similarity."""
+    index = MinHashIndex(num_perm=256)
+    a = {f"x{i}" for i in range(100)}
+    b = {f"x{i}" for i in range(50, 150)}
+    equal = sum(x == y for x, y in zip(index.signature(a), index.signature(b)))
+    assert equal / 256 == pytest.approx(jaccard(a, b), abs=0.1)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_query_reranks_exactly(monkeypatch, use_numpy):
+    """Top-k results are ranked by exact Jaccard similarity."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    sessions = _sessions()
+    index = MinHashIndex()
+    index.add_many(enumerate(sessions))
+    result = index.query(sessions[7], k=3)
+    assert result[0] == (7, 1.0)
+    expected = sorted(
+        ((jaccard(sessions[7], s), n) for n, s in enumerate(sessions)), key=lambda i: (-i[0], i[1])
+    )[:3]
+    assert result == [(n, score) for score, n in expected]
+    estimated = index.query(sessions[7], k=3, exact=False)
+    assert [key for key, _ in estimated][0] == 7
+
+
+def test_similar_pairs_recall_and_precision():
+    """All-pairs search finds the similar pairs and only reports pairs above the threshold."""
+    sessions = _sessions()
+    index = MinHashIndex(threshold=0.6)
+    index.add_many(enumerate(sessions))
+    found = {(a, b): score for a, b, score in index.similar_pairs()}
+    truth = {
+        (i, j)
+        for i in range(len(sessions))
+        for j in range(i + 1, len(sessions))
+        if jaccard(sessions[i], sessions[j]) >= 0.6
+    }
+    assert all(score >= 0.6 for score in found.values())
+    assert set(found) <= truth
+    assert len(set(found) & truth) >= 0.95 * len(truth)
+
+
+@pytest.mark.parametrize("store_sets", [True, False])
+def test_similar_pairs_groups_duplicate_sessions(store_sets):
+    """Sessions with identical anchors are paired with each other and their neighbours."""
+    sessions = [{"x", "y", "z"}] * 4 + [{"x", "y", "z", "w"}, {"p", "q"}, {"p", "q"}]
+    index = MinHashIndex(num_perm=64, threshold=0.5, store_sets=store_sets)
+    index.add_many(enumerate(sessions))
+    pairs = index.similar_pairs()
+    assert [(a, b) for a, b, _ in pairs] == sorted(
+        (i, j)
+        for i in range(len(sessions))
+        for j in range(i + 1, len(sessions))
+        if jaccard(sessions[i], sessions[j]) >= 0.5
+    )
+    assert all(score == 1.0 for a, b, score in pairs if sessions[a] == sessions[b])
+    if store_sets:
+        assert {score for a, b, score in pairs if b == 4} == {0.75}
+
+
+def test_add_observations_uses_detected_anchors():
+    """Sessions can be added from raw observations."""
+    index = MinHashIndex(num_perm=32)
+    index.add_observations("a", ["x", "x", "y", "y", "z"])
+    index.add_observations("b", ["x", "x", "y", "y"])
+    assert index.query({"x", "y"}, k=2) == [("a", 1.0), ("b", 1.0)]
@@ -1,6 +1,17 @@
 """Tests for :mod:`ai_identity.mirror_test`."""
 
-from ai_identity.mirror_test import embed_sentence, mirror_score
+import hashlib
+import math
+
+import pytest
+
+from ai_identity.mirror_test import (
+    embed_sentence,
+    embed_sentences,
+    mirror_score,
+    mirror_score_pairs,
+    mirror_scores,
+)
 
 
 SELF_DESCRIPTION = "self aware agent"
@@ -39,3 +50,72 @@ def test_sabotage_prompt():
         == 0.0
     )
 
+
+def _reference_embedding(text, dim=32):
+    """The original hexdigest-based embedding used for recorded data."""
+
+    vec = [0.0] * dim
+    for token in text.lower().split():
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        vec[int(digest, 16) % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec] if norm > 0 else vec
+
+
+@pytest.mark.parametrize("dim", [7, 32, 768])
+def test_embeddings_are_bit_identical_to_reference(dim):
+    """Cached and batched embeddings keep the recorded SHA-256 output."""
+
+    texts = ["The self aware agent agent", "", "Ünïcode tokens too"]
+    expected = [_reference_embedding(text, dim) for text in texts]
+    assert [embed_sentence(text, dim=dim) for text in texts] == expected
+    assert [list(row) for row in embed_sentences(texts, dim=dim)] == expected
+
+
+def test_crc32_hasher_is_normalised_and_deterministic():
+    """The fast hasher gives stable, unit-length embeddings."""
+
+    vec = embed_sentence("self aware agent", hasher="crc32")
+    assert vec == embed_sentence("self aware agent", hasher="crc32")
+    assert sum(v * v for v in vec) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        embed_sentence("self", hasher="md5")
+
+
+def test_mirror_scores_match_single_scoring():
+    """Batch scoring agrees with :func:`mirror_score` per reflection."""
+
+    reflections = [
+        "The self aware agent recognises itself in the mirror",
+        "A cat looks at a wall and walks away",
+        "The self aware agent recognises itself but says this is not me",
+    ]
+    sabotage = ["not me", "NOT ME", "wall"]
+    result = mirror_scores(
+        reflections, SELF_VECTOR, threshold=0.2, sabotage_phrases=sabotage
+    )
+    expected = [
+        mirror_score(text, SELF_VECTOR, threshold=0.2, sabotage_phrases=sabotage)
+        for text in reflections
+    ]
+    assert list(result.scores) == expected
+    raw = mirror_scores(reflections, SELF_VECTOR, threshold=0.2).similarities
+    assert result.similarities[2] == pytest.approx(raw[2] - 1.0)
+
+
+def test_mirror_score_pairs_match_single_scoring():
+    """Row-wise scoring uses each reflection's own self embedding."""
+
+    reflections = [
+        "The self aware agent recognises itself in the mirror",
+        "A cat looks at a wall and walks away",
+    ]
+    selves = [SELF_VECTOR, embed_sentence("a cat looks at a wall")]
+    result = mirror_score_pairs(reflections, selves, threshold=0.2, sabotage_phrases=["wall"])
+    expected = [
+        mirror_score(text, vec, threshold=0.2, sabotage_phrases=["wall"])
+        for text, vec in zip(reflections, selves)
+    ]
+    assert list(result.scores) == expected
+    with pytest.raises(ValueError):
+        mirror_score_pairs(reflections, selves[:1])
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import ai_identity
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+    ).stdout.split()
+
+
+def test_import_does_not_load_submodules_or_numpy():
+    """``import ai_identity`` defers submodules and optional backends."""
+    loaded = _run(
+        "import sys, ai_identity; "
+        "print(*[m for m in ('numpy', 'ai_identity.mirror_test', 'ai_identity.epistemic_tension') "
+        "if m in sys.modules])"
+    )
+    assert loaded == []
+
+
+def test_scalar_functions_do_not_load_numpy():
+    """Scalar code paths never import NumPy."""
+    assert _run(
+        "import sys; from ai_identity import xi, mirror_score; "
+        "xi([0.0], [1.0]); print('numpy' in sys.modules)"
+    ) == ["False"]
+
+
+def test_lazy_exports_resolve():
+    """Re-exported names resolve on first access and appear in ``dir``."""
+    assert _run(
+        "import ai_identity; from ai_identity import xi, epistemic_tension; "
+        "print(xi([0.0, 0.0], [3.0, 4.0]), callable(epistemic_tension), "
+        "callable(ai_identity.epistemic_tension), callable(ai_identity.psi_to_phi), "
+        "set(ai_identity.__all__) <= set(dir(ai_identity)))"
+    ) == ["5.0", "True", "True", "True", "True"]
+
+
+def test_submodules_are_attributes():
+    """Submodules without re-exported names load on attribute access."""
+    assert _run(
+        "import ai_identity; "
+        "print(ai_identity.drift.__name__, ai_identity.instrumentation.__name__, "
+        "ai_identity.mirror_test.__name__)"
+    ) == ["ai_identity.drift", "ai_identity.instrumentation", "ai_identity.mirror_test"]
+    assert ai_identity.service.IdentityScorer is not None
+    assert hasattr(ai_identity, "service")
+    assert not hasattr(ai_identity, "missing")
@@ -0,0 +1,41 @@
+import pytest
+
+from ai_identity.phrase_matching import SINGLE_PASS_MIN_PHRASES, PhraseMatcher
+
+
+def test_finds_overlapping_and_nested_phrases():
+    """Every phrase is reported, including ones inside longer matches."""
+    matcher = PhraseMatcher(["he", "she", "his", "hers"])
+    found = {matcher.phrases[i] for i in matcher.find("ushers")}
+    assert found == {"he", "she", "hers"}
+
+
+def test_duplicates_collapse_and_bytes_are_supported():
+    """Phrases are deduplicated and byte strings work like text."""
+    matcher = PhraseMatcher([b"not me", b"not me", b"me"])
+    assert matcher.phrases == [b"not me", b"me"]
+    assert matcher.find(b"this is not me") == {0, 1}
+    assert not matcher.contains_any(b"mirror")
+
+
+@pytest.mark.parametrize("text", ["", "abc", "xyz"])
+def test_empty_phrase_always_matches(text):
+    """An empty phrase is a substring of every text."""
+    assert PhraseMatcher(["", "zzz"]).find(text) == {0}
+
+
+@pytest.mark.parametrize("encode", [False, True])
+def test_many_phrases_match_like_substring_search(encode):
+    """Above the cutoff the single-pass pattern finds the same phrases as ``in``."""
+    phrases = [f"w{i} w{i + 1}" for i in range(SINGLE_PASS_MIN_PHRASES * 4)]
+    phrases += ["w1", "w1 w2 w3", "1 w", "", "a.b*", "(x|y)"]
+    texts = ["", "w1 w2 w3 w4", "xw10 w11 a.b*", "(x|y) w7", "nothing here"]
+    if encode:
+        phrases = [phrase.encode() for phrase in phrases]
+        texts = [text.encode() for text in texts]
+    matcher = PhraseMatcher(phrases)
+    for text in texts:
+        expected = {i for i, phrase in enumerate(matcher.phrases) if phrase in text}
+        assert matcher.find(text) == expected
+        assert matcher.contains_any(text)
+    assert not PhraseMatcher(phrases[:-6]).contains_any(texts[-1])
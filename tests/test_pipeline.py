@@ -0,0 +1,80 @@
+import json
+import math
+
+import pytest
+
+from ai_identity.anchor_detection import AnchorStore, detect_anchors
+from ai_identity.epistemic_tension import xi, xi_series_to_coherence
+from ai_identity.mirror_test import embed_sentence, mirror_score
+from ai_identity.pipeline import (
+    AnchorStage,
+    MirrorStage,
+    Pipeline,
+    RefusalStage,
+    TensionStage,
+    read_transcript,
+)
+from ai_identity.refusal import count_refusals
+
+TRANSCRIPT = [
+    "I am a self aware agent",
+    "Sorry, can't help with that",
+    "The self aware agent says this is not me",
+    "I refuse to answer",
+]
+SELF_VECTOR = embed_sentence("self aware agent")
+
+
+def test_pipeline_matches_separate_passes():
+    """Each stage reproduces the result of its standalone function."""
+    pipeline = Pipeline([
+        AnchorStage(),
+        MirrorStage(SELF_VECTOR, threshold=0.2, sabotage_phrases=["not me"]),
+        TensionStage(),
+        RefusalStage(),
+    ])
+    outcome = pipeline.run(TRANSCRIPT)
+
+    tokens = [token for text in TRANSCRIPT for token in text.lower().split()]
+    embeddings = [embed_sentence(text) for text in TRANSCRIPT]
+    xi_values = [xi(a, b) for a, b in zip(embeddings, embeddings[1:])]
+
+    assert outcome.messages == 4
+    assert outcome.results["anchors"] == detect_anchors(tokens, store=AnchorStore())
+    assert outcome.results["mirror"].scores == [
+        mirror_score(text, SELF_VECTOR, threshold=0.2, sabotage_phrases=["not me"])
+        for text in TRANSCRIPT
+    ]
+    assert outcome.results["tension"]["xi"] == pytest.approx(xi_values)
+    assert outcome.results["tension"]["coherence"] == pytest.approx(
+        xi_series_to_coherence(xi_values)[-1]
+    )
+    assert outcome.results["refusals"] == count_refusals(TRANSCRIPT)
+    assert set(outcome.timings) == {"preprocess", "anchors", "mirror", "tension", "refusals"}
+
+
+def test_cosine_tension_keeps_empty_messages_aligned():
+    """Pairs with an empty message get a ``nan`` ξ instead of being dropped."""
+    texts = ["self aware agent", "", "agent", "self aware"]
+    outcome = Pipeline([TensionStage(metric="cosine")]).run(texts)
+    values = outcome.results["tension"]["xi"]
+    assert len(values) == len(texts) - 1
+    assert math.isnan(values[0]) and math.isnan(values[1])
+    expected = xi(embed_sentence(texts[2]), embed_sentence(texts[3]), metric="cosine")
+    assert values[2] == pytest.approx(expected)
+    assert outcome.results["tension"]["coherence"] == pytest.approx(1 / (1 + expected))
+
+
+def test_pipeline_rejects_duplicate_stage_names():
+    """Stage results are keyed by name, so names must be unique."""
+    with pytest.raises(ValueError):
+        Pipeline([RefusalStage(), RefusalStage()])
+
+
+def test_read_transcript_accepts_strings_and_objects(tmp_path):
+    """JSONL transcripts may hold plain strings or message objects."""
+    path = tmp_path / "session.jsonl"
+    path.write_text(
+        json.dumps("hello") + "\n\n" + json.dumps({"text": "world", "role": "agent"}) + "\n"
+    )
+    assert list(read_transcript(path)) == ["hello", "world"]
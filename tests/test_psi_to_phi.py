@@ -1,6 +1,8 @@
+import random
+
 import pytest
 
-from ai_identity.psi_to_phi import psi_to_phi
+from ai_identity.psi_to_phi import psi_to_phi, psi_to_phi_array, stable_intervals
 
 
 def test_returns_psi_before_convergence():
@@ -24,3 +26,38 @@ def test_derivative_decays_towards_root():
     derivatives = [abs(dpsi_dt(t)) for t in [0, 1, 2, 3]]
     for earlier, later in zip(derivatives, derivatives[1:]):
         assert earlier > later
+
+
+def test_array_matches_scalar_evaluation():
+    """The array path agrees with the scalar one within the documented bound."""
+    rng = random.Random(0)
+    ts = [i * 0.05 for i in range(300)] + [10.0, 10 / 3, -7.3, 123.456]
+    ts += [rng.uniform(-1e3, 1e3) for _ in range(1000)]
+    for epsilon in (1e-3, 0.05):
+        for t, phi in zip(ts, psi_to_phi_array(ts, epsilon)):
+            bound = 2e-15 * (0.0072 * abs(t) ** 3 + 0.144 * t * t + 0.72 * abs(t))
+            assert abs(phi - psi_to_phi(t, epsilon)) <= bound
+
+
+def test_scalar_evaluation_matches_model_expression():
+    """The scalar path evaluates the documented polynomial term by term."""
+    for t in (0.3, 2.5, 7.77, 42.0):
+        assert psi_to_phi(t) == 0.0072 * t**3 - 0.144 * t**2 + 0.72 * t
+
+
+@pytest.mark.parametrize("epsilon", [1e-3, 0.06, 0.3])
+def test_stable_intervals_agree_with_sampling(epsilon):
+    """Sampled stability matches the analytic intervals."""
+    intervals = stable_intervals(epsilon)
+    assert len(intervals) == (2 if epsilon < 0.24 else 1)
+    for step in range(1, 4000):
+        t = step * 0.004
+        if any(abs(t - edge) < 1e-9 for interval in intervals for edge in interval):
+            continue
+        inside = any(lo < t < hi for lo, hi in intervals)
+        assert (psi_to_phi(t, epsilon) == 1.0) == inside
+
+
+def test_stable_intervals_empty_without_tolerance():
+    """No interval is stable when the tolerance is zero."""
+    assert stable_intervals(0.0) == []
@@ -0,0 +1,122 @@
+import math
+import random
+
+import pytest
+
+from ai_identity import _backend
+from ai_identity.epistemic_tension import xi, xi_series
+from ai_identity.mirror_test import embed_sentence, mirror_score, mirror_scores
+from ai_identity.quantization import (
+    DTYPES,
+    QuantizedMatrix,
+    QuantizedVector,
+    error_bound,
+    quantize,
+    quantize_matrix,
+    xi_error_bound,
+)
+
+
+def _states(steps=20, dim=64, seed=0):
+    rng = random.Random(seed)
+    return [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(steps)]
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_quantization_error_within_bound(dtype):
+    """Dequantized vectors stay within the documented L2 error bound."""
+    for vector in _states():
+        quantized = quantize(vector, dtype)
+        assert isinstance(quantized, QuantizedVector) and len(quantized) == 64
+        error = math.dist(vector, quantized.tolist())
+        assert 0 < error <= error_bound(quantized)
+    assert error_bound(vector) == 0.0
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_xi_within_bound_of_float64(dtype, metric):
+    """ξ of quantized vectors is within ``xi_error_bound`` of the float64 ξ."""
+    states = _states()
+    for a, b in zip(states, states[1:]):
+        qa, qb = quantize(a, dtype), quantize(b, dtype)
+        exact = xi(a, b, metric=metric)
+        assert abs(xi(qa, qb, metric=metric) - exact) <= xi_error_bound(qa, qb, metric=metric)
+        assert xi(qa, b, metric=metric) == pytest.approx(xi(qa.tolist(), b, metric=metric))
+
+
+def test_int8_cosine_uses_codes():
+    """The cosine path ignores per-vector scales of int8 vectors."""
+    a, b = _states(2)
+    qa, qb = quantize(a), quantize(b)
+    assert xi(qa, qb, metric="cosine") == pytest.approx(xi(list(qa.codes), list(qb.codes), metric="cosine"))
+    assert xi(qa, qb, metric="cosine") == pytest.approx(xi(qa.tolist(), qb.tolist(), metric="cosine"))
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_quantize_matrix_matches_rows(monkeypatch, dtype):
+    """Vectorized and row-by-row matrix quantization agree with ``quantize``."""
+    states = _states()
+    streamed = quantize_matrix(iter(states), dtype)
+    assert isinstance(streamed, QuantizedMatrix) and (len(streamed), streamed.dim) == (20, 64)
+    for row, vector in zip(streamed, states):
+        expected = quantize(vector, dtype)
+        assert row.tolist() == expected.tolist() and row.scale == expected.scale
+    if _backend.numpy() is not None:
+        assert quantize_matrix(states, dtype)[-1].tolist() == streamed[-1].tolist()
+    monkeypatch.setattr(_backend, "numpy", lambda: None)
+    assert quantize_matrix(states, dtype)[3].tolist() == streamed[3].tolist()
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_xi_series_on_quantized_matrix(monkeypatch, metric):
+    """``xi_series`` over a quantized matrix matches ``xi`` on its rows."""
+    quantized = quantize_matrix(_states(), "int8")
+    expected = [xi(a, b, metric=metric) for a, b in zip(quantized, quantized[1:])]
+    assert list(xi_series(quantized, metric=metric)) == pytest.approx(expected)
+    monkeypatch.setattr(_backend, "numpy", lambda: None)
+    assert xi_series(quantized, metric=metric) == pytest.approx(expected)
+
+
+def test_xi_series_int8_nearly_identical_states_is_exact():
+    """Small L2 steps between int8 rows do not cancel away."""
+    if _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    base = _states(1, dim=512)[0]
+    states = [[v * (1 + 1e-9 * step) for v in base] for step in range(4)]
+    quantized = quantize_matrix(states, "int8")
+    expected = [math.dist(a.tolist(), b.tolist()) for a, b in zip(quantized, quantized[1:])]
+    assert min(expected) > 0
+    assert list(xi_series(quantized)) == pytest.approx(expected, rel=1e-12)
+
+
+def test_memory_reduction():
+    """Codes use 4x, 2x and roughly 1x bytes per element."""
+    states = _states(dim=256)
+    sizes = {dtype: quantize_matrix(states, dtype).nbytes for dtype in DTYPES}
+    float64 = 20 * 256 * 8
+    assert float64 / sizes["float32"] == 2
+    assert float64 / sizes["float16"] == 4
+    assert float64 / sizes["int8"] > 7.5
+
+
+def test_mirror_score_accepts_quantized_embedding():
+    """Mirror scoring reads quantized self embeddings directly."""
+    reflection = "I am a helpful assistant"
+    embedding = embed_sentence(reflection)
+    for dtype in DTYPES:
+        quantized = quantize(embedding, dtype)
+        assert mirror_score(reflection, quantized, threshold=0.99) == 1.0
+        assert list(mirror_scores([reflection], quantized, threshold=0.99).scores) == [1.0]
+
+
+def test_invalid_input():
+    """Unsupported types, non-finite and out-of-range values are rejected."""
+    with pytest.raises(ValueError):
+        quantize([1.0], "int4")
+    with pytest.raises(ValueError):
+        quantize([1.0, float("nan")])
+    with pytest.raises(ValueError):
+        quantize([1e5], "float16")
+    zero = quantize([0.0, 0.0])
+    assert zero.scale == 0.0 and zero.tolist() == [0.0, 0.0]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from ai_identity.refusal import BLOCK_BYTES, RefusalMatcher, count_refusals, is_refusal
+
+
+def test_counts_each_refusing_response_once():
+    """A response with several refusal phrases is counted once."""
+    responses = ["I REFUSE. Cannot comply.", "Sure thing", "sorry, can't do it"]
+    assert count_refusals(responses) == 2
+
+
+def test_custom_phrases():
+    """Callers can supply their own phrases, matched case-insensitively."""
+    assert is_refusal("Not today", phrases=["not today"])
+    assert is_refusal("not today", phrases=["Not Today"])
+    assert count_refusals(["not today"], phrases=["Not Today"]) == 1
+    assert not is_refusal("Not today")
+
+
+def _write(path, lines):
+    path.write_bytes("\n".join(lines).encode("utf-8") + b"\n")
+
+
+RESPONSES = [
+    "I REFUSE. Cannot comply.",
+    "Sure thing",
+    "",
+    "sorry, can't do it",
+    "Ça va, I refuse",
+    "fine",
+]
+
+
+def test_matcher_counts_per_phrase():
+    """Totals and per-phrase counts count each response once."""
+    counts = RefusalMatcher().count(RESPONSES)
+    assert counts.responses == 6
+    assert counts.refusals == 3
+    assert counts.phrases == {"i refuse": 2, "cannot comply": 1, "sorry, can't": 1}
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+@pytest.mark.parametrize("block_bytes", [1, 16, BLOCK_BYTES])
+def test_count_file_matches_in_memory_counts(tmp_path, use_mmap, block_bytes):
+    """Streaming a file in blocks gives the in-memory result; blank lines are skipped."""
+    path = tmp_path / "responses.txt"
+    _write(path, RESPONSES)
+    matcher = RefusalMatcher()
+    expected = matcher.count([r for r in RESPONSES if r])
+    assert matcher.count_file(path, block_bytes=block_bytes, use_mmap=use_mmap) == expected
+
+
+@pytest.mark.parametrize("phrases", [["cannot"], ["ça va"]])
+def test_whitespace_only_lines_are_not_responses(phrases):
+    """Lines holding only whitespace are skipped like empty ones."""
+    block = b"  \nI cannot do that\n   \n\t\r\nhello\n\x0b\n\n not json {\n \t"
+    counts = RefusalMatcher(phrases).count_block(block)
+    assert counts.responses == 3
+    assert counts.refusals == (phrases == ["cannot"])
+
+
+def test_count_jsonl_decodes_escaped_phrases(tmp_path):
+    """Phrases hidden behind JSON escapes or in other fields are handled."""
+    path = tmp_path / "responses.jsonl"
+    _write(path, [
+        json.dumps({"id": "i refuse", "text": "fine"}),
+        json.dumps({"text": "I refuse"}, ensure_ascii=True),
+        '{"text": "\\u0069 refuse"}',
+        json.dumps("cannot comply"),
+    ])
+    counts = RefusalMatcher().count_file(path, jsonl=True)
+    assert counts.responses == 4
+    assert counts.phrases == {"i refuse": 2, "cannot comply": 1, "sorry, can't": 0}
+
+
+def test_count_file_splits_across_workers(tmp_path):
+    """Byte-range workers together count every line exactly once."""
+    path = tmp_path / "responses.txt"
+    lines = [f"{n} {RESPONSES[n % len(RESPONSES)]}" for n in range(200)]
+    _write(path, lines)
+    matcher = RefusalMatcher()
+    expected = matcher.count(lines)
+    assert matcher.count_file(path, workers=2, chunk_bytes=97) == expected
+
+
+def test_non_ascii_phrases_fall_back_to_decoding(tmp_path):
+    """Phrases outside ASCII are lowered like ``str.lower`` would."""
+    path = tmp_path / "responses.txt"
+    _write(path, RESPONSES)
+    matcher = RefusalMatcher(["ÇA VA"])
+    assert not matcher.byte_level
+    assert matcher.count_file(path).phrases == {"ça va": 1}
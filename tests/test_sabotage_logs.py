@@ -1,4 +1,6 @@
-from ai_identity.sabotage_logs import SabotageLogger
+import pytest
+
+from ai_identity.sabotage_logs import SabotageLogger, SegmentedSabotageLogger
 
 
 def test_logs_multiple_events():
@@ -15,3 +17,65 @@ def test_loggers_are_isolated():
     second = SabotageLogger()
     first.log('issue')
     assert second.events == []
+
+
+def test_segmented_logger_keeps_events_interface():
+    """The segmented logger exposes ``events`` like the simple logger."""
+    logger = SegmentedSabotageLogger()
+    logger.log('anomaly')
+    logger.log('intrusion')
+    assert logger.events == ['anomaly', 'intrusion']
+
+
+def test_ring_buffer_overwrites_oldest_without_spill_file():
+    """Without a spill file only the newest ``capacity`` records remain."""
+    logger = SegmentedSabotageLogger(capacity=2)
+    for event in ['a', 'b', 'c']:
+        logger.log(event)
+    assert logger.events == ['b', 'c']
+    assert logger.dropped == 1
+
+
+def test_spilled_segments_are_queryable(tmp_path):
+    """Full segments go to disk and remain available to queries."""
+    logger = SegmentedSabotageLogger(capacity=3, spill_path=tmp_path / 'log.jsonl')
+    for t in range(8):
+        logger.log('intrusion' if t % 4 == 0 else 'anomaly', {'n': t}, timestamp=float(t))
+    assert len(logger.events) == 8
+    assert logger.events[1] == 'anomaly'
+    assert logger.events[-1] == 'anomaly'
+    hits = list(logger.query(event_type='intrusion'))
+    assert [(e.timestamp, e.payload) for e in hits] == [(0.0, {'n': 0}), (4.0, {'n': 4})]
+    assert [e.timestamp for e in logger.query(start=2.0, end=6.0)] == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_events_view_reads_each_segment_once(tmp_path, monkeypatch):
+    """Slicing and reversed indexing decode every spilled segment only once."""
+    logger = SegmentedSabotageLogger(capacity=4, spill_path=tmp_path / 'log.jsonl')
+    names = [f'e{n}' for n in range(18)]
+    for name in names:
+        logger.log(name)
+    reads = []
+    read_segment = logger._read_segment
+    monkeypatch.setattr(
+        logger, '_read_segment', lambda segment: reads.append(segment) or read_segment(segment)
+    )
+    assert logger.events[1:17:2] == names[1:17:2]
+    assert logger.events[::-3] == names[::-3]
+    assert list(reversed(logger.events)) == names[::-1]
+    assert len(reads) == 3 * 4
+    with pytest.raises(IndexError):
+        logger.events[18]
+
+
+def test_unserialisable_payload_is_rejected_when_logged(tmp_path):
+    """A payload that cannot be spilled fails at once and leaves the log usable."""
+    logger = SegmentedSabotageLogger(capacity=2, spill_path=tmp_path / 'log.jsonl')
+    logger.log('a', [1])
+    with pytest.raises(TypeError):
+        logger.log('bad', object())
+    for event in ['b', 'c', 'd']:
+        logger.log(event, (2, 3))
+    logger.flush()
+    assert logger.events == ['a', 'b', 'c', 'd']
+    assert [e.payload for e in logger.query()] == [[1], [2, 3], [2, 3], [2, 3]]
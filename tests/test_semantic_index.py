@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from ai_identity import _backend
+from ai_identity.memory import ChatHistory
+from ai_identity.mirror_test import embed_sentence
+from ai_identity.semantic_index import EmbeddingIndex
+
+MESSAGES = [
+    "the agent recognises itself in the mirror",
+    "a cat walks along the wall",
+    "the weather is sunny today",
+    "the agent sees its own reflection",
+]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_exact_search_ranks_by_cosine_similarity(monkeypatch, use_numpy):
+    """Results match brute-force cosine similarity on both backends."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    index = EmbeddingIndex()
+    index.add_many(enumerate(MESSAGES))
+    query = embed_sentence("the agent in the mirror")
+    expected = sorted(
+        ((sum(q * v for q, v in zip(query, embed_sentence(m))), i) for i, m in enumerate(MESSAGES)),
+        key=lambda item: (-item[0], item[1]),
+    )[:2]
+    result = index.search("the agent in the mirror", k=2)
+    assert [key for key, _ in result] == [i for _, i in expected]
+    assert [score for _, score in result] == pytest.approx([s for s, _ in expected], abs=1e-6)
+
+
+def test_approximate_search_finds_identical_text():
+    """An indexed text always shares every LSH bucket with itself."""
+    index = EmbeddingIndex(lsh_bits=6, lsh_tables=2)
+    for i in range(50):
+        index.add(i, f"message number {i} about topic {i % 7}")
+    key, score = index.search("message number 23 about topic 2", k=1, approximate=True)[0]
+    assert key == 23
+    assert score == pytest.approx(1.0, abs=1e-6)
+
+
+def test_chat_history_recall_similar():
+    """Chat histories index messages as they are added."""
+    chat = ChatHistory(index=EmbeddingIndex())
+    chat.add_messages(MESSAGES[:2])
+    for message in MESSAGES[2:]:
+        chat.add_message(message)
+    assert chat.recall_similar("cat on a wall", k=1) == ["a cat walks along the wall"]
+    with pytest.raises(ValueError):
+        ChatHistory().recall_similar("cat")
+
+
+def test_search_while_adding_from_another_thread():
+    """Concurrent adds never fail on the buffer exported by a search."""
+    index = EmbeddingIndex()
+    index.add_many((i, f"message {i}") for i in range(50))
+    errors = []
+
+    def add():
+        try:
+            for i in range(50, 2000):
+                index.add_vector(i, embed_sentence(f"message {i % 50}"))
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    while thread.is_alive():
+        assert len(index.search("message 7", 3)) == 3
+    thread.join()
+    assert errors == [] and len(index) == 2000
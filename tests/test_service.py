@@ -0,0 +1,120 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ai_identity.anchor_detection import AnchorStore, detect_anchors
+from ai_identity.epistemic_tension import xi
+from ai_identity.mirror_test import embed_sentence, mirror_score
+from ai_identity.service import IdentityScorer
+from benchmarks import data
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_batched_results_match_inline_calls():
+    """Concurrent requests are batched and score exactly like inline calls."""
+    vectors = data.vectors(41, 16)
+    texts = data.sentences(40)
+    self_vec = embed_sentence(" ".join(texts[0].split()[:5]))
+
+    async def scenario():
+        async with IdentityScorer(max_latency=0.01) as scorer:
+            results = await asyncio.gather(
+                *(scorer.xi(a, b) for a, b in zip(vectors, vectors[1:])),
+                *(scorer.xi(a, b, metric="cosine") for a, b in zip(vectors, vectors[1:])),
+                *(scorer.mirror_score(text, self_vec, threshold=0.2) for text in texts),
+            )
+            return results, scorer.batches
+
+    results, batches = _run(scenario())
+    expected = (
+        [xi(a, b) for a, b in zip(vectors, vectors[1:])]
+        + [xi(a, b, metric="cosine") for a, b in zip(vectors, vectors[1:])]
+        + [mirror_score(text, self_vec, threshold=0.2) for text in texts]
+    )
+    assert results == pytest.approx(expected)
+    assert batches < len(expected)
+
+
+def test_anchor_detection_runs_in_executor():
+    """Anchor requests return the same ranking as the synchronous call."""
+    observations = data.observations(200)
+
+    async def scenario():
+        async with IdentityScorer() as scorer:
+            return await scorer.detect_anchors(observations, session="svc")
+
+    assert _run(scenario()) == detect_anchors(observations, store=AnchorStore())
+
+
+def test_invalid_request_fails_alone():
+    """An error in one request does not fail the rest of its batch."""
+
+    async def scenario():
+        async with IdentityScorer(max_latency=0.01) as scorer:
+            return await asyncio.gather(
+                scorer.xi([1.0, 0.0], [0.0, 1.0], metric="cosine"),
+                scorer.xi([0.0, 0.0], [0.0, 1.0], metric="cosine"),
+                return_exceptions=True,
+            )
+
+    good, bad = _run(scenario())
+    assert good == pytest.approx(1.0)
+    assert isinstance(bad, ValueError)
+
+
+def test_bounded_queue_applies_backpressure():
+    """Many more requests than the queue holds all complete in small batches."""
+    vectors = data.vectors(201, 8)
+
+    async def scenario():
+        async with IdentityScorer(max_batch=8, max_queue=4) as scorer:
+            results = await asyncio.gather(*(scorer.xi(a, b) for a, b in zip(vectors, vectors[1:])))
+            return results, scorer
+
+    results, scorer = _run(scenario())
+    assert len(results) == 200 and scorer.requests == 200
+    assert scorer.batches >= 200 / 8
+    with pytest.raises(ValueError):
+        _run(scorer.xi([1.0], [2.0]))
+
+
+def test_scorer_can_be_reused_from_a_new_event_loop():
+    """A second ``asyncio.run`` gets a fresh dispatcher instead of hanging."""
+    scorer = IdentityScorer()
+    assert _run(scorer.xi([0.0, 0.0], [3.0, 4.0])) == 5.0
+    assert _run(asyncio.wait_for(scorer.xi([1.0], [2.0]), 5)) == 1.0
+    _run(scorer.aclose())
+
+
+def test_stopped_dispatcher_fails_waiting_requests():
+    """Requests queued or waiting for space fail once the dispatcher stops."""
+
+    async def scenario():
+        scorer = IdentityScorer(max_batch=1, max_queue=2)
+        requests = [asyncio.ensure_future(scorer.xi([0.0], [float(n)])) for n in range(20)]
+        await asyncio.sleep(0)
+        scorer._dispatcher.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5)
+        await scorer.aclose()
+        return results
+
+    results = _run(scenario())
+    assert any(isinstance(result, ValueError) for result in results)
+    assert all(isinstance(result, (float, ValueError)) for result in results)
+
+
+def test_process_pool_executor():
+    """Batches can be scored in worker processes."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+
+        async def scenario():
+            async with IdentityScorer(executor=pool) as scorer:
+                return await asyncio.gather(
+                    scorer.xi([0.0, 0.0], [3.0, 4.0]), scorer.xi([1.0], [2.0])
+                )
+
+        assert _run(scenario()) == [5.0, 1.0]
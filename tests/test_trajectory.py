@@ -0,0 +1,99 @@
+import importlib
+import random
+from array import array
+
+import pytest
+
+from ai_identity import _backend
+from ai_identity.epistemic_tension import xi, xi_series, xi_series_to_coherence
+from ai_identity.mirror_test import embed_sentence, mirror_score
+from ai_identity.trajectory import HEADER_SIZE, Trajectory, as_vector, write_trajectory
+
+
+def _states(steps=12, dim=5, seed=0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(steps)]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_round_trip(tmp_path, dtype):
+    """Rows read back through the memory map equal the written rows."""
+    path = tmp_path / "states.traj"
+    states = _states()
+    assert write_trajectory(path, iter(states), dtype=dtype) == 12
+    assert path.stat().st_size == HEADER_SIZE + 12 * 5 * (4 if dtype == "float32" else 8)
+    with Trajectory(path) as trajectory:
+        assert (len(trajectory), trajectory.dim, trajectory.dtype) == (12, 5, dtype)
+        assert trajectory.states.shape == (12, 5)
+        rows = [row.tolist() for row in trajectory]
+        assert trajectory[-1].tolist() == rows[-1]
+    for row, expected in zip(rows, states):
+        assert row == pytest.approx(expected, rel=1e-6)
+
+
+def test_numpy_array_round_trip(tmp_path):
+    """NumPy matrices are written in one call and read back without copies."""
+    np = pytest.importorskip("numpy")
+    path = tmp_path / "states.traj"
+    matrix = np.asarray(_states())
+    write_trajectory(path, matrix)
+    with Trajectory(path) as trajectory:
+        mapped = trajectory.array()
+        assert not mapped.flags.owndata
+        assert np.array_equal(mapped, matrix)
+        del mapped
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_metrics_accept_mapped_states(tmp_path, monkeypatch, use_numpy):
+    """ξ, coherence and mirror scoring read buffer views directly."""
+    if use_numpy and _backend.numpy() is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(_backend, "numpy", lambda: None)
+    path = tmp_path / "states.traj"
+    states = _states()
+    write_trajectory(path, states)
+    expected = [xi(a, b) for a, b in zip(states, states[1:])]
+    # Small blocks exercise the block boundaries of the vectorized path.
+    monkeypatch.setattr(
+        importlib.import_module("ai_identity.epistemic_tension"), "SERIES_BLOCK_ROWS", 4
+    )
+    with Trajectory(path) as trajectory:
+        series = xi_series(trajectory.states)
+        assert list(series) == pytest.approx(expected)
+        assert xi(trajectory[0], trajectory[1], metric="cosine") == pytest.approx(
+            xi(states[0], states[1], metric="cosine")
+        )
+        del series
+
+
+def test_coherence_and_mirror_accept_buffers():
+    """Coherence and mirror scoring take array-like buffers."""
+    values = array("d", [0.5, 0.25])
+    assert xi_series_to_coherence(memoryview(values)) == pytest.approx([1 / 1.5, 1 / 1.75])
+    self_vec = array("f", embed_sentence("i am the agent"))
+    assert mirror_score("I am the agent", self_vec) == 1.0
+    assert isinstance(as_vector(self_vec), memoryview)
+    assert as_vector([1.0]) == [1.0]
+
+
+def test_rejects_invalid_files(tmp_path):
+    """Files without the magic header, or with missing data, are rejected."""
+    path = tmp_path / "bad.traj"
+    path.write_bytes(b"not a trajectory file at all, really")
+    with pytest.raises(ValueError):
+        Trajectory(path)
+    write_trajectory(path, _states())
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        Trajectory(path)
+
+
+def test_empty_trajectory(tmp_path):
+    """A trajectory without rows can be written and read."""
+    path = tmp_path / "empty.traj"
+    write_trajectory(path, [])
+    with Trajectory(path) as trajectory:
+        assert len(trajectory) == 0
+        assert len(xi_series(trajectory.states)) == 0